@@ -1,11 +1,34 @@
 from flask import Flask, jsonify, render_template, request, redirect, url_for, session, flash
 from rdflib import Graph, Namespace, Literal, URIRef
 from rdflib.namespace import RDF, RDFS, XSD
+import gc
+import hashlib
 import os
-import shutil
+import re
+import atexit
+import threading
+import time
 # import requests  # Optional: untuk Calendarific API (belum aktif)
 from datetime import datetime
+from contextlib import nullcontext
 from functools import wraps
+from itertools import chain
+from markupsafe import Markup
+import bulk_io
+import sparql_query
+from graph_journal import GraphJournal, InterProcessLock
+from backup_store import BackupStore
+from calendar_index import EventIndex, to_ical
+from geo_cluster import MAX_ZOOM, tiles_in_bbox
+from graph_snapshot import load_snapshot, snapshot_is_fresh, write_snapshot
+from metrics import Registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from persistence_worker import PersistenceWorker
+from response_cache import ResponseCache, stream_response
+from sampling_profiler import SamplingProfiler
+from sqlite_store import SQLiteStore
+from site_store import (SiteRecord, SiteStore, HASH_FIELDS, ORDERINGS, parse_fields,
+                        site_detail, site_summary)
+from transit_index import MODES, parse_transport
 # hijri-converter not available, will use manual data instead
 
 app = Flask(__name__)
@@ -16,8 +39,61 @@ CALENDARIFIC_API_KEY = os.environ.get('CALENDARIFIC_API_KEY', '')  # Optional: s
 CALENDARIFIC_URL = 'https://calendarific.com/api/v2/holidays'
 
 # --- TTL FILE PATH ---
-TTL_FILE = os.path.join(os.path.dirname(__file__), 'ReligiJakarta.ttl')
-BACKUP_DIR = os.path.join(os.path.dirname(__file__), 'backup')
+# DATA_DIR bisa diarahkan ke dataset lain (misalnya data sintetis dari benchmark.py)
+DATA_DIR = os.environ.get('DATA_DIR', os.path.dirname(__file__))
+TTL_FILE = os.path.join(DATA_DIR, 'ReligiJakarta.ttl')
+BACKUP_DIR = os.path.join(DATA_DIR, 'backup')
+JOURNAL_FILE = os.path.join(DATA_DIR, 'ReligiJakarta.journal')
+SNAPSHOT_FILE = os.path.join(DATA_DIR, 'ReligiJakarta.snapshot')
+# Proyeksi site (record + index SiteStore) yang dimuat saat start-up tanpa rebuild dari graph
+PROJECTION_FILE = os.path.join(DATA_DIR, 'ReligiJakarta.projection')
+STORE_FILE = os.path.join(DATA_DIR, 'ReligiJakarta.sqlite')
+
+# --- GRAPH STORE ---
+# 'memory': graph rdflib di RAM tiap worker (dimuat dari snapshot/TTL saat start)
+# 'sqlite': satu file SQLite ber-index di DATA_DIR yang dipakai bersama semua worker
+GRAPH_STORE = os.environ.get('GRAPH_STORE', 'memory')
+if GRAPH_STORE not in ('memory', 'sqlite'):
+    raise ValueError(f"GRAPH_STORE harus 'memory' atau 'sqlite', bukan {GRAPH_STORE!r}")
+
+# --- COMPACTION ---
+# Journal digabung ke file TTL oleh worker latar belakang setelah rentetan perubahan
+# reda sekian detik (paling lama sekian detik sejak perubahan pertama), langsung
+# setelah sekian batch, dan paling lambat setiap sekian detik
+PERSIST_DELAY = float(os.environ.get('PERSIST_DELAY', 5))
+PERSIST_MAX_DELAY = float(os.environ.get('PERSIST_MAX_DELAY', 60))
+COMPACT_EVERY = int(os.environ.get('COMPACT_EVERY', 200))
+COMPACT_INTERVAL = float(os.environ.get('COMPACT_INTERVAL', 300))
+
+# --- MULTI-PROCESS ---
+# Worker memeriksa journal untuk perubahan dari worker lain paling sering tiap sekian detik
+SYNC_INTERVAL = float(os.environ.get('SYNC_INTERVAL', 1.0))
+
+# --- HTTP CACHING ---
+# Response API disimpan per versi graph; klien selalu revalidasi lewat ETag (304)
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))
+CACHE_CONTROL = os.environ.get('CACHE_CONTROL', 'public, no-cache')
+# Daftar /api/sites sebesar ini (jumlah site) dialirkan per potongan, tidak disimpan utuh di cache
+STREAM_MIN_SITES = int(os.environ.get('STREAM_MIN_SITES', 5000))
+# Fragmen HTML per site (halaman detail, kartu jelajahi) yang disimpan; entri terlama dibuang
+FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 5000))
+
+# --- DELTA SYNC ---
+# Jumlah ID site di change log /api/changes; klien yang tertinggal lebih jauh diminta reload penuh
+CHANGE_LOG_SITES = int(os.environ.get('CHANGE_LOG_SITES', 10000))
+# Batas ?wait= long-poll dan lama satu koneksi Server-Sent Events (EventSource menyambung ulang)
+CHANGES_MAX_WAIT = float(os.environ.get('CHANGES_MAX_WAIT', 30))
+CHANGES_STREAM_SECONDS = float(os.environ.get('CHANGES_STREAM_SECONDS', 300))
+# Thread Waitress per worker yang boleh dipakai menunggu perubahan (sisanya untuk request biasa)
+CHANGES_MAX_WAITERS = int(os.environ.get('CHANGES_MAX_WAITERS', 4))
+
+# --- SPARQL ---
+# Batas waktu (detik) dan jumlah hasil per query /sparql, dan query yang dievaluasi bersamaan per worker
+SPARQL_TIMEOUT = float(os.environ.get('SPARQL_TIMEOUT', 10))
+SPARQL_MAX_ROWS = int(os.environ.get('SPARQL_MAX_ROWS', 10000))
+SPARQL_MAX_CONCURRENT = int(os.environ.get('SPARQL_MAX_CONCURRENT', 2))
+# Hasil query disimpan per versi graph, terpisah dari cache response API
+SPARQL_CACHE_SIZE = int(os.environ.get('SPARQL_CACHE_SIZE', 128))
 
 # --- NAMESPACES ---
 REL = Namespace("http://jakartaharmony.id/religijkt#")
@@ -30,48 +106,286 @@ g.bind("rel", REL)
 g.bind("geo", GEO)
 g.bind("schema", SCHEMA)
 
+# Semua penulisan ke graph (admin & compaction) melewati lock ini
+graph_lock = threading.RLock()
+journal = GraphJournal(JOURNAL_FILE)
+# Hanya satu worker yang menulis ulang TTL/snapshot pada satu waktu
+compaction_lock = InterProcessLock(JOURNAL_FILE + '.compact.lock')
+
+# --- METRICS ---
+metrics = Registry()
+REQUEST_SECONDS = metrics.histogram(
+    'rj_http_request_duration_seconds', 'Latensi request per route', ('endpoint', 'method', 'status'))
+GRAPH_OP_SECONDS = metrics.histogram(
+    'rj_graph_operation_seconds', 'Durasi operasi graph (parse, serialize, proyeksi, journal)', ('operation',))
+LOOKUPS_PER_REQUEST = metrics.histogram(
+    'rj_graph_lookups_per_request', 'Jumlah site yang diproyeksikan dari graph per request', ('endpoint',),
+    buckets=(0, 1, 2, 5, 10, 50, 100, 1000, 10000))
+# Hitungan lookup graph untuk request yang sedang berjalan di thread ini
+request_stats = threading.local()
+profiler = SamplingProfiler()
+
 # --- BACKUP SYSTEM ---
-def backup_ttl():
-    """Backup TTL file otomatis"""
-    if not os.path.exists(BACKUP_DIR):
-        os.makedirs(BACKUP_DIR)
-    
-    if os.path.exists(TTL_FILE):
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_path = os.path.join(BACKUP_DIR, f'ReligiJakarta_backup_{timestamp}.ttl')
-        shutil.copy2(TTL_FILE, backup_path)
-        print(f"✅ TTL di-backup ke: {backup_path}")
-        
-        # Hapus backup lama (simpan 10 backup terakhir)
-        backups = sorted([f for f in os.listdir(BACKUP_DIR) if f.startswith('ReligiJakarta_backup_') and f.endswith('.ttl')])
-        while len(backups) > 10:
-            old_backup = os.path.join(BACKUP_DIR, backups.pop(0))
-            os.remove(old_backup)
+# Retensi titik restore: sekian terakhir, plus yang terakhir per jam / per hari selama sekian jam / hari
+BACKUP_RECENT = int(os.environ.get('BACKUP_RECENT', 10))
+BACKUP_HOURLY = int(os.environ.get('BACKUP_HOURLY', 48))
+BACKUP_DAILY = int(os.environ.get('BACKUP_DAILY', 30))
+backups = BackupStore(BACKUP_DIR, BACKUP_RECENT, BACKUP_HOURLY, BACKUP_DAILY)
+
+def backup_ttl(version):
+    """Catat titik restore `version` (TTL saat ini + batch journal) sebelum TTL ditimpa compaction"""
+    full_version, batches, _ = journal.read_batches()
+    batches = [b for b in batches if full_version < b[0] <= version]
+    with GRAPH_OP_SECONDS.time(operation='backup'):
+        point = backups.save(version, full_version, TTL_FILE, batches)
+    kind = f"delta dari versi {point['full_version']}" if point['delta'] else 'full'
+    print(f"✅ Titik restore versi {version} disimpan ({kind}) di {BACKUP_DIR}")
+
+def new_graph(store='default'):
+    graph = Graph(store=store)
+    graph.bind("rel", REL)
+    graph.bind("geo", GEO)
+    graph.bind("schema", SCHEMA)
+    return graph
 
 def load_graph():
-    """Load RDF graph dari TTL file"""
+    """Load RDF graph (snapshot biner jika masih baru, jika tidak dari TTL) lalu replay journal"""
     global g
-    g = Graph()
-    g.bind("rel", REL)
-    g.bind("geo", GEO)
-    g.bind("schema", SCHEMA)
+    if GRAPH_STORE == 'sqlite':
+        open_store()
+        return
+    g = None
+    
+    if snapshot_is_fresh(SNAPSHOT_FILE, TTL_FILE):
+        try:
+            g = new_graph()
+            with GRAPH_OP_SECONDS.time(operation='snapshot_load'):
+                version = load_snapshot(g, SNAPSHOT_FILE)
+            print(f"✅ Berhasil memuat {len(g)} triples dari snapshot {SNAPSHOT_FILE} (versi {version})")
+        except Exception as e:
+            print(f"⚠️ Error loading snapshot, kembali ke TTL: {e}")
+            g = None
     
+    if g is None:
+        g = new_graph()
+        try:
+            with GRAPH_OP_SECONDS.time(operation='parse'):
+                g.parse(TTL_FILE, format="ttl")
+            print(f"✅ Berhasil memuat {len(g)} triples dari {TTL_FILE}")
+            with GRAPH_OP_SECONDS.time(operation='snapshot_write'):
+                write_snapshot(g, SNAPSHOT_FILE, journal.read_base_version())
+        except Exception as e:
+            print(f"⚠️ Error loading TTL: {e}")
+    
+    try:
+        with GRAPH_OP_SECONDS.time(operation='journal_replay'):
+            replayed = journal.replay(g)
+        if replayed:
+            print(f"✅ {replayed} perubahan dari journal diterapkan (versi {journal.version})")
+    except Exception as e:
+        print(f"⚠️ Error replay journal: {e}")
+
+def open_store():
+    """GRAPH_STORE=sqlite: buka store bersama (impor TTL jika belum pernah diisi) lalu kejar journal"""
+    global g
+    g = new_graph(SQLiteStore(STORE_FILE))
+    with journal.exclusive:
+        if g.store.version is None:
+            try:
+                with GRAPH_OP_SECONDS.time(operation='parse'), g.store.transaction():
+                    g.parse(TTL_FILE, format="ttl")
+                    g.store.set_version(journal.read_base_version())
+                print(f"✅ Berhasil mengimpor {len(g)} triples dari {TTL_FILE} ke {STORE_FILE}")
+            except Exception as e:
+                print(f"⚠️ Error loading TTL: {e}")
+                return
+        catch_up_store()
+    print(f"✅ Store {STORE_FILE} dibuka: {len(g)} triples (versi {g.store.version})")
+
+def catch_up_store():
+    """Terapkan batch journal yang belum masuk store (writer berhenti setelah fsync journal, sebelum commit).
+
+    Dipanggil dengan journal.exclusive dipegang, jadi tidak ada writer yang sedang di tengah jalan.
+    """
     try:
-        g.parse(TTL_FILE, format="ttl")
-        print(f"✅ Berhasil memuat {len(g)} triples dari {TTL_FILE}")
+        with GRAPH_OP_SECONDS.time(operation='journal_replay'), g.store.transaction():
+            replayed = journal.replay(g, since=g.store.version)
+            g.store.set_version(journal.version)
+        if replayed:
+            print(f"✅ {replayed} perubahan dari journal diterapkan ke store (versi {journal.version})")
     except Exception as e:
-        print(f"⚠️ Error loading TTL: {e}")
+        print(f"⚠️ Error replay journal: {e}")
 
-def save_graph():
-    """Simpan RDF graph ke TTL file dan backup"""
+def store_transaction():
+    """Transaksi store untuk perubahan graph + batch journal (GRAPH_STORE=sqlite); no-op untuk graph in-memory"""
+    return g.store.transaction() if GRAPH_STORE == 'sqlite' else nullcontext()
+
+def save_graph(added=(), removed=(), rows=None):
+    """Catat perubahan graph ke journal (fsync); TTL ditulis ulang oleh worker persistence.
+
+    `rows`: baris ('+' atau '-', triple) yang dihitung bertahap, sebagai ganti
+    added/removed (lihat write_sites). Mengembalikan versi graph yang baru,
+    atau None jika gagal.
+    """
     try:
-        backup_ttl()  # Backup dulu sebelum save
-        g.serialize(destination=TTL_FILE, format="turtle")
-        print(f"✅ Graph berhasil disimpan ke {TTL_FILE}")
-        return True
+        with GRAPH_OP_SECONDS.time(operation='journal_append'):
+            version = journal.append(added, removed) if rows is None else journal.append_rows(rows)
+        if GRAPH_STORE == 'sqlite':
+            g.store.set_version(version)
+        persistence.request(now=journal.entries >= COMPACT_EVERY)
+        return version
     except Exception as e:
-        print(f"❌ Error saving TTL: {e}")
-        return False
+        print(f"❌ Error writing journal: {e}")
+        return None
+
+def compact_graph(wait=False):
+    """Tulis graph lengkap ke TTL file (dengan backup) dan snapshot, lalu kosongkan journal.
+
+    Mengembalikan True jika ada yang ditulis. Tanpa `wait`, langsung kembali
+    jika worker lain sedang compaction. Error diteruskan ke pemanggil.
+    """
+    if not compaction_lock.acquire(blocking=wait):
+        return False  # worker lain sedang melakukan compaction
+    try:
+        with graph_lock:
+            sync_graph()
+            if not journal.entries:
+                return False
+            if GRAPH_STORE == 'sqlite':
+                # Snapshot baca store terisolasi dari writer: tidak perlu memegang graph_lock
+                return export_store()
+            version = journal.version
+            snapshot = Graph()
+            for prefix, namespace in g.namespaces():
+                snapshot.bind(prefix, namespace)
+            snapshot += g
+            projection = site_store.current
+        
+        backup_ttl(version)  # Backup dulu sebelum save
+        # File sementara + fsync + rename: TTL lama tetap utuh sampai yang baru lengkap di disk
+        tmp_path = TTL_FILE + '.tmp'
+        with GRAPH_OP_SECONDS.time(operation='serialize'):
+            with open(tmp_path, 'wb') as f:
+                snapshot.serialize(destination=f, format="turtle")
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, TTL_FILE)
+        with GRAPH_OP_SECONDS.time(operation='snapshot_write'):
+            write_snapshot(snapshot, SNAPSHOT_FILE, version)
+        save_projection(projection, version)
+        journal.truncate(version)
+        print(f"✅ Graph berhasil disimpan ke {TTL_FILE} (versi {version})")
+        return True
+    finally:
+        compaction_lock.release()
+
+def export_store():
+    """Bagian compact_graph() untuk GRAPH_STORE=sqlite: TTL ditulis langsung dari snapshot baca store.
+
+    Triple dialirkan dari index SPO ke file, tanpa salinan graph di memori;
+    snapshot biner tidak diperlukan karena worker membuka store tanpa parse.
+    """
+    projection = site_store.current
+    with g.store.read_snapshot() as snapshot:
+        version = snapshot.version
+        backup_ttl(version)
+        tmp_path = TTL_FILE + '.tmp'
+        with GRAPH_OP_SECONDS.time(operation='serialize'):
+            with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+                snapshot.write_turtle(f)
+                f.flush()
+                os.fsync(f.fileno())
+    os.replace(tmp_path, TTL_FILE)
+    save_projection(projection, version)
+    journal.truncate(version)
+    print(f"✅ Graph berhasil disimpan ke {TTL_FILE} (versi {version})")
+    return True
+
+def sync_graph():
+    """Terapkan batch journal yang ditulis worker lain ke graph dan site_store"""
+    with graph_lock:
+        if GRAPH_STORE == 'sqlite':
+            sync_store()
+            return
+        batches = journal.tail()
+        if batches is None:
+            # Batch yang belum diterapkan sudah dibuang compaction: muat ulang penuh
+            load_graph()
+            with GRAPH_OP_SECONDS.time(operation='projection_build'):
+                site_store.rebuild(journal.version)
+            refresh_calendar()
+            return
+        for version, added, removed, _ in batches:
+            for triple in removed:
+                g.remove(triple)
+            for triple in added:
+                g.add(triple)
+            site_ids = changed_site_ids(added, removed)
+            with GRAPH_OP_SECONDS.time(operation='projection_refresh'):
+                site_store.refresh(sorted(site_ids), version)
+            if touches_events(added + removed):
+                refresh_calendar()
+
+def sync_store():
+    """sync_graph() untuk GRAPH_STORE=sqlite: store sudah berisi perubahan worker lain, cukup perbarui proyeksi.
+
+    Journal dibaca sambil memegang journal.exclusive supaya setiap batch yang
+    terlihat sudah di-commit ke store; jika worker lain sedang menulis, sinkron
+    ditunda ke request berikutnya (reader tidak menunggu writer).
+    """
+    if g.store.version is None or not journal.exclusive.acquire(blocking=False):
+        return  # impor TTL gagal saat start, atau writer sedang berjalan
+    try:
+        batches = journal.tail()
+        if batches is None or g.store.version < journal.version:
+            # Batch sudah dibuang compaction, atau writer berhenti sebelum commit store
+            catch_up_store()
+            with GRAPH_OP_SECONDS.time(operation='projection_build'):
+                site_store.rebuild(journal.version)
+            refresh_calendar()
+            return
+        for version, added, removed, _ in batches:
+            site_ids = changed_site_ids(added, removed)
+            with GRAPH_OP_SECONDS.time(operation='projection_refresh'):
+                site_store.refresh(sorted(site_ids), version)
+            if touches_events(added + removed):
+                refresh_calendar()
+    finally:
+        journal.exclusive.release()
+
+persistence = PersistenceWorker(compact_graph, PERSIST_DELAY, PERSIST_MAX_DELAY, COMPACT_INTERVAL)
+
+def pending_batches():
+    """Batch journal yang belum masuk file TTL, menurut versi yang sudah dibaca proses ini (tanpa sinkron)"""
+    return max(journal.version - journal.read_base_version(), 0)
+
+def persistence_status():
+    """Status penyimpanan untuk dashboard admin: journal (tahan crash) vs. file TTL"""
+    poll_journal()  # versi terbaru, termasuk batch dari worker lain
+    status = persistence.status()
+    status.update({
+        'journal_version': journal.version,
+        'ttl_version': journal.read_base_version(),
+        'pending': pending_batches(),
+    })
+    return status
+
+def shutdown_persistence():
+    """Hentikan worker persistence dan tulis sisa journal ke TTL (dipanggil saat proses berhenti)"""
+    if _workers_pid == os.getpid():
+        persistence.stop()
+
+_workers_pid = None
+
+def start_background_workers():
+    """Jalankan worker persistence sekali per proses (juga di worker hasil fork)"""
+    global _workers_pid
+    if _workers_pid == os.getpid():
+        return
+    _workers_pid = os.getpid()
+    persistence.start()
+    # Worker hasil fork berhenti lewat os._exit: run_production.py memanggilnya langsung
+    atexit.register(shutdown_persistence)
 
 # Load graph saat startup
 load_graph()
@@ -89,66 +403,74 @@ def parse_koordinat(koordinat_str):
         pass
     return None, None
 
-def get_site_from_graph(site_id):
-    """Ambil data site dari RDF graph"""
+# Predikat graph -> field site (proyeksi untuk API dan site_store)
+SITE_PROPERTIES = {
+    REL.nama: 'nama',
+    SCHEMA.address: 'alamat',
+    REL.wilayah: 'wilayah',
+    REL.kecamatan: 'kecamatan',
+    REL.kodePos: 'kode_pos',
+    REL.tipeBangunan: 'tipe',
+    REL.agama: 'agama',
+    REL.jamOperasional: 'jam_buka',
+    REL.kapasitas: 'kapasitas',
+    REL.luasLahan: 'luas',
+    REL.arsitek: 'arsitek',
+    REL.tahunBerdiri: 'tahun_berdiri',
+    REL.statusCagarBudaya: 'is_heritage',
+    REL.kodeCagarBudaya: 'heritage_code',
+    REL.transportTerdekat: 'transport_terdekat',
+    GEO.lat: 'latitude',
+    GEO.long: 'longitude',
+    SCHEMA.image: 'gambar_url',
+    SCHEMA.description: 'deskripsi'
+}
+
+def project_site(graph, site_id):
+    """SiteRecord dari triple-triple miliknya di `graph` (None jika bukan TempatIbadah)"""
     site_uri = REL[site_id]
     
     # Cek apakah site exist (gunakan TempatIbadah dari TTL)
-    if (site_uri, RDF.type, REL.TempatIbadah) not in g:
+    if (site_uri, RDF.type, REL.TempatIbadah) not in graph:
         return None
     
-    # Ambil semua properti
+    # Satu kali lewat index subjek, bukan satu lookup per properti
+    return site_from_pairs(site_id, graph.predicate_objects(site_uri))
+
+def site_from_pairs(site_id, pairs):
+    """SiteRecord dari pasangan (predikat, objek) miliknya; literal dikonversi sekali di sini"""
     site = {'id': site_id}
+    transport = []
     
-    # Properties sesuai dengan TTL yang ada
-    props_map = {
-        REL.nama: 'nama',
-        SCHEMA.address: 'alamat',
-        REL.wilayah: 'wilayah',
-        REL.kecamatan: 'kecamatan',
-        REL.kodePos: 'kode_pos',
-        REL.tipeBangunan: 'tipe',
-        REL.agama: 'agama',
-        REL.jamOperasional: 'jam_buka',
-        REL.kapasitas: 'kapasitas',
-        REL.luasLahan: 'luas',
-        REL.arsitek: 'arsitek',
-        REL.tahunBerdiri: 'tahun_berdiri',
-        REL.statusCagarBudaya: 'is_heritage',
-        REL.kodeCagarBudaya: 'heritage_code',
-        REL.transportTerdekat: 'transport_terdekat',
-        GEO.lat: 'latitude',
-        GEO.long: 'longitude',
-        SCHEMA.image: 'gambar_url',
-        SCHEMA.description: 'deskripsi'
-    }
-    
-    for pred, key in props_map.items():
-        # Transport bisa multiple values
-        if pred == REL.transportTerdekat:
-            values = list(g.objects(site_uri, pred))
-            if values:
-                site[key] = ', '.join([str(v) for v in values])
-            else:
-                site[key] = None
+    for pred, value in pairs:
+        key = SITE_PROPERTIES.get(pred)
+        if key == 'transport_terdekat':
+            # Transport bisa multiple values
+            transport.append(str(value))
+        elif key is None or not value or key in site:
+            continue
+        elif key in ['kapasitas']:
+            site[key] = int(value)
+        elif key == 'tahun_berdiri':
+            # Handle gYear format
+            site[key] = int(str(value)[:4])
+        elif key in ['latitude', 'longitude']:
+            site[key] = float(value)
+        elif key == 'is_heritage':
+            site[key] = str(value).lower() == 'true'
         else:
-            value = g.value(site_uri, pred)
-            if value:
-                if key in ['kapasitas']:
-                    site[key] = int(value)
-                elif key == 'tahun_berdiri':
-                    # Handle gYear format
-                    site[key] = int(str(value)[:4])
-                elif key in ['latitude', 'longitude']:
-                    site[key] = float(value)
-                elif key == 'is_heritage':
-                    site[key] = str(value).lower() == 'true'
-                else:
-                    site[key] = str(value)
-            else:
-                site[key] = None
+            site[key] = str(value)
     
-    return site
+    if transport:
+        site['transport_terdekat'] = ', '.join(transport)
+        # Diurai sekali di sini; index halte dan /api/transport memakai hasilnya
+        site['transport'] = tuple(parse_transport(t) for t in transport)
+    return SiteRecord(site)
+
+def get_site_from_graph(site_id):
+    """Ambil data site dari RDF graph"""
+    request_stats.lookups = getattr(request_stats, 'lookups', 0) + 1
+    return project_site(g, site_id)
 
 def get_all_sites_from_graph():
     """Ambil semua sites dari RDF graph"""
@@ -160,6 +482,182 @@ def get_all_sites_from_graph():
             sites.append(site)
     return sorted(sites, key=lambda x: x.get('nama', ''))
 
+def list_site_ids():
+    """Semua ID TempatIbadah di graph"""
+    return [str(s).split('#')[-1] for s in g.subjects(RDF.type, REL.TempatIbadah)]
+
+def changed_site_ids(added, removed):
+    """ID site (subjek rel:) yang tersentuh satu batch journal"""
+    return {str(s)[len(REL):] for s, _, _ in added + removed if str(s).startswith(REL)}
+
+def load_projection():
+    """Muat proyeksi dari PROJECTION_FILE lalu proyeksikan ulang site dari batch journal sesudahnya.
+
+    Mengembalikan False jika proyeksi harus dibangun ulang dari graph: file
+    tidak ada, lebih lama dari TTL, rusak, atau batch sejak versinya sudah
+    tidak ada di journal.
+    """
+    if not snapshot_is_fresh(PROJECTION_FILE, TTL_FILE):
+        return False
+    try:
+        with GRAPH_OP_SECONDS.time(operation='projection_load'):
+            version = site_store.load(PROJECTION_FILE)
+        print(f"✅ Proyeksi {len(site_store)} site dimuat dari {PROJECTION_FILE} (versi {version})")
+        _, batches, _ = journal.read_batches()
+        batches = [b for b in batches if version < b[0] <= journal.version]
+        if version > journal.version or [b[0] for b in batches] != list(range(version + 1, journal.version + 1)):
+            print(f"⚠️ Proyeksi versi {version} tidak bisa dikejar dari journal (versi {journal.version})")
+            return False
+        if batches:
+            site_ids = set().union(*(changed_site_ids(added, removed) for _, added, removed, _ in batches))
+            with GRAPH_OP_SECONDS.time(operation='projection_refresh'):
+                site_store.refresh(sorted(site_ids), journal.version)
+        return True
+    except Exception as e:
+        print(f"⚠️ Error loading proyeksi, dibangun ulang dari graph: {e}")
+        return False
+
+def save_projection(snap=None, version=None):
+    """Tulis proyeksi ke PROJECTION_FILE; dilewati jika snapshot tidak sama dengan versi graph `version`"""
+    snap = snap or site_store.current
+    if version is not None and snap.version != version:
+        return
+    try:
+        with GRAPH_OP_SECONDS.time(operation='projection_write'):
+            site_store.save(PROJECTION_FILE, snap)
+    except Exception as e:
+        print(f"⚠️ Error menulis proyeksi {PROJECTION_FILE}: {e}")
+
+# --- SITE STORE (proyeksi in-memory untuk endpoint baca) ---
+site_store = SiteStore(get_site_from_graph, list_site_ids, CHANGE_LOG_SITES)
+if not load_projection():
+    with GRAPH_OP_SECONDS.time(operation='projection_build'):
+        site_store.rebuild(journal.version)
+    save_projection()
+
+# --- CALENDAR EVENTS (rel:AcaraKeagamaan di graph) ---
+EVENT_PROPERTIES = {
+    REL.namaAcara: 'title',
+    REL.tanggalAcara: 'date',
+    REL.agama: 'agama',
+    REL.lokasi: 'site',
+    REL.namaLokasi: 'location'
+}
+# Predikat yang hanya dipakai acara; perubahan lain cukup dicek lewat ID acara
+EVENT_ONLY_PREDICATES = set(EVENT_PROPERTIES) - {REL.agama}
+
+def project_events(graph):
+    """Semua rel:AcaraKeagamaan di graph sebagai dict"""
+    events = []
+    for event_uri in graph.subjects(RDF.type, REL.AcaraKeagamaan):
+        event = {'id': str(event_uri).split('#')[-1], 'title': None, 'date': None,
+                 'agama': None, 'site': None, 'location': None}
+        for pred, value in graph.predicate_objects(event_uri):
+            key = EVENT_PROPERTIES.get(pred)
+            if key == 'site':
+                event['site'] = str(value)[len(REL):] if str(value).startswith(REL) else None
+            elif key == 'date':
+                event['date'] = str(value)[:10]
+            elif key:
+                event[key] = str(value)
+        if event['date']:
+            events.append(event)
+    return events
+
+def touches_events(triples):
+    return any(p in EVENT_ONLY_PREDICATES or o == REL.AcaraKeagamaan or str(s)[len(REL):] in calendar_events.ids
+               for s, p, o in triples)
+
+calendar_events = EventIndex()
+
+def refresh_calendar():
+    """Bangun ulang index acara dari graph (dipanggil writer yang memegang graph_lock)"""
+    global calendar_events
+    calendar_events = EventIndex(project_events(g))
+
+refresh_calendar()
+
+def json_response(data, status=200):
+    """Response dari JSON yang sudah diserialisasi"""
+    return app.response_class(data, status=status, mimetype='application/json')
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+
+def cached_response(view):
+    """Layani GET dari cache per versi graph, dengan ETag/304 dan body gzip/brotli"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Versi dibaca sebelum view: body yang dibangun tidak pernah lebih lama dari versinya
+        version = site_store.version
+        entry = response_cache.get(version, request.full_path)
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response  # error dan response streaming tidak di-cache
+            entry = response_cache.put(version, request.full_path, response.get_data(), response.mimetype)
+        return entry.respond(request, app.response_class, CACHE_CONTROL)
+    return wrapper
+
+def streamed_json(snap, chunks, mimetype='application/json', cache=False):
+    """Response chunked untuk koleksi besar; ETag dari versi snapshot + URL karena body tidak di-hash.
+
+    `chunks` adalah fungsi tanpa argumen yang baru dipanggil jika bukan 304.
+    `cache`: stream lengkap pertama disimpan ke response_cache (body asli + gzip)
+    sehingga request berikutnya untuk versi ini dilayani cached_response dari memori.
+    """
+    key = request.full_path
+    etag = '"%s"' % hashlib.blake2b(f'{snap.version} {key}'.encode('utf-8'), digest_size=12).hexdigest()
+    store = None
+    if cache:
+        def store(body, encoded):
+            response_cache.put(snap.version, key, body, mimetype, etag=etag, encoded=encoded)
+    return stream_response(request, app.response_class, chunks, mimetype, etag, CACHE_CONTROL, store)
+
+def request_endpoint():
+    # Pola route (bukan URL mentah) supaya jumlah seri metrik tetap terbatas
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+@app.before_request
+def start_request_metrics():
+    request.environ['rj.start'] = time.perf_counter()
+    request_stats.lookups = 0
+    profiler.enter(request_endpoint())
+
+@app.after_request
+def record_request_metrics(response):
+    start = request.environ.get('rj.start')
+    if start is not None:
+        endpoint = request_endpoint()
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint,
+                                method=request.method, status=response.status_code)
+        LOOKUPS_PER_REQUEST.observe(request_stats.lookups, endpoint=endpoint)
+    return response
+
+@app.teardown_request
+def stop_request_profile(exc):
+    profiler.exit()
+
+_last_sync = 0.0
+
+@app.before_request
+def sync_with_other_workers():
+    """Ambil perubahan dari worker lain; reader tidak pernah menunggu writer"""
+    global _last_sync
+    start_background_workers()
+    now = time.monotonic()
+    if now - _last_sync < SYNC_INTERVAL:
+        return
+    _last_sync = now
+    poll_journal()
+
+def poll_journal():
+    """Terapkan batch journal baru dari worker lain, kecuali graph sedang dipakai writer"""
+    if journal.changed_on_disk() and graph_lock.acquire(blocking=False):
+        try:
+            sync_graph()
+        finally:
+            graph_lock.release()
+
 # --- HARDCODED USER (sementara) ---
 ADMIN_USER = {'username': 'admin', 'password': 'jomok123'}
 
@@ -201,9 +699,167 @@ def logout():
 @app.route('/admin')
 @login_required
 def admin_dashboard():
-    sites = get_all_sites_from_graph()
-    return render_template('admin/dashboard.html', sites=sites)
+    sites = site_store.current.all()
+    return render_template('admin/dashboard.html', sites=sites, persistence=persistence_status())
+
+@app.route('/admin/persistence', methods=['GET', 'POST'])
+@login_required
+def admin_persistence():
+    """Status penyimpanan (JSON, dipakai dashboard); POST meminta penulisan TTL segera"""
+    if request.method == 'POST':
+        persistence.request(now=True)
+        flash('Penulisan ke file TTL dijadwalkan.', 'info')
+        return redirect(url_for('admin_dashboard'))
+    return jsonify(persistence_status())
+
+
+# Field form admin -> (predikat, datatype atau bahasa); juga dipakai validasi import massal
+SITE_FORM_PROPS = {
+    'nama': (REL.nama, None),
+    'alamat': (SCHEMA.address, None),
+    'wilayah': (REL.wilayah, None),
+    'kecamatan': (REL.kecamatan, None),
+    'kode_pos': (REL.kodePos, None),
+    'tipe': (REL.tipeBangunan, None),
+    'agama': (REL.agama, None),
+    'jam_buka': (REL.jamOperasional, None),
+    'kapasitas': (REL.kapasitas, XSD.integer),
+    'luas': (REL.luasLahan, None),
+    'arsitek': (REL.arsitek, None),
+    'tahun_berdiri': (REL.tahunBerdiri, XSD.gYear),
+    'is_heritage': (REL.statusCagarBudaya, XSD.boolean),
+    'heritage_code': (REL.kodeCagarBudaya, None),
+    'gambar_url': (SCHEMA.image, None),
+    'deskripsi': (SCHEMA.description, 'id')
+}
+# Field form di luar SITE_FORM_PROPS yang diolah khusus oleh build_site_triples
+SITE_FORM_FIELDS = set(SITE_FORM_PROPS) | {'id', 'koordinat', 'transport_terdekat'}
+SITE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_\-]+$')
 
+def validate_site_form(form):
+    """Daftar pesan error untuk data form site (kosong jika valid)"""
+    errors = []
+    unknown = sorted(key for key in form if key not in SITE_FORM_FIELDS)
+    if unknown:
+        errors.append(f"field tidak dikenal: {', '.join(unknown)}")
+    site_id = form.get('id') or ''
+    if not SITE_ID_PATTERN.match(site_id):
+        errors.append('id wajib diisi (huruf, angka, _ atau -)')
+    if not form.get('nama'):
+        errors.append('nama wajib diisi')
+    if form.get('kapasitas'):
+        try:
+            if int(form['kapasitas']) < 0:
+                raise ValueError
+        except ValueError:
+            errors.append('kapasitas harus bilangan bulat >= 0')
+    tahun = form.get('tahun_berdiri')
+    if tahun and not (len(tahun) == 4 and tahun.isdigit()):
+        errors.append('tahun_berdiri harus tahun 4 digit')
+    if form.get('koordinat'):
+        lat, lng = parse_koordinat(form['koordinat'])
+        if lat is None or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            errors.append("koordinat harus 'lat, lng' yang valid")
+    return errors
+
+def build_site_triples(site_uri, form):
+    """Susun semua triple site dari data form admin"""
+    triples = [(site_uri, RDF.type, REL.TempatIbadah)]
+    
+    # Parse koordinat
+    lat, lng = parse_koordinat(form.get('koordinat'))
+    
+    nama = form.get('nama')
+    
+    # Tambahkan rdfs:label
+    triples.append((site_uri, RDFS.label, Literal(nama, lang='id')))
+    
+    # Tambahkan properties sesuai struktur TTL
+    for key, (predicate, datatype) in SITE_FORM_PROPS.items():
+        value = form.get(key)
+        if key == 'is_heritage':
+            value = '1' if value else '0'
+        if value:
+            if datatype == 'id':
+                triples.append((site_uri, predicate, Literal(value, lang='id')))
+            elif datatype:
+                triples.append((site_uri, predicate, Literal(value, datatype=datatype)))
+            else:
+                triples.append((site_uri, predicate, Literal(value)))
+    
+    # Tambahkan koordinat
+    if lat and lng:
+        triples.append((site_uri, GEO.lat, Literal(lat, datatype=XSD.decimal)))
+        triples.append((site_uri, GEO.long, Literal(lng, datatype=XSD.decimal)))
+    
+    # Transport terdekat (bisa multiple)
+    transport = form.get('transport_terdekat')
+    if transport:
+        for t in transport.split(','):
+            t = t.strip()
+            if t:
+                triples.append((site_uri, REL.transportTerdekat, Literal(t)))
+    
+    return triples
+
+def write_sites(changes):
+    """Ganti triple beberapa site sekaligus ({site_id: triples, None = hapus}) dalam satu batch journal.
+    
+    Mengembalikan versi graph setelah perubahan, atau None jika gagal disimpan.
+    Reader tidak pernah melihat graph setengah jadi: mereka membaca snapshot
+    site_store, yang baru ditukar setelah perubahan tercatat di journal.
+    `changes` cukup punya items() dan len() (mis. bulk_io.StagedRows untuk
+    import massal): diff dihitung per site sambil ditulis ke journal, jadi
+    seluruh batch tidak pernah ada di memori sekaligus.
+    """
+    with graph_lock, journal.exclusive, store_transaction():
+        # Kejar dulu perubahan worker lain supaya diff & nomor versi tidak bentrok
+        sync_graph()
+        sites = {}
+        # Triple lama site yang sudah diubah, untuk mengembalikan graph jika journal gagal
+        undo = {}
+        
+        def rows():
+            for site_id, triples in changes.items():
+                site_uri = REL[site_id]
+                before = set(g.triples((site_uri, None, None)))
+                after = set(triples or ())
+                if before == after:
+                    continue
+                undo[site_uri] = before
+                for triple in before - after:
+                    g.remove(triple)
+                    yield '-', triple
+                for triple in after - before:
+                    g.add(triple)
+                    yield '+', triple
+                # Triple baru sudah lengkap: proyeksikan langsung tanpa membaca graph lagi
+                sites[site_id] = site_from_pairs(site_id, ((p, o) for _, p, o in after)) \
+                    if (site_uri, RDF.type, REL.TempatIbadah) in after else None
+        
+        pending = rows()
+        first = next(pending, None)
+        if first is None:
+            return journal.version
+        version = save_graph(rows=chain([first], pending))
+        if version is None:
+            # Gagal tersimpan: kembalikan site yang sempat diubah ke kondisi semula
+            for site_uri, before in undo.items():
+                g.remove((site_uri, None, None))
+                for triple in before:
+                    g.add(triple)
+            return None
+        
+        with GRAPH_OP_SECONDS.time(operation='projection_refresh'):
+            site_store.publish(sites, version)
+    if len(changes) >= COMPACT_EVERY:
+        # Batch besar langsung digabung ke TTL supaya worker baru tidak perlu me-replay-nya
+        persistence.request(now=True)
+    return version
+
+def write_site(site_id, triples):
+    """Ganti semua triple milik satu site dengan `triples` (None = hapus site), lalu simpan"""
+    return write_sites({site_id: triples}) is not None
 
 @app.route('/admin/add', methods=['GET', 'POST'])
 @login_required
@@ -213,68 +869,12 @@ def admin_add():
         site_uri = REL[site_id]
         
         # Cek apakah ID sudah ada
-        if (site_uri, RDF.type, REL.TempatIbadah) in g:
+        if site_store.current.get(site_id) is not None:
             flash('ID sudah digunakan. Gunakan ID yang berbeda.', 'danger')
             return render_template('admin/form.html', site=None, action='add')
         
-        # Parse koordinat
-        lat, lng = parse_koordinat(request.form.get('koordinat'))
-        
-        # Tambahkan triple TempatIbadah
-        g.add((site_uri, RDF.type, REL.TempatIbadah))
-        
-        nama = request.form.get('nama')
-        
-        # Tambahkan rdfs:label
-        g.add((site_uri, RDFS.label, Literal(nama, lang='id')))
-        
-        # Tambahkan properties sesuai struktur TTL
-        props = {
-            'nama': (REL.nama, request.form.get('nama')),
-            'alamat': (SCHEMA.address, request.form.get('alamat')),
-            'wilayah': (REL.wilayah, request.form.get('wilayah')),
-            'kecamatan': (REL.kecamatan, request.form.get('kecamatan')),
-            'kode_pos': (REL.kodePos, request.form.get('kode_pos')),
-            'tipe': (REL.tipeBangunan, request.form.get('tipe')),
-            'agama': (REL.agama, request.form.get('agama')),
-            'jam_buka': (REL.jamOperasional, request.form.get('jam_buka')),
-            'kapasitas': (REL.kapasitas, request.form.get('kapasitas'), XSD.integer),
-            'luas': (REL.luasLahan, request.form.get('luas')),
-            'arsitek': (REL.arsitek, request.form.get('arsitek')),
-            'tahun_berdiri': (REL.tahunBerdiri, request.form.get('tahun_berdiri'), XSD.gYear),
-            'is_heritage': (REL.statusCagarBudaya, '1' if request.form.get('is_heritage') else '0', XSD.boolean),
-            'heritage_code': (REL.kodeCagarBudaya, request.form.get('heritage_code')),
-            'gambar_url': (SCHEMA.image, request.form.get('gambar_url')),
-            'deskripsi': (SCHEMA.description, request.form.get('deskripsi'), 'id')
-        }
-        
-        for key, prop_data in props.items():
-            value = prop_data[1]
-            if value:
-                predicate = prop_data[0]
-                
-                if key == 'deskripsi':
-                    g.add((site_uri, predicate, Literal(value, lang='id')))
-                elif len(prop_data) > 2 and prop_data[2]:
-                    g.add((site_uri, predicate, Literal(value, datatype=prop_data[2])))
-                else:
-                    g.add((site_uri, predicate, Literal(value)))
-        
-        # Tambahkan koordinat
-        if lat and lng:
-            g.add((site_uri, GEO.lat, Literal(lat, datatype=XSD.decimal)))
-            g.add((site_uri, GEO.long, Literal(lng, datatype=XSD.decimal)))
-        
-        # Transport terdekat (bisa multiple)
-        transport = request.form.get('transport_terdekat')
-        if transport:
-            for t in transport.split(','):
-                t = t.strip()
-                if t:
-                    g.add((site_uri, REL.transportTerdekat, Literal(t)))
-        
         # Simpan graph
-        if save_graph():
+        if write_site(site_id, build_site_triples(site_uri, request.form)):
             flash('Tempat ibadah berhasil ditambahkan!', 'success')
             return redirect(url_for('admin_dashboard'))
         else:
@@ -286,98 +886,339 @@ def admin_add():
 @login_required
 def admin_edit(site_id):
     site_uri = REL[site_id]
+    site = site_store.current.get(site_id)
     
     # Cek apakah site exist
-    if (site_uri, RDF.type, REL.TempatIbadah) not in g:
+    if site is None:
         flash('Tempat ibadah tidak ditemukan.', 'danger')
         return redirect(url_for('admin_dashboard'))
     
     if request.method == 'POST':
-        # Hapus semua triple lama kecuali RDF.type
-        for pred, obj in list(g.predicate_objects(site_uri)):
-            if pred != RDF.type:
-                g.remove((site_uri, pred, obj))
-        
-        # Parse koordinat
-        lat, lng = parse_koordinat(request.form.get('koordinat'))
-        
-        nama = request.form.get('nama')
-        
-        # Tambahkan rdfs:label
-        g.add((site_uri, RDFS.label, Literal(nama, lang='id')))
-        
-        # Tambahkan properties baru sesuai struktur TTL
-        props = {
-            'nama': (REL.nama, request.form.get('nama')),
-            'alamat': (SCHEMA.address, request.form.get('alamat')),
-            'wilayah': (REL.wilayah, request.form.get('wilayah')),
-            'kecamatan': (REL.kecamatan, request.form.get('kecamatan')),
-            'kode_pos': (REL.kodePos, request.form.get('kode_pos')),
-            'tipe': (REL.tipeBangunan, request.form.get('tipe')),
-            'agama': (REL.agama, request.form.get('agama')),
-            'jam_buka': (REL.jamOperasional, request.form.get('jam_buka')),
-            'kapasitas': (REL.kapasitas, request.form.get('kapasitas'), XSD.integer),
-            'luas': (REL.luasLahan, request.form.get('luas')),
-            'arsitek': (REL.arsitek, request.form.get('arsitek')),
-            'tahun_berdiri': (REL.tahunBerdiri, request.form.get('tahun_berdiri'), XSD.gYear),
-            'is_heritage': (REL.statusCagarBudaya, '1' if request.form.get('is_heritage') else '0', XSD.boolean),
-            'heritage_code': (REL.kodeCagarBudaya, request.form.get('heritage_code')),
-            'gambar_url': (SCHEMA.image, request.form.get('gambar_url')),
-            'deskripsi': (SCHEMA.description, request.form.get('deskripsi'), 'id')
-        }
-        
-        for key, prop_data in props.items():
-            value = prop_data[1]
-            if value:
-                predicate = prop_data[0]
-                
-                if key == 'deskripsi':
-                    g.add((site_uri, predicate, Literal(value, lang='id')))
-                elif len(prop_data) > 2 and prop_data[2]:
-                    g.add((site_uri, predicate, Literal(value, datatype=prop_data[2])))
-                else:
-                    g.add((site_uri, predicate, Literal(value)))
-        
-        # Tambahkan koordinat
-        if lat and lng:
-            g.add((site_uri, GEO.lat, Literal(lat, datatype=XSD.decimal)))
-            g.add((site_uri, GEO.long, Literal(lng, datatype=XSD.decimal)))
-        
-        # Transport terdekat (bisa multiple)
-        transport = request.form.get('transport_terdekat')
-        if transport:
-            for t in transport.split(','):
-                t = t.strip()
-                if t:
-                    g.add((site_uri, REL.transportTerdekat, Literal(t)))
-        
         # Simpan graph
-        if save_graph():
+        if write_site(site_id, build_site_triples(site_uri, request.form)):
             flash('Tempat ibadah berhasil diperbarui!', 'success')
             return redirect(url_for('admin_dashboard'))
         else:
             flash('Gagal menyimpan data.', 'danger')
     
-    site = get_site_from_graph(site_id)
     return render_template('admin/form.html', site=site, action='edit')
 
 @app.route('/admin/delete/<site_id>', methods=['POST'])
 @login_required
 def admin_delete(site_id):
-    site_uri = REL[site_id]
-    
     # Hapus semua triple terkait site ini
-    for pred, obj in list(g.predicate_objects(site_uri)):
-        g.remove((site_uri, pred, obj))
-    
-    # Simpan graph
-    if save_graph():
+    if write_site(site_id, None):
         flash('Tempat ibadah berhasil dihapus!', 'success')
     else:
         flash('Gagal menghapus data.', 'danger')
     
     return redirect(url_for('admin_dashboard'))
 
+# --- BULK IMPORT/EXPORT ---
+# Import dibatalkan seluruhnya jika ada baris yang tidak valid; sekian error pertama dilaporkan
+MAX_IMPORT_ERRORS = 50
+
+def iter_ttl_rows(stream):
+    """(nomor urut, dict site) per TempatIbadah di file Turtle.
+    
+    rdflib tidak bisa mem-parse Turtle secara bertahap, jadi file dimuat ke
+    graph sementara; CSV/JSONL tetap dibaca per baris.
+    """
+    source = new_graph()
+    source.parse(source=stream, format='turtle')
+    known = set(SITE_PROPERTIES) | {RDF.type, RDFS.label}
+    for n, site_uri in enumerate(source.subjects(RDF.type, REL.TempatIbadah), 1):
+        if not str(site_uri).startswith(str(REL)):
+            yield n, ValueError(f'subjek {site_uri} di luar namespace rel:')
+            continue
+        unknown = {str(p) for p in source.predicates(site_uri) if p not in known}
+        if unknown:
+            yield n, ValueError(f"predikat tidak dikenal: {', '.join(sorted(unknown))}")
+            continue
+        row = project_site(source, str(site_uri)[len(REL):]).to_dict()
+        del row['transport']  # turunan transport_terdekat, bukan kolom import
+        yield n, row
+
+def import_sites(stream, fmt, mode='upsert', dry_run=False):
+    """Validasi semua baris lalu terapkan sebagai satu batch journal (semua atau tidak sama sekali).
+    
+    `mode` insert menolak ID yang sudah ada; upsert mengganti site tersebut.
+    Baris valid ditampung di file sementara, bukan sebagai triple di memori.
+    """
+    with bulk_io.StagedRows(lambda site_id, form: build_site_triples(REL[site_id], form)) as staged:
+        return _import_staged(stream, fmt, mode, dry_run, staged)
+
+def _import_staged(stream, fmt, mode, dry_run, staged):
+    start = time.perf_counter()
+    readers = {'csv': bulk_io.iter_csv, 'jsonl': bulk_io.iter_jsonl, 'ttl': iter_ttl_rows}
+    snap = site_store.current
+    errors = []
+    invalid = added = 0
+    
+    def reject(line, message):
+        nonlocal invalid
+        invalid += 1
+        if len(errors) < MAX_IMPORT_ERRORS:
+            errors.append({'line': line, 'error': message})
+    
+    try:
+        for line, row in readers[fmt](stream):
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                form = bulk_io.row_to_form(row)
+                problems = validate_site_form(form)
+                site_id = form.get('id')
+                if site_id in staged:
+                    problems.append(f'id {site_id} muncul lebih dari sekali')
+                elif mode == 'insert' and snap.get(site_id) is not None:
+                    problems.append(f'id {site_id} sudah ada')
+                if problems:
+                    raise ValueError('; '.join(problems))
+            except ValueError as e:
+                reject(line, str(e))
+                continue
+            if snap.get(site_id) is None:
+                added += 1
+            # Setelah ada error (atau saat dry run) tidak ada yang disimpan: cukup catat ID untuk validasi duplikat
+            staged.add(site_id, None if errors or dry_run else form)
+    except Exception as e:  # file rusak (encoding, sintaks CSV/Turtle): hentikan di sini
+        reject(None, f'gagal membaca file {fmt}: {e}')
+    
+    result = {'format': fmt, 'mode': mode, 'rows': len(staged) + invalid, 'dry_run': dry_run}
+    if errors:
+        result.update(errors=errors, invalid_rows=invalid)
+        return result
+    
+    if dry_run:
+        version = journal.version
+    else:
+        # Jutaan objek rdflib baru sekaligus: tanpa GC generasional penulisan jauh lebih cepat
+        gc.disable()
+        try:
+            with GRAPH_OP_SECONDS.time(operation='bulk_import'):
+                version = write_sites(staged)
+        finally:
+            gc.enable()
+        if version is None:
+            result.update(errors=[{'line': None, 'error': 'gagal menyimpan ke journal'}], invalid_rows=0)
+            return result
+    result.update(added=added, updated=len(staged) - added, version=version,
+                  seconds=round(time.perf_counter() - start, 3))
+    return result
+
+def export_ttl(sites):
+    """Potongan Turtle (satu blok per site), triple diambil dari graph saat itu"""
+    # Hanya prefix yang dipakai data ini (bukan semua prefix bawaan rdflib)
+    prefixes = Graph(bind_namespaces='none')
+    for prefix, namespace in (('rdf', RDF), ('rdfs', RDFS), ('xsd', XSD),
+                              ('rel', REL), ('geo', GEO), ('schema', SCHEMA)):
+        prefixes.bind(prefix, namespace)
+    ns = prefixes.namespace_manager
+    yield ''.join(f'@prefix {prefix}: <{namespace}> .\n' for prefix, namespace in ns.namespaces()) + '\n'
+    blocks = []
+    for site in sites:
+        site_uri = REL[site['id']]
+        with graph_lock:
+            pairs = sorted(g.predicate_objects(site_uri))
+        if not pairs:
+            continue  # dihapus setelah export dimulai
+        body = ' ;\n    '.join(f'{p.n3(ns)} {o.n3(ns)}' for p, o in pairs)
+        blocks.append(f'{site_uri.n3(ns)} {body} .\n\n')
+        if len(blocks) >= bulk_io.CHUNK_ROWS:
+            yield ''.join(blocks)
+            blocks = []
+    if blocks:
+        yield ''.join(blocks)
+
+def export_sites(fmt):
+    """Generator potongan teks berisi semua site dari snapshot saat export dimulai"""
+    sites = site_store.current.all()
+    if fmt == 'csv':
+        return bulk_io.export_csv(sites)
+    if fmt == 'jsonl':
+        return bulk_io.export_jsonl(sites)
+    return export_ttl(sites)
+
+@app.route('/admin/import', methods=['POST'])
+@login_required
+def admin_import():
+    """Import massal: upload multipart `file`, atau body mentah dengan ?format="""
+    upload = request.files.get('file')
+    mode = request.values.get('mode', 'upsert')
+    try:
+        fmt = bulk_io.detect_format(upload.filename if upload else None, request.values.get('format'))
+        if mode not in ('upsert', 'insert'):
+            raise ValueError('mode harus upsert atau insert')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    dry_run = request.values.get('dry_run', '').lower() in ('true', '1')
+    
+    stream = bulk_io.text_stream(upload.stream if upload else request.stream)
+    result = import_sites(stream, fmt, mode=mode, dry_run=dry_run)
+    return jsonify(result), 400 if result.get('errors') else 200
+
+@app.route('/admin/export', methods=['GET'])
+@login_required
+def admin_export():
+    """Export semua site sebagai CSV, JSON Lines, atau Turtle (dialirkan per potongan)"""
+    try:
+        fmt = bulk_io.detect_format(None, request.args.get('format', 'jsonl'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    version = site_store.version
+    return app.response_class(
+        export_sites(fmt), mimetype=bulk_io.MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename=ReligiJakarta-v{version}.{fmt}',
+                 'X-Graph-Version': str(version)})
+
+@app.route('/admin/profile', methods=['GET', 'POST'])
+@login_required
+def admin_profile():
+    """POST: nyalakan profiler sampling untuk sebagian request; GET: hasil (collapsed stack)"""
+    if request.method == 'POST':
+        try:
+            seconds = min(float(request.values.get('seconds', 30)), 600)
+            rate = float(request.values.get('rate', 0.1))
+            interval = float(request.values.get('interval_ms', 5)) / 1000
+            if seconds <= 0 or not 0 < rate <= 1 or interval <= 0:
+                raise ValueError
+        except ValueError:
+            return jsonify({'error': 'seconds > 0, 0 < rate <= 1, interval_ms > 0'}), 400
+        profiler.start(seconds, rate=rate, interval=interval)
+        return jsonify(profiler.status())
+    
+    # Profil berlaku per proses worker; jalankan GET di worker yang sama (atau WORKERS=1)
+    limit = request.args.get('limit', type=int)
+    return app.response_class(profiler.collapsed(limit), mimetype='text/plain',
+                              headers={'X-Profile-Samples': str(profiler.samples),
+                                       'X-Profile-Active': str(profiler.active).lower()})
+
+
+# --- SERVER-SIDE RENDERING (halaman detail & jelajahi) ---
+# Halaman dirender dari site store dengan data awal tertanam sebagai JSON, jadi
+# satu request cukup untuk tampilan pertama dan isinya terbaca crawler.
+# Fragmen per site di-cache per record (berganti saat site berubah); halaman
+# utuh di-cache per versi graph lewat cached_response.
+JELAJAHI_PAGE_SIZE = 8  # sama dengan itemsPerPage di jelajahi.js
+JELAJAHI_FIELDS = parse_fields('nama,tipe,agama,wilayah,tahun,gambar_url')
+# Nilai dropdown urutan -> parameter sort (sortParams di jelajahi.js)
+JELAJAHI_SORTS = {
+    'nama-asc': 'nama',
+    'nama-desc': '-nama',
+    'tahun-asc': 'tahun',
+    'tahun-desc': '-tahun',
+    'agama': 'agama',
+    'wilayah': 'wilayah',
+}
+RELIGION_COLORS = {
+    'Islam': '#2ecc71',
+    'Katolik': '#e74c3c',
+    'KristenProtestan': '#3498db',
+    'Buddha': '#f39c12',
+    'Hindu': '#9b59b6',
+    'Konghucu': '#e67e22',
+}
+RELIGION_NAMES = {
+    'Katolik': 'Kristen Katolik',
+    'KristenProtestan': 'Kristen Protestan',
+}
+PLACE_ICONS = {
+    'Mosque': 'fa-mosque',
+    'Church': 'fa-church',
+    'Vihara': 'fa-vihara',
+    'Temple': 'fa-om',
+}
+DEFAULT_IMAGES = {
+    'Mosque': 'https://images.unsplash.com/photo-1564769625905-50e93615e769?w=400',
+    'Church': 'https://images.unsplash.com/photo-1548625149-fc4a29cf7092?w=400',
+    'Vihara': 'https://images.unsplash.com/photo-1545569341-9eb8b30979d9?w=400',
+    'Temple': 'https://images.unsplash.com/photo-1600100231128-f5c5b07fa67a?w=400',
+}
+DETAIL_HERO_IMAGE = 'https://images.unsplash.com/photo-1564769625905-50e93615e769?w=1200'
+TRANSPORT_ICONS = {
+    'KRL': 'fa-train',
+    'MRT': 'fa-train',
+    'LRT': 'fa-train',
+    'TJ': 'fa-bus-alt',
+    'JAK': 'fa-bus',
+}
+EVENTS_BY_RELIGION = {
+    'Islam': ['Shalat Idul Fitri Kenegaraan', 'Pengajian Akbar Bulanan', 'Shalat Idul Adha Kenegaraan'],
+    'Katolik': ['Misa Natal', 'Misa Paskah', 'Misa Tahun Baru'],
+    'KristenProtestan': ['Kebaktian Natal', 'Kebaktian Paskah', 'Perayaan Hari Reformasi'],
+    'Buddha': ['Perayaan Waisak', 'Meditasi Bulanan', 'Kathina'],
+    'Hindu': ['Perayaan Nyepi', 'Galungan', 'Kuningan'],
+    'Konghucu': ['Imlek', 'Cap Go Meh', 'Sembahyang Leluhur'],
+}
+app.jinja_env.globals.update(
+    religion_colors=RELIGION_COLORS, religion_names=RELIGION_NAMES, place_icons=PLACE_ICONS,
+    default_images=DEFAULT_IMAGES, detail_hero_image=DETAIL_HERO_IMAGE,
+    transport_icons=TRANSPORT_ICONS, events_by_religion=EVENTS_BY_RELIGION,
+)
+
+@app.template_filter('lokasi')
+def format_location_name(value):
+    """'JakartaPusat' -> 'Jakarta Pusat' (formatLocationName di JS)"""
+    return re.sub(r'([A-Z])', r' \1', value or '').strip()
+
+@app.template_filter('angka')
+def format_number(value):
+    """Angka dengan pemisah ribuan gaya id-ID, '-' jika kosong"""
+    try:
+        return f'{int(value):,}'.replace(',', '.') if value and value != '-' else '-'
+    except (TypeError, ValueError):
+        return '-'
+
+@app.template_filter('alamat_lengkap')
+def format_full_address(site):
+    """Alamat, kecamatan, wilayah, dan kode pos (formatFullAddress di JS)"""
+    parts = [site.get('alamat') or '']
+    for field in ('kecamatan', 'wilayah'):
+        if site.get(field) and site[field] != '-':
+            parts.append(format_location_name(site[field]))
+    if site.get('kode_pos') and site['kode_pos'] != '-':
+        parts.append(f"DKI Jakarta {site['kode_pos']}")
+    return ', '.join(parts)
+
+def script_json(data):
+    """JSON (bytes) yang aman disisipkan di <script type="application/json">"""
+    text = data.decode('utf-8').replace('&', '\\u0026').replace('<', '\\u003c').replace('>', '\\u003e')
+    return Markup(text)
+
+def render_site_detail(site):
+    return render_template('partials/site_detail.html', site=site_detail(site))
+
+def render_site_card(site):
+    return render_template('partials/site_card.html', site=site_summary(site))
+
+detail_fragments = site_store.record_cache(render_site_detail, Markup, FRAGMENT_CACHE_SIZE)
+card_fragments = site_store.record_cache(render_site_card, Markup, FRAGMENT_CACHE_SIZE)
+
+def pagination_items(page, total_pages):
+    """Nomor halaman yang ditampilkan (None untuk '...'), seperti generatePagination() di JS"""
+    items = []
+    for i in range(1, total_pages + 1):
+        if i in (1, total_pages) or page - 1 <= i <= page + 1:
+            items.append(i)
+        elif i in (page - 2, page + 2):
+            items.append(None)
+    return items
+
+def query_jelajahi(snap, state, page):
+    """(site di halaman, total, cursor berikutnya, halaman) untuk filter halaman jelajahi.
+
+    Halaman di luar jangkauan diganti halaman terakhir.
+    """
+    filters = {field: [state[field]] for field in ('tipe', 'wilayah') if state[field]}
+    params = {'filters': filters, 'text': state['q'] or None,
+              'order': JELAJAHI_SORTS.get(state['sort'], 'nama'), 'limit': JELAJAHI_PAGE_SIZE}
+    sites, total, next_cursor = snap.query(offset=(page - 1) * JELAJAHI_PAGE_SIZE, **params)
+    last_page = max(-(-total // JELAJAHI_PAGE_SIZE), 1)
+    if page > last_page:
+        page = last_page
+        sites, total, next_cursor = snap.query(offset=(page - 1) * JELAJAHI_PAGE_SIZE, **params)
+    return sites, total, next_cursor, page
 
 # --- PAGE ROUTES ---
 @app.route('/')
@@ -385,12 +1226,32 @@ def home():
     return render_template('index.html')
 
 @app.route('/jelajahi')
+@cached_response
 def jelajahi():
-    return render_template('jelajahi.html')
+    snap = site_store.current
+    # Parameter memakai nilai dropdown (seperti URL yang ditulis jelajahi.js); nilai tak dikenal diabaikan
+    state = {key: request.args.get(key, '').strip() for key in ('tipe', 'wilayah', 'sort', 'q')}
+    page = max(request.args.get('page', 1, type=int), 1)
+    sites, total, next_cursor, page = query_jelajahi(snap, state, page)
+    total_pages = -(-total // JELAJAHI_PAGE_SIZE)
+    page_args = {key: value for key, value in state.items() if value}
+    return render_template(
+        'jelajahi.html', state=state, page=page, total=total, page_args=page_args,
+        pages=pagination_items(page, total_pages) if total_pages > 1 else [],
+        total_pages=total_pages, locations=snap.facet_values('wilayah'),
+        cards=[card_fragments.get(site) for site in sites],
+        initial_data=script_json(snap.page_json(sites, total, next_cursor, JELAJAHI_FIELDS)))
 
 @app.route('/detail/<site_id>')
+@cached_response
 def detail(site_id):
-    return render_template('detail.html', site_id=site_id)
+    snap = site_store.current
+    site = snap.get(site_id)
+    if site is None:
+        return render_template('detail.html', site_id=site_id, site=None), 404
+    return render_template('detail.html', site_id=site_id, site=site,
+                           content=detail_fragments.get(site),
+                           initial_data=script_json(snap.detail_json(site_id)))
 
 @app.route('/kalender')
 def kalender():
@@ -401,166 +1262,449 @@ def tentang():
     return render_template('tentang.html')
 
 # --- API ENDPOINTS (dari TTL Graph) ---
+SITE_QUERY_PARAMS = set(HASH_FIELDS) | {
+    'q', 'sort', 'cursor', 'offset', 'limit',
+    'tahun_min', 'tahun_max', 'kapasitas_min', 'kapasitas_max'
+}
+MAX_PAGE_SIZE = 500
+MAX_BBOX_RESULTS = 5000
+
+def parse_site_query(args):
+    """Ubah query string /api/sites menjadi argumen SiteStore.query()"""
+    filters = {}
+    for field in HASH_FIELDS:
+        raw = args.get(field)
+        if not raw:
+            continue
+        if field == 'is_heritage':
+            if raw.lower() not in ('true', 'false', '1', '0'):
+                raise ValueError('is_heritage harus true atau false')
+            filters[field] = [raw.lower() in ('true', '1')]
+        else:
+            filters[field] = [v.strip() for v in raw.split(',') if v.strip()]
+    
+    ranges = {}
+    for field, prefix in (('tahun_berdiri', 'tahun'), ('kapasitas', 'kapasitas')):
+        low = args.get(f'{prefix}_min', type=int)
+        high = args.get(f'{prefix}_max', type=int)
+        if args.get(f'{prefix}_min') and low is None or args.get(f'{prefix}_max') and high is None:
+            raise ValueError(f'{prefix}_min/{prefix}_max harus berupa angka')
+        if low is not None or high is not None:
+            ranges[field] = (low, high)
+    
+    order = args.get('sort', 'nama')
+    if order not in ORDERINGS:
+        raise ValueError(f"sort harus salah satu dari: {', '.join(ORDERINGS)}")
+    
+    limit = args.get('limit', 50, type=int)
+    offset = args.get('offset', 0, type=int)
+    if limit < 1 or offset < 0:
+        raise ValueError('limit harus >= 1 dan offset >= 0')
+    
+    return {
+        'filters': filters,
+        'ranges': ranges,
+        'text': args.get('q', '').strip() or None,
+        'order': order,
+        'cursor': args.get('cursor') or None,
+        'offset': offset,
+        'limit': min(limit, MAX_PAGE_SIZE)
+    }
+
 @app.route('/api/sites', methods=['GET'])
+@cached_response
 def get_all_sites():
-    sites = get_all_sites_from_graph()
+    snap = site_store.current
+    try:
+        # ?fields=nama,agama: hanya field itu (plus id) per record
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    result = []
-    for site in sites:
-        result.append({
-            'id': site.get('id'),
-            'nama': site.get('nama'),
-            'alamat': site.get('alamat'),
-            'wilayah': site.get('wilayah'),
-            'kecamatan': site.get('kecamatan'),
-            'kode_pos': site.get('kode_pos'),
-            'tipe': site.get('tipe'),
-            'agama': site.get('agama'),
-            'jam_buka': site.get('jam_buka'),
-            'kapasitas': site.get('kapasitas'),
-            'luas': site.get('luas'),
-            'arsitek': site.get('arsitek'),
-            'tahun': site.get('tahun_berdiri'),
-            'is_heritage': site.get('is_heritage', False),
-            'heritage_code': site.get('heritage_code'),
-            'transport_terdekat': site.get('transport_terdekat'),
-            'latitude': site.get('latitude'),
-            'longitude': site.get('longitude'),
-            'gambar_url': site.get('gambar_url'),
-            'deskripsi': site.get('deskripsi')
-        })
+    # Tanpa parameter query: daftar lengkap seperti sebelumnya (dipakai peta)
+    if not SITE_QUERY_PARAMS.intersection(request.args):
+        if len(snap) >= STREAM_MIN_SITES:
+            # Daftar lengkap disimpan per versi; hanya ?fields= yang selalu dialirkan ulang
+            return streamed_json(snap, lambda: snap.iter_list_json(snap.all(), fields), cache=fields is None)
+        if fields is None:
+            return json_response(snap.list_json())
+        return json_response(b''.join(snap.iter_list_json(snap.all(), fields)))
     
-    return jsonify(result)
+    try:
+        page, total, next_cursor = snap.query(**parse_site_query(request.args))
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return json_response(snap.page_json(page, total, next_cursor, fields))
+
+@app.route('/api/sites.ndjson', methods=['GET'])
+def get_sites_ndjson():
+    """Semua site (atau semua hasil filter /api/sites) sebagai NDJSON yang dialirkan"""
+    snap = site_store.current
+    params = None
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        if SITE_QUERY_PARAMS.intersection(request.args):
+            params = parse_site_query(request.args)
+            # Tanpa batas halaman: limit hanya berlaku jika diminta
+            params['limit'] = request.args.get('limit', type=int) or max(len(snap), 1)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def chunks():
+        # Query baru dijalankan jika bukan 304
+        sites = snap.query(**params)[0] if params is not None else snap.all()
+        return snap.iter_ndjson(sites, fields)
+    
+    try:
+        return streamed_json(snap, chunks, 'application/x-ndjson')
+    except (ValueError, TypeError) as e:
+        # Cursor yang tidak valid baru ketahuan saat query dijalankan
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/search', methods=['GET'])
+@cached_response
+def search_sites():
+    """Pencarian full-text (BM25) atas nama, alamat, deskripsi, kecamatan, dan transportasi"""
+    text = request.args.get('q', '')
+    limit = request.args.get('limit', 10, type=int)
+    if not text.strip():
+        return jsonify({'error': 'q wajib diisi'}), 400
+    if limit < 1:
+        return jsonify({'error': 'limit harus >= 1'}), 400
+    # prefix=false untuk pencarian kata utuh (bukan typeahead)
+    prefix = request.args.get('prefix', 'true').lower() not in ('false', '0')
+    
+    snap = site_store.current
+    results, total = snap.search(text, limit=min(limit, MAX_PAGE_SIZE), prefix=prefix)
+    return json_response(snap.search_json(results, total))
+
+def parse_lat_lng(lat, lng):
+    if lat is None or lng is None:
+        raise ValueError('lat dan lng wajib diisi (angka)')
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError('koordinat di luar jangkauan')
+    return lat, lng
+
+@app.route('/api/sites/near', methods=['GET'])
+@cached_response
+def get_sites_near():
+    """Site terdekat dari sebuah titik (radius dalam meter)"""
+    try:
+        lat, lng = parse_lat_lng(request.args.get('lat', type=float), request.args.get('lng', type=float))
+        radius = request.args.get('radius', type=float)
+        k = request.args.get('k', type=int)
+        if radius is not None and radius <= 0 or k is not None and k < 1:
+            raise ValueError('radius dan k harus positif')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if k is None and radius is None:
+        k = 10
+    k = min(k or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+    snap = site_store.current
+    return json_response(snap.near_json(snap.near(lat, lng, k=k, radius=radius)))
+
+def parse_bbox(args):
+    """(min_lat, min_lng, max_lat, max_lng) dari bbox=barat,selatan,timur,utara atau min_lat/min_lng/max_lat/max_lng"""
+    if args.get('bbox'):
+        try:
+            parts = [float(p) for p in args['bbox'].split(',')]
+        except ValueError:
+            parts = []
+        if len(parts) != 4:
+            raise ValueError('bbox harus berisi 4 angka: barat,selatan,timur,utara')
+        min_lng, min_lat, max_lng, max_lat = parts
+    else:
+        min_lat, min_lng = parse_lat_lng(args.get('min_lat', type=float), args.get('min_lng', type=float))
+        max_lat, max_lng = parse_lat_lng(args.get('max_lat', type=float), args.get('max_lng', type=float))
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValueError('batas minimum harus lebih kecil dari batas maksimum')
+    return max(min_lat, -90), max(min_lng, -180), min(max_lat, 90), min(max_lng, 180)
+
+@app.route('/api/sites/bbox', methods=['GET'])
+@cached_response
+def get_sites_bbox():
+    """Site di dalam area peta: bbox=barat,selatan,timur,utara atau min_lat/min_lng/max_lat/max_lng"""
+    try:
+        bbox = parse_bbox(request.args)
+        limit = min(request.args.get('limit', MAX_BBOX_RESULTS, type=int), MAX_BBOX_RESULTS)
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    snap = site_store.current
+    sites = snap.within(*bbox)
+    return json_response(snap.items_json(sites[:limit], total=len(sites), fields=fields))
 
 @app.route('/api/site/<site_id>', methods=['GET'])
+@cached_response
 def get_site(site_id):
-    site = get_site_from_graph(site_id)
+    data = site_store.current.detail_json(site_id)
     
-    if not site:
+    if data is None:
         return jsonify({'error': 'Site not found'}), 404
     
-    return jsonify({
-        'id': site.get('id'),
-        'nama': site.get('nama'),
-        'alamat': site.get('alamat'),
-        'wilayah': site.get('wilayah'),
-        'kecamatan': site.get('kecamatan'),
-        'kode_pos': site.get('kode_pos'),
-        'tipe': site.get('tipe'),
-        'agama': site.get('agama'),
-        'jam_buka': site.get('jam_buka'),
-        'kapasitas': site.get('kapasitas'),
-        'luas': site.get('luas'),
-        'arsitek': site.get('arsitek'),
-        'tahun_berdiri': site.get('tahun_berdiri'),
-        'is_heritage': site.get('is_heritage', False),
-        'heritage_code': site.get('heritage_code'),
-        'transport_terdekat': site.get('transport_terdekat'),
-        'latitude': site.get('latitude'),
-        'longitude': site.get('longitude'),
-        'gambar_url': site.get('gambar_url'),
-        'deskripsi': site.get('deskripsi')
-    })
+    return json_response(data)
 
 @app.route('/api/locations', methods=['GET'])
+@cached_response
 def get_locations():
-    wilayah_set = set()
-    for site in get_all_sites_from_graph():
-        if site.get('wilayah'):
-            wilayah_set.add(site['wilayah'])
-    return jsonify(sorted(list(wilayah_set)))
+    data = site_store.current.derived_json('locations', lambda snap: snap.facet_values('wilayah'))
+    return json_response(data)
 
 @app.route('/api/religions', methods=['GET'])
+@cached_response
 def get_religions():
-    agama_set = set()
-    for site in get_all_sites_from_graph():
-        if site.get('agama'):
-            agama_set.add(site['agama'])
-    return jsonify(sorted(list(agama_set)))
+    data = site_store.current.derived_json('religions', lambda snap: snap.facet_values('agama'))
+    return json_response(data)
 
 @app.route('/api/stats', methods=['GET'])
+@cached_response
 def get_stats():
-    sites = get_all_sites_from_graph()
-    total_sites = len(sites)
-    total_heritage = sum(1 for site in sites if site.get('is_heritage'))
-    return jsonify({
-        'total_sites': total_sites,
-        'total_heritage': total_heritage
-    })
+    """Statistik & hitungan facet; menerima filter yang sama dengan /api/sites"""
+    snap = site_store.current
+    if not SITE_QUERY_PARAMS.intersection(request.args):
+        return json_response(snap.derived_json('stats', lambda snap: snap.stats()))
+    
+    try:
+        query = parse_site_query(request.args)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(snap.stats(query['filters'], query['ranges'], query['text']))
+
+# --- MAP CLUSTER API (GeoJSON per tile) ---
+# Satu request /api/geo/clusters paling banyak mencakup sekian tile (cukup untuk layar 4K)
+MAX_CLUSTER_TILES = 160
+
+def geo_response(z, tiles):
+    """FeatureCollection tile-tile zoom z; filter dan fields sama dengan /api/sites"""
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        query = parse_site_query(request.args)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    snap = site_store.current
+    return app.response_class(snap.geo_json(z, tiles, query['filters'], query['ranges'],
+                                            query['text'], fields),
+                              mimetype='application/geo+json')
+
+@app.route('/api/geo/clusters', methods=['GET'])
+@cached_response
+def get_geo_clusters():
+    """Cluster site untuk area peta: ?z=<zoom>&bbox=barat,selatan,timur,utara"""
+    try:
+        z = request.args.get('z', type=int)
+        if z is None or not 0 <= z <= MAX_ZOOM:
+            raise ValueError(f'z wajib diisi (0-{MAX_ZOOM})')
+        tiles = tiles_in_bbox(z, *parse_bbox(request.args))
+        if len(tiles) > MAX_CLUSTER_TILES:
+            raise ValueError(f'area terlalu besar untuk zoom {z}; perkecil bbox atau zoom')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return geo_response(z, tiles)
+
+@app.route('/api/geo/tiles/<int:z>/<int:x>/<int:y>.geojson', methods=['GET'])
+@cached_response
+def get_geo_tile(z, x, y):
+    """Cluster satu tile Web Mercator z/x/y (skema XYZ seperti tile OSM)"""
+    if z > MAX_ZOOM or x >= 1 << z or y >= 1 << z:
+        return jsonify({'error': 'tile di luar jangkauan'}), 404
+    return geo_response(z, [(x, y)])
+
+# --- TRANSPORT API (halte/stasiun dari rel:transportTerdekat) ---
+@app.route('/api/transport/stops', methods=['GET'])
+@cached_response
+def get_transport_stops():
+    """Semua halte/stasiun beserta jalur dan jumlah site; filter ?mode=TJ,KRL dan ?q=nama"""
+    modes = [m.strip().upper() for m in request.args.get('mode', '').split(',') if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        return jsonify({'error': f"mode harus salah satu dari: {', '.join(MODES)}"}), 400
+    snap = site_store.current
+    return json_response(snap.transit_stops_json(modes or None, request.args.get('q', '').strip() or None))
+
+@app.route('/api/transport/<stop>/sites', methods=['GET'])
+@cached_response
+def get_transport_stop_sites(stop):
+    """Site di dekat satu halte ('juanda-krl') atau semua halte dengan nama itu ('juanda')"""
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    data = site_store.current.transit_sites_json(stop, fields)
+    if data is None:
+        return jsonify({'error': 'Halte tidak ditemukan'}), 404
+    return json_response(data)
+
+# --- DELTA SYNC API ---
+# Kirim komentar SSE sesering ini supaya proxy tidak menutup koneksi yang diam
+CHANGES_HEARTBEAT = 15
+changes_waiters = threading.BoundedSemaphore(CHANGES_MAX_WAITERS)
+
+def parse_since(raw):
+    try:
+        since = int(raw)
+    except (TypeError, ValueError):
+        raise ValueError('since harus berupa versi graph (bilangan bulat)')
+    if since < 0:
+        raise ValueError('since tidak boleh negatif')
+    return since
+
+def wait_for_changes(since, timeout):
+    """Tunggu versi graph > since paling lama `timeout` detik, sambil mengikuti journal worker lain"""
+    deadline = time.monotonic() + timeout
+    while True:
+        poll_journal()
+        remaining = deadline - time.monotonic()
+        if site_store.version > since or remaining <= 0:
+            return
+        site_store.wait_for_version(since, min(SYNC_INTERVAL, remaining))
+
+@cached_response
+def changes_response(since, fields):
+    snap, site_ids = site_store.changes_since(since)
+    return json_response(snap.changes_json(since, site_ids, fields))
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """Site yang berubah sejak versi `since`; ?wait=detik menahan request sampai ada perubahan"""
+    try:
+        since = parse_since(request.args.get('since'))
+        fields = parse_fields(request.args.get('fields'))
+        wait = float(request.args.get('wait', 0))
+        if not 0 <= wait < float('inf'):
+            raise ValueError('wait tidak valid')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if wait and site_store.version <= since and changes_waiters.acquire(blocking=False):
+        # Jika semua slot terpakai, langsung jawab tanpa menunggu (klien akan poll lagi)
+        try:
+            wait_for_changes(since, min(wait, CHANGES_MAX_WAIT))
+        finally:
+            changes_waiters.release()
+    elif site_store.version < since:
+        poll_journal()  # klien sudah melihat versi lebih baru di worker lain
+    return changes_response(since, fields)
+
+@app.route('/api/changes/stream', methods=['GET'])
+def stream_changes():
+    """Server-Sent Events: satu event `changes` (isi sama dengan /api/changes) per versi baru"""
+    try:
+        # EventSource mengirim id event terakhir saat menyambung ulang
+        since = parse_since(request.headers.get('Last-Event-ID') or request.args.get('since'))
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not changes_waiters.acquire(blocking=False):
+        response = jsonify({'error': 'terlalu banyak koneksi yang menunggu perubahan'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(CHANGES_HEARTBEAT)
+        return response
+    
+    def events(since):
+        yield f'retry: {CHANGES_HEARTBEAT * 1000}\n\n'.encode('ascii')
+        deadline = time.monotonic() + CHANGES_STREAM_SECONDS
+        while (remaining := deadline - time.monotonic()) > 0:
+            wait_for_changes(since, min(CHANGES_HEARTBEAT, remaining))
+            snap, site_ids = site_store.changes_since(since)
+            if snap.version > since:
+                yield (f'id: {snap.version}\nevent: changes\ndata: '.encode('ascii') +
+                       snap.changes_json(since, site_ids, fields) + b'\n\n')
+                since = snap.version
+            else:
+                yield b': ping\n\n'
+    
+    response = app.response_class(events(since), mimetype='text/event-stream',
+                                  headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Dipanggil server saat koneksi selesai, juga jika generator belum sempat berjalan
+    response.call_on_close(changes_waiters.release)
+    return response
 
 # --- RELIGIOUS CALENDAR API ---
-def get_indonesian_holidays(year):
-    """Get Indonesian religious holidays (manual data from official calendar)"""
-    # Manual data for 2026-2027 based on official Indonesian calendar
-    manual_events = {
-        2026: [
-            # Islamic
-            {'date': '2026-01-27', 'title': 'Isra Mi\'raj 1447 H', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            {'date': '2026-02-18', 'title': 'Awal Ramadan 1447 H', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            {'date': '2026-03-19', 'title': 'Idul Fitri 1447 H', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            {'date': '2026-03-20', 'title': 'Idul Fitri 1447 H (Hari ke-2)', 'location': 'Masjid Agung Al-Azhar', 'agama': 'Islam'},
-            {'date': '2026-06-06', 'title': 'Idul Adha 1447 H', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            {'date': '2026-06-26', 'title': 'Tahun Baru Islam 1448 H', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            {'date': '2026-09-04', 'title': 'Maulid Nabi Muhammad SAW', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            
-            # Christian
-            {'date': '2026-04-03', 'title': 'Jumat Agung', 'location': 'Gereja Katedral Jakarta', 'agama': 'Katolik'},
-            {'date': '2026-04-05', 'title': 'Paskah', 'location': 'Gereja Katedral Jakarta', 'agama': 'Katolik'},
-            {'date': '2026-05-14', 'title': 'Kenaikan Isa Almasih', 'location': 'Gereja Katedral Jakarta', 'agama': 'Katolik'},
-            {'date': '2026-12-24', 'title': 'Misa Malam Natal', 'location': 'Gereja Katedral Jakarta', 'agama': 'Katolik'},
-            {'date': '2026-12-25', 'title': 'Perayaan Natal', 'location': 'Gereja Katedral Jakarta', 'agama': 'Katolik'},
-            
-            # Buddhist
-            {'date': '2026-05-12', 'title': 'Hari Raya Waisak 2570 BE', 'location': 'Vihara Sin Tek Bio', 'agama': 'Buddha'},
-            
-            # Hindu
-            {'date': '2026-03-22', 'title': 'Hari Raya Nyepi', 'location': 'Pura Aditya Jaya', 'agama': 'Hindu'},
-            {'date': '2026-07-08', 'title': 'Hari Raya Galungan', 'location': 'Pura Aditya Jaya', 'agama': 'Hindu'},
-            {'date': '2026-07-18', 'title': 'Hari Raya Kuningan', 'location': 'Pura Aditya Jaya', 'agama': 'Hindu'},
-            
-            # Chinese/Confucian
-            {'date': '2026-02-17', 'title': 'Tahun Baru Imlek 2577', 'location': 'Vihara Sin Tek Bio', 'agama': 'Konghucu'},
-            {'date': '2026-03-03', 'title': 'Cap Go Meh', 'location': 'Vihara Sin Tek Bio', 'agama': 'Konghucu'},
-        ],
-        2027: [
-            # Islamic
-            {'date': '2027-01-16', 'title': 'Isra Mi\'raj 1448 H', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            {'date': '2027-02-17', 'title': 'Awal Ramadan 1448 H', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            {'date': '2027-03-19', 'title': 'Idul Fitri 1448 H', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            {'date': '2027-03-20', 'title': 'Idul Fitri 1448 H (Hari ke-2)', 'location': 'Masjid Agung Al-Azhar', 'agama': 'Islam'},
-            {'date': '2027-05-26', 'title': 'Idul Adha 1448 H', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            {'date': '2027-06-15', 'title': 'Tahun Baru Islam 1449 H', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            {'date': '2027-08-24', 'title': 'Maulid Nabi Muhammad SAW', 'location': 'Masjid Istiqlal', 'agama': 'Islam'},
-            
-            # Christian
-            {'date': '2027-03-26', 'title': 'Jumat Agung', 'location': 'Gereja Katedral Jakarta', 'agama': 'Katolik'},
-            {'date': '2027-03-28', 'title': 'Paskah', 'location': 'Gereja Katedral Jakarta', 'agama': 'Katolik'},
-            {'date': '2027-04-08', 'title': 'Kenaikan Isa Almasih', 'location': 'Gereja Katedral Jakarta', 'agama': 'Katolik'},
-            {'date': '2027-12-24', 'title': 'Misa Malam Natal', 'location': 'Gereja Katedral Jakarta', 'agama': 'Katolik'},
-            {'date': '2027-12-25', 'title': 'Perayaan Natal', 'location': 'Gereja Katedral Jakarta', 'agama': 'Katolik'},
-            
-            # Buddhist
-            {'date': '2027-05-01', 'title': 'Hari Raya Waisak 2571 BE', 'location': 'Vihara Sin Tek Bio', 'agama': 'Buddha'},
-            
-            # Hindu
-            {'date': '2027-03-11', 'title': 'Hari Raya Nyepi', 'location': 'Pura Aditya Jaya', 'agama': 'Hindu'},
-            {'date': '2027-06-26', 'title': 'Hari Raya Galungan', 'location': 'Pura Aditya Jaya', 'agama': 'Hindu'},
-            {'date': '2027-07-06', 'title': 'Hari Raya Kuningan', 'location': 'Pura Aditya Jaya', 'agama': 'Hindu'},
-            
-            # Chinese/Confucian
-            {'date': '2027-01-17', 'title': 'Tahun Baru Imlek 2578', 'location': 'Vihara Sin Tek Bio', 'agama': 'Konghucu'},
-            {'date': '2027-02-28', 'title': 'Cap Go Meh', 'location': 'Vihara Sin Tek Bio', 'agama': 'Konghucu'},
-        ]
+CALENDAR_NAME = 'Kalender Religi Jakarta'
+ICAL_DOMAIN = 'jakartaharmony.id'
+
+def event_items(events, snap):
+    """Acara untuk response API; lokasi diambil dari nama site terbaru"""
+    items = []
+    for event in events:
+        site = snap.get(event['site']) if event['site'] else None
+        items.append({
+            'id': event['id'],
+            'date': event['date'],
+            'title': event['title'],
+            'agama': event['agama'],
+            'site': event['site'] if site else None,
+            'location': site['nama'] if site else event['location'] or event['site']
+        })
+    return items
+
+def parse_calendar_query(args):
+    """Ubah query string /api/calendar menjadi argumen EventIndex.between()"""
+    bounds = {}
+    for name in ('from', 'to'):
+        raw = args.get(name)
+        if raw:
+            try:
+                bounds[name] = datetime.strptime(raw, '%Y-%m-%d').date().isoformat()
+            except ValueError:
+                raise ValueError(f'{name} harus tanggal YYYY-MM-DD')
+    if 'from' in bounds and 'to' in bounds and bounds['from'] > bounds['to']:
+        raise ValueError('from harus sebelum to')
+    limit = args.get('limit', type=int)
+    if args.get('limit') and (limit is None or limit < 1):
+        raise ValueError('limit harus >= 1')
+    agama = [v.strip() for v in args.get('agama', '').split(',') if v.strip()]
+    return {
+        'start': bounds.get('from'),
+        'end': bounds.get('to'),
+        'agama': agama or None,
+        'site': args.get('site') or None,
+        'limit': min(limit, MAX_PAGE_SIZE) if limit else None
     }
+
+@app.route('/api/calendar', methods=['GET'])
+@cached_response
+def get_calendar_range():
+    """Acara dalam rentang tanggal: ?from=YYYY-MM-DD&to=YYYY-MM-DD&agama=&site=&limit="""
+    try:
+        query = parse_calendar_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return manual_events.get(year, [])
+    snap = site_store.current
+    events = event_items(calendar_events.between(**query), snap)
+    return jsonify({
+        'from': query['start'],
+        'to': query['end'],
+        'events': events,
+        'total': len(events),
+        'version': snap.version
+    })
+
+@app.route('/api/calendar.ics', methods=['GET'])
+@cached_response
+def get_calendar_ical():
+    """Feed iCalendar (filter sama dengan /api/calendar); dibuat sekali per versi data"""
+    try:
+        query = parse_calendar_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    events = event_items(calendar_events.between(**query), site_store.current)
+    return app.response_class(to_ical(events, CALENDAR_NAME, ICAL_DOMAIN), mimetype='text/calendar')
 
 @app.route('/api/calendar/<int:year>', methods=['GET'])
+@cached_response
 def get_calendar_events(year):
     """API endpoint untuk mendapatkan kalender religi"""
     try:
-        # Get data manual dari function
-        events = get_indonesian_holidays(year)
+        # Acara dari graph (rel:AcaraKeagamaan), lewat index tanggal
+        events = event_items(calendar_events.between(f'{year:04d}-01-01', f'{year:04d}-12-31'),
+                             site_store.current)
         
         # Optional: Jika punya API key Calendarific, bisa fetch dari sana
         # Requires 'requests' package (currently commented out in imports)
@@ -595,11 +1739,110 @@ def get_calendar_events(year):
             'error': str(e)
         }), 500
 
+# --- SPARQL ENDPOINT ---
+# Prefix yang boleh dipakai query tanpa deklarasi PREFIX
+SPARQL_PREFIXES = tuple((prefix, str(namespace)) for prefix, namespace in (
+    ('rel', REL), ('geo', GEO), ('schema', SCHEMA), ('rdf', RDF), ('rdfs', RDFS), ('xsd', XSD)))
+sparql_cache = ResponseCache(SPARQL_CACHE_SIZE)
+sparql_slots = threading.BoundedSemaphore(SPARQL_MAX_CONCURRENT)
+
+def sparql_busy(message):
+    response = jsonify({'error': message})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+def negotiate_sparql_format(query, fmt=None):
+    """Kunci format output dari ?format= atau header Accept (default JSON / Turtle)"""
+    formats = sparql_query.formats_for(sparql_query.query_type(query))
+    if fmt:
+        if fmt not in formats:
+            raise sparql_query.QueryError(f"format harus salah satu dari: {', '.join(formats)}")
+        return fmt
+    by_mimetype = {mimetype: name for name, (mimetype, _) in formats.items()}
+    best = request.accept_mimetypes.best_match(list(by_mimetype))
+    return by_mimetype.get(best, next(iter(formats)))
+
+@app.route('/sparql', methods=['GET', 'POST'])
+def sparql_endpoint():
+    """SPARQL 1.1 Protocol (query saja, read-only) atas graph aktif; hasil di-cache per versi graph"""
+    params = request.args if request.method == 'GET' else request.form
+    if 'update' in params:
+        return jsonify({'error': 'endpoint ini hanya-baca, SPARQL Update tidak didukung'}), 400
+    if request.method == 'POST' and request.mimetype == 'application/sparql-query':
+        text = request.get_data(as_text=True)
+    else:
+        text = params.get('query')
+    if not text or not text.strip():
+        return jsonify({'error': 'parameter query wajib diisi'}), 400
+    try:
+        query = sparql_query.prepare(text, SPARQL_PREFIXES)
+        fmt = negotiate_sparql_format(query, request.args.get('format') or params.get('format'))
+    except sparql_query.QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    key = f'{fmt}\n{text}'
+    entry = sparql_cache.get(site_store.version, key)
+    if entry is None:
+        # Query berat tidak boleh menghabiskan thread yang melayani API publik
+        if not sparql_slots.acquire(blocking=False):
+            return sparql_busy('terlalu banyak query SPARQL yang sedang berjalan')
+        try:
+            # Query membaca graph langsung: tahan writer selama evaluasi (paling lama SPARQL_TIMEOUT)
+            if not graph_lock.acquire(timeout=SPARQL_TIMEOUT):
+                return sparql_busy('graph sedang diperbarui, coba lagi')
+            try:
+                version = site_store.version
+                with GRAPH_OP_SECONDS.time(operation='sparql'):
+                    result, truncated = sparql_query.run(g, query, SPARQL_TIMEOUT, SPARQL_MAX_ROWS)
+            finally:
+                graph_lock.release()
+            body = sparql_query.serialize(result, fmt)
+        except sparql_query.QueryTimeout:
+            return sparql_busy(f'query melewati batas waktu {SPARQL_TIMEOUT:g} detik')
+        except Exception as e:
+            return jsonify({'error': f'query gagal: {e}'}), 400
+        finally:
+            sparql_slots.release()
+        headers = {'Vary': 'Accept'}
+        if truncated:
+            # Hasil dipotong di SPARQL_MAX_ROWS baris/triple
+            headers['X-Result-Truncated'] = str(SPARQL_MAX_ROWS)
+        mimetype = sparql_query.formats_for(result.type)[fmt][0]
+        entry = sparql_cache.put(version, key, body, mimetype, headers)
+    return entry.respond(request, app.response_class, CACHE_CONTROL)
+
+# --- METRICS ENDPOINT ---
+metrics.callback('rj_graph_triples', 'Jumlah triple di graph', lambda: len(g))
+metrics.callback('rj_sites', 'Jumlah site di proyeksi aktif', lambda: len(site_store))
+metrics.callback('rj_graph_version', 'Versi graph yang sedang dilayani', lambda: site_store.version)
+metrics.callback('rj_journal_entries', 'Batch journal yang belum di-compact', lambda: journal.entries)
+metrics.callback('rj_persistence_pending_batches', 'Batch journal yang belum ditulis ke TTL',
+                 pending_batches)
+metrics.callback('rj_persistence_flushes_total', 'Penulisan TTL oleh proses ini', lambda: persistence.flushes,
+                 kind='counter')
+metrics.callback('rj_response_cache_entries', 'Entry di cache response', lambda: len(response_cache))
+metrics.callback('rj_cache_requests_total', 'Lookup cache per hasil (hit/miss)', lambda: [
+    ('response', 'hit', response_cache.hits), ('response', 'miss', response_cache.misses),
+    ('site_summary', 'hit', site_store._summaries.hits), ('site_summary', 'miss', site_store._summaries.misses),
+    ('site_detail', 'hit', site_store._details.hits), ('site_detail', 'miss', site_store._details.misses),
+    ('detail_fragment', 'hit', detail_fragments.hits), ('detail_fragment', 'miss', detail_fragments.misses),
+    ('card_fragment', 'hit', card_fragments.hits), ('card_fragment', 'miss', card_fragments.misses),
+    ('sparql_result', 'hit', sparql_cache.hits), ('sparql_result', 'miss', sparql_cache.misses),
+    ('sparql_prepared', 'hit', sparql_query.prepare.cache_info().hits),
+    ('sparql_prepared', 'miss', sparql_query.prepare.cache_info().misses),
+], labels=('cache', 'result'), kind='counter')
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Metrik format Prometheus untuk proses worker yang menjawab request ini"""
+    return app.response_class(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 if __name__ == '__main__':
     print("="*60)
     print("🚀 Jakarta Semantic Harmony - Pure TTL System (Development)")
     print(f"📊 Total triples: {len(g)}")
-    print(f"🏛️  Total sites: {len(get_all_sites_from_graph())}")
+    print(f"🏛️  Total sites: {len(site_store)}")
     print("⚠️  Development server on port 1083 (production uses 1081)")
     print("="*60)
     app.run(debug=True, port=1083)
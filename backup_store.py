@@ -0,0 +1,282 @@
+"""Backup TTL berbasis isi (content-addressed): full + delta terkompresi.
+
+Setiap compaction mencatat satu titik restore (versi graph) tanpa menyalin
+seluruh file TTL:
+
+- objek full: file TTL utuh, hanya ditulis sesekali;
+- objek delta: selisih bersih (baris N-Triples `+`/`-`, terurut) dari full
+  tersebut sampai versi titik restore, dibangun dari batch journal.
+
+Objek disimpan gzip di backup/objects/<2 hex>/<hash>.gz dengan nama dari hash
+isinya, jadi isi yang sama tidak pernah disimpan dua kali. Delta tumbuh di
+setiap compaction sampai ukurannya melewati FULL_RATIO kali ukuran full; saat
+itu TTL sebelum compaction disimpan sebagai full baru.
+
+Daftar titik restore ada di backup/manifest.json. Setiap titik hanya
+bergantung pada satu full dan satu delta, jadi titik mana pun bisa dibuang
+tanpa memutus titik lain. Retensi (N titik terakhir, titik terakhir per jam,
+dan titik terakhir per hari) dihitung dari manifest yang panjangnya dibatasi
+konfigurasi retensi, tanpa membaca isi direktori.
+
+    python backup_store.py list
+    python backup_store.py restore latest -o pulih.ttl
+    python backup_store.py restore 120 -o pulih.ttl
+    python backup_store.py restore "2026-10-18 09:00" -o pulih.ttl
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from rdflib.plugins.serializers.nt import _nt_row
+
+# Full baru ditulis jika delta (terkompresi) melebihi pecahan ini dari full
+FULL_RATIO = 0.25
+COMPRESS_LEVEL = 6
+
+
+class BackupStore:
+    """Titik restore di `directory` (manifest.json + objects/)"""
+
+    def __init__(self, directory, recent=10, hourly=48, daily=30, full_ratio=FULL_RATIO):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, 'objects')
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.recent = recent
+        self.hourly = hourly
+        self.daily = daily
+        self.full_ratio = full_ratio
+        self._delta_cache = None  # (hash, (removed, added)) delta terakhir yang dibaca/ditulis
+
+    # --- OBJEK ---
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + '.gz')
+
+    def _put(self, data, compressed=None):
+        """Simpan `data` (bytes) sebagai objek; mengembalikan (hash, ukuran terkompresi)"""
+        digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, os.path.getsize(path)
+        if compressed is None:
+            compressed = gzip.compress(data, COMPRESS_LEVEL, mtime=0)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return digest, len(compressed)
+
+    def _get(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            return gzip.decompress(f.read())
+
+    def _remove(self, digest):
+        try:
+            os.remove(self._object_path(digest))
+        except FileNotFoundError:
+            pass
+
+    # --- DELTA ---
+    @staticmethod
+    def _encode_delta(removed, added):
+        return ''.join([f'- {row}' for row in sorted(removed)] +
+                       [f'+ {row}' for row in sorted(added)]).encode('utf-8')
+
+    def _read_delta(self, digest):
+        """(set baris dihapus, set baris ditambah) dari objek delta; None = delta kosong"""
+        if digest is None:
+            return set(), set()
+        if self._delta_cache and self._delta_cache[0] == digest:
+            removed, added = self._delta_cache[1]
+            return set(removed), set(added)
+        removed, added = set(), set()
+        for line in self._get(digest).decode('utf-8').splitlines(keepends=True):
+            tag, _, row = line.partition(' ')
+            (added if tag == '+' else removed).add(row)
+        return removed, added
+
+    @staticmethod
+    def _merge(removed, added, batches):
+        """Tambahkan batch journal ke selisih bersih (tambah lalu hapus saling meniadakan)"""
+        for _, batch_added, batch_removed, _ in batches:
+            for triple in batch_removed:
+                row = _nt_row(triple)
+                if row in added:
+                    added.discard(row)
+                else:
+                    removed.add(row)
+            for triple in batch_added:
+                row = _nt_row(triple)
+                if row in removed:
+                    removed.discard(row)
+                else:
+                    added.add(row)
+
+    # --- MANIFEST ---
+    def points(self):
+        """Semua titik restore, terurut naik per versi"""
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)['points']
+        except FileNotFoundError:
+            return []
+
+    def _write_manifest(self, points):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'points': points}, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def _retain(self, points, now):
+        """Titik yang disimpan: `recent` terakhir + terakhir per jam/hari dalam jendela retensi"""
+        keep = set(range(max(0, len(points) - self.recent), len(points)))
+        hours, days = {}, {}
+        for i, point in enumerate(points):
+            stamp = datetime.fromisoformat(point['time'])
+            hours[stamp.replace(minute=0, second=0)] = i
+            days[stamp.date()] = i
+        keep.update(i for hour, i in hours.items() if hour > now - timedelta(hours=self.hourly))
+        keep.update(i for day, i in days.items() if day > (now - timedelta(days=self.daily)).date())
+        return [point for i, point in enumerate(points) if i in keep]
+
+    # --- SIMPAN ---
+    def save(self, version, full_version, ttl_path, batches, now=None):
+        """Catat titik restore `version`; mengembalikan titik yang baru.
+
+        `ttl_path` berisi graph versi `full_version` (TTL sebelum compaction)
+        dan `batches` adalah batch journal (versi, added, removed, waktu)
+        full_version+1 .. version. Pemanggil memegang lock compaction, jadi
+        hanya ada satu penulis manifest.
+        """
+        if not batches or batches[0][0] != full_version + 1 or batches[-1][0] != version:
+            raise ValueError(f'batch journal {full_version + 1}..{version} tidak lengkap')
+        now = now or datetime.now()
+        points = self.points()
+        last = points[-1] if points else None
+
+        new_points = []
+        delta = None
+        if last is not None and last['version'] == full_version:
+            # Lanjutkan dari full titik terakhir
+            removed, added = self._read_delta(last['delta'])
+            self._merge(removed, added, batches)
+            data = self._encode_delta(removed, added)
+            compressed = gzip.compress(data, COMPRESS_LEVEL, mtime=0)
+            if len(compressed) <= last['full_size'] * self.full_ratio:
+                full, full_size, base_version = last['full'], last['full_size'], last['full_version']
+                delta = (data, compressed, removed, added)
+        if delta is None:
+            # Full baru dari TTL sebelum compaction; delta hanya batch compaction ini
+            with open(ttl_path, 'rb') as f:
+                full, full_size = self._put(f.read())
+            base_version = full_version
+            if last is None or last['version'] != full_version:
+                new_points.append({'version': full_version, 'time': now.isoformat(timespec='seconds'),
+                                   'full': full, 'full_version': full_version, 'full_size': full_size,
+                                   'delta': None, 'delta_size': 0})
+            removed, added = set(), set()
+            self._merge(removed, added, batches)
+            data = self._encode_delta(removed, added)
+            delta = (data, None, removed, added)
+
+        data, compressed, removed, added = delta
+        delta_hash, delta_size = self._put(data, compressed) if data else (None, 0)
+        self._delta_cache = (delta_hash, (removed, added))
+        point = {'version': version, 'time': now.isoformat(timespec='seconds'),
+                 'full': full, 'full_version': base_version, 'full_size': full_size,
+                 'delta': delta_hash, 'delta_size': delta_size}
+        new_points.append(point)
+
+        points = [p for p in points if p['version'] < new_points[0]['version']] + new_points
+        kept = self._retain(points, now)
+        self._write_manifest(kept)
+        # Objek hanya dihapus setelah manifest baru tersimpan
+        referenced = {p['full'] for p in kept} | {p['delta'] for p in kept}
+        for dropped in points:
+            for digest in (dropped['full'], dropped['delta']):
+                if digest and digest not in referenced:
+                    self._remove(digest)
+                    referenced.add(digest)  # jangan hapus dua kali
+        return point
+
+    # --- RESTORE ---
+    def find(self, spec):
+        """Titik restore dari 'latest', nomor versi, atau waktu ISO (titik terakhir sebelum waktu itu)"""
+        points = self.points()
+        if not points:
+            raise LookupError('belum ada titik restore')
+        if spec == 'latest':
+            return points[-1]
+        if spec.isdigit():
+            for point in points:
+                if point['version'] == int(spec):
+                    return point
+            raise LookupError(f'tidak ada titik restore untuk versi {spec}')
+        at = datetime.fromisoformat(spec)
+        earlier = [p for p in points if datetime.fromisoformat(p['time']) <= at]
+        if not earlier:
+            raise LookupError(f'tidak ada titik restore sebelum {spec}')
+        return earlier[-1]
+
+    def restore(self, point):
+        """Isi file TTL (bytes) untuk titik restore"""
+        full = self._get(point['full'])
+        if point['delta'] is None:
+            return full
+        from rdflib import Graph
+
+        graph = Graph()
+        graph.parse(data=full.decode('utf-8'), format='turtle')
+        removed, added = self._read_delta(point['delta'])
+        if removed:
+            graph -= Graph().parse(data=''.join(removed), format='nt')
+        if added:
+            graph.parse(data=''.join(added), format='nt')
+        return graph.serialize(format='turtle', encoding='utf-8')
+
+
+def main(argv=None):
+    default_dir = os.path.join(os.environ.get('DATA_DIR', os.path.dirname(__file__)), 'backup')
+    parser = argparse.ArgumentParser(description='Daftar dan restore titik backup TTL')
+    parser.add_argument('--dir', default=default_dir, help='direktori backup (default: DATA_DIR/backup)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='Tampilkan semua titik restore')
+    res = sub.add_parser('restore', help='Tulis TTL untuk satu titik restore')
+    res.add_argument('point', help="'latest', nomor versi, atau waktu ISO (mis. '2026-10-18 09:00')")
+    res.add_argument('-o', '--output', required=True, help="file TTL tujuan ('-' untuk stdout)")
+    args = parser.parse_args(argv)
+
+    store = BackupStore(args.dir)
+    if args.command == 'list':
+        for point in store.points():
+            size = point['delta_size'] if point['delta'] else point['full_size']
+            kind = f"delta dari versi {point['full_version']}" if point['delta'] else 'full'
+            print(f"versi {point['version']:>8}  {point['time']}  {kind} ({size / 1024:.1f} KB)")
+        return 0
+
+    try:
+        point = store.find(args.point)
+    except (LookupError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    data = store.restore(point)
+    if args.output == '-':
+        sys.stdout.buffer.write(data)
+    else:
+        with open(args.output, 'wb') as f:
+            f.write(data)
+        print(f"✅ Versi {point['version']} ({point['time']}) dipulihkan ke {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
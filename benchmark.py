@@ -0,0 +1,507 @@
+"""Benchmark Jakarta Semantic Harmony dengan data sintetis.
+
+Membuat graph TTL berbentuk ReligiJakarta (predikat yang sama dengan SITE_PROPERTIES
+di app.py) untuk 1k/10k/100k/1M site, lalu untuk setiap ukuran:
+
+- mengukur waktu start-up (cold: parse TTL, warm: dari snapshot biner; dengan
+  GRAPH_STORE=sqlite cold mengimpor TTL ke store, warm membuka store yang ada)
+- menjalankan skenario graph & API lewat Flask test client (latensi per request)
+- menjalankan load test multi-thread ke server waitress sungguhan
+- mencatat peak RSS proses
+
+Setiap ukuran dijalankan di proses terpisah supaya start-up dan RSS terukur
+bersih. Hasil ditulis sebagai JSON agar bisa dibandingkan antar-run:
+
+    python benchmark.py run --sizes 1k,10k --output before.json
+    python benchmark.py run --sizes 1k,10k --output after.json
+    python benchmark.py compare before.json after.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_DIR = os.path.join(ROOT, 'bench_data')
+
+# --- DATA SINTETIS ---
+RELIGIONS = [
+    ('Islam', 'Mosque', 'Masjid'),
+    ('Katolik', 'Church', 'Gereja'),
+    ('KristenProtestan', 'Church', 'Gereja'),
+    ('Buddha', 'Vihara', 'Vihara'),
+    ('Hindu', 'Temple', 'Pura'),
+    ('Konghucu', 'Vihara', 'Klenteng'),
+]
+REGIONS = {
+    'JakartaPusat': ['Gambir', 'Sawah Besar', 'Menteng', 'Tanah Abang', 'Kemayoran'],
+    'JakartaUtara': ['Penjaringan', 'Koja', 'Cilincing', 'Tanjung Priok', 'Pademangan'],
+    'JakartaBarat': ['Taman Sari', 'Tambora', 'Grogol Petamburan', 'Cengkareng', 'Kalideres'],
+    'JakartaSelatan': ['Kebayoran Baru', 'Tebet', 'Pancoran', 'Cilandak', 'Jagakarsa'],
+    'JakartaTimur': ['Matraman', 'Jatinegara', 'Cakung', 'Duren Sawit', 'Kramat Jati'],
+}
+NAME_WORDS = ['Agung', 'Raya', 'Jami', 'Al-Ikhlas', 'Santa Maria', 'Sion', 'Dharma', 'Bhakti',
+              'Jaya', 'Nurul Iman', 'Kasih', 'Damai', 'Sentosa', 'Hidayah', 'Pelita', 'Mulia']
+STREETS = ['Jl. Merdeka', 'Jl. Sudirman', 'Jl. Gajah Mada', 'Jl. Hayam Wuruk', 'Jl. Pemuda',
+           'Jl. Diponegoro', 'Jl. Veteran', 'Jl. Pangeran Jayakarta', 'Jl. Kramat Raya']
+STOPS = ['Juanda (KRL)', 'Istiqlal (TJ)', 'Kota (KRL)', 'Glodok (TJ)', 'Harmoni (TJ)',
+         'Manggarai (KRL)', 'Tebet (KRL)', 'Blok M (MRT)', 'Bundaran HI (MRT)', 'Senen (TJ)']
+DESCRIPTION_WORDS = ('tempat ibadah bersejarah yang dibangun pada masa kolonial dan menjadi pusat '
+                     'kegiatan umat serta simbol kerukunan beragama di Jakarta dengan arsitektur '
+                     'tradisional perpaduan budaya lokal').split()
+
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text in SIZES:
+        return SIZES[text]
+    return int(text)
+
+
+def size_label(n):
+    for label, value in SIZES.items():
+        if value == n:
+            return label
+    return str(n)
+
+
+def site_ttl(i, rng):
+    """Blok Turtle untuk satu site sintetis"""
+    agama, tipe, prefix = rng.choice(RELIGIONS)
+    wilayah = rng.choice(list(REGIONS))
+    kecamatan = rng.choice(REGIONS[wilayah])
+    nama = f'{prefix} {rng.choice(NAME_WORDS)} {kecamatan} {i}'
+    kode_pos = f'1{rng.randint(0, 9999):04d}'
+    heritage = rng.random() < 0.1
+    stops = rng.sample(STOPS, rng.randint(1, 3))
+    description = ' '.join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(12, 30)))
+    lines = [
+        f'rel:Site{i} a rel:TempatIbadah ;',
+        f'    rdfs:label "{nama}"@id ;',
+        f'    rel:agama "{agama}" ;',
+        '    rel:arsitek "None" ;',
+        f'    rel:jamOperasional "0{rng.randint(4, 8)}:00 - 2{rng.randint(0, 2)}:00 WIB" ;',
+        f'    rel:kapasitas {rng.randint(50, 20000)} ;',
+        f'    rel:kecamatan "{kecamatan}" ;',
+        f'    rel:kodeCagarBudaya "{f"KB{i:06d}" if heritage else "None"}" ;',
+        f'    rel:kodePos "{kode_pos}" ;',
+        f'    rel:luasLahan "{rng.randint(1, 90) / 10} Hektar" ;',
+        f'    rel:nama "{nama}" ;',
+        f'    rel:statusCagarBudaya {"true" if heritage else "false"} ;',
+        f'    rel:tahunBerdiri "{rng.randint(1600, 2020)}"^^xsd:gYear ;',
+        f'    rel:tipeBangunan "{tipe}" ;',
+        '    rel:transportTerdekat ' + ', '.join(f'"{s}"' for s in stops) + ' ;',
+        f'    rel:wilayah "{wilayah}" ;',
+        f'    schema1:address "{rng.choice(STREETS)} No.{rng.randint(1, 200)}, {kecamatan}, Jakarta {kode_pos}" ;',
+        f'    schema1:description "{description.capitalize()}."@id ;',
+        f'    schema1:image "https://example.org/img/{i}.jpg" ;',
+        f'    geo1:lat {rng.uniform(-6.37, -6.08)!r} ;',
+        f'    geo1:long {rng.uniform(106.68, 106.97)!r} .',
+        '',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def generate_ttl(path, n_sites, seed=42):
+    """Tulis graph sintetis dengan n_sites TempatIbadah ke path"""
+    rng = random.Random(seed)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('@prefix geo1: <http://www.w3.org/2003/01/geo/wgs84_pos#> .\n'
+                '@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n'
+                '@prefix rel: <http://jakartaharmony.id/religijkt#> .\n'
+                '@prefix schema1: <http://schema.org/> .\n'
+                '@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .\n\n')
+        for i in range(n_sites):
+            f.write(site_ttl(i, rng))
+    os.replace(tmp_path, path)
+
+
+def prepare_data_dir(data_dir, n_sites, seed):
+    """Direktori DATA_DIR untuk satu ukuran; TTL dibuat sekali lalu dipakai ulang"""
+    size_dir = os.path.join(data_dir, f'{size_label(n_sites)}-s{seed}')
+    os.makedirs(size_dir, exist_ok=True)
+    ttl_path = os.path.join(size_dir, 'ReligiJakarta.ttl')
+    if not os.path.exists(ttl_path):
+        print(f"⏳ Membuat data sintetis {n_sites} site di {ttl_path}", file=sys.stderr)
+        generate_ttl(ttl_path, n_sites, seed)
+    return size_dir
+
+
+def reset_state(size_dir, keep_snapshot=False):
+    """Hapus journal/backup (dan snapshot/proyeksi/store SQLite) sisa run sebelumnya"""
+    for name in os.listdir(size_dir):
+        path = os.path.join(size_dir, name)
+        if name == 'ReligiJakarta.ttl' or (keep_snapshot and (
+                name in ('ReligiJakarta.snapshot', 'ReligiJakarta.projection')
+                or name.startswith('ReligiJakarta.sqlite'))):
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+
+# --- STATISTIK ---
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: byte
+    return round(rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024, 1)
+
+
+def summarize(latencies, elapsed=None):
+    """Ringkasan latensi (detik) dalam milidetik"""
+    if not latencies:
+        return {'count': 0}
+    ordered = sorted(latencies)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 3)
+
+    result = {
+        'count': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': pct(50),
+        'p90_ms': pct(90),
+        'p99_ms': pct(99),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+    if elapsed:
+        result['rps'] = round(len(ordered) / elapsed, 1)
+    return result
+
+
+def timed(fn, duration, max_iterations):
+    """Jalankan fn berulang selama `duration` detik (minimal sekali)"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while len(latencies) < max_iterations:
+        start = time.perf_counter()
+        fn(len(latencies))
+        latencies.append(time.perf_counter() - start)
+        if start >= deadline:
+            break
+    return latencies
+
+
+# --- WORKER (proses terpisah per ukuran) ---
+def worker_startup(result_path):
+    start = time.perf_counter()
+    import app
+    startup_s = time.perf_counter() - start
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'startup_s': round(startup_s, 3),
+            'triples': len(app.g),
+            'sites': len(app.site_store),
+            'peak_rss_mb': peak_rss_mb(),
+        }, f)
+
+
+def route_scenarios(rng, site_ids):
+    """(nama, fungsi yang mengembalikan URL) untuk skenario API"""
+    stops = [s.split(' (')[0] for s in STOPS]
+    return [
+        ('api.sites', lambda i: '/api/sites'),
+        ('api.sites.miss', lambda i: f'/api/sites?_={i}'),
+        ('api.sites.page', lambda i: f'/api/sites?limit=50&offset={rng.randint(0, 500)}&sort=-tahun'),
+        ('api.sites.filter', lambda i: f'/api/sites?agama={rng.choice(RELIGIONS)[0]}'
+                                       f'&wilayah={rng.choice(list(REGIONS))}&limit=20'),
+        ('api.sites.q', lambda i: f'/api/sites?q={rng.choice(NAME_WORDS).split()[0]}&limit=20'),
+        ('api.site', lambda i: f'/api/site/{rng.choice(site_ids)}'),
+        ('api.near', lambda i: f'/api/sites/near?lat={rng.uniform(-6.37, -6.08)}'
+                               f'&lng={rng.uniform(106.68, 106.97)}&k=10'),
+        ('api.bbox', lambda i: '/api/sites/bbox?bbox={0},{1},{2},{3}'.format(
+            *(lambda lng, lat: (lng, lat, lng + 0.02, lat + 0.02))(
+                rng.uniform(106.68, 106.95), rng.uniform(-6.37, -6.10)))),
+        ('api.search', lambda i: f'/api/search?q={quote(rng.choice(stops)[:rng.randint(2, 6)])}'),
+        ('api.stats', lambda i: '/api/stats'),
+        ('api.locations', lambda i: '/api/locations'),
+        ('api.calendar', lambda i: '/api/calendar/2025'),
+    ]
+
+
+def run_load(app_module, urls, clients, duration):
+    """Load test: `clients` thread dengan koneksi keep-alive ke server waitress"""
+    from waitress.server import create_server
+
+    server = create_server(app_module.app, host='127.0.0.1', port=0, threads=clients)
+    port = server.effective_port
+    threading.Thread(target=server.run, name='bench-server', daemon=True).start()
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local = []
+        failed = 0
+        while time.perf_counter() < deadline:
+            url = rng.choice(urls)(len(local))
+            start = time.perf_counter()
+            try:
+                conn.request('GET', url, headers={'Accept-Encoding': 'gzip'})
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    print(f"   ⚠️ {response.status} {url}", file=sys.stderr)
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    # Server dibiarkan jalan (thread daemon); proses worker segera selesai
+
+    result = summarize(latencies, elapsed)
+    result.update({'clients': clients, 'duration_s': round(elapsed, 2), 'errors': errors[0]})
+    return result
+
+
+def worker_full(result_path, options):
+    from rdflib import Literal
+
+    start = time.perf_counter()
+    import app
+    startup_s = time.perf_counter() - start
+    rng = random.Random(options['seed'])
+    duration, max_iterations = options['duration'], options['iterations']
+    site_ids = [site['id'] for site in app.site_store.current.all()]
+    selected = options['scenarios']
+    scenarios = {}
+
+    def bench(name, fn):
+        if selected and not any(s in name for s in selected):
+            return
+        scenarios[name] = summarize(timed(fn, duration, max_iterations))
+        print(f"   {name:<32} p50 {scenarios[name]['p50_ms']:>10.3f} ms", file=sys.stderr)
+
+    # Layer graph
+    bench('graph.get_site_from_graph', lambda i: app.get_site_from_graph(rng.choice(site_ids)))
+    bench('graph.get_all_sites_from_graph', lambda i: app.get_all_sites_from_graph())
+    bench('store.rebuild', lambda i: app.site_store.rebuild(app.site_store.version))
+
+    # API lewat test client; buffered=True supaya body response streaming ikut dibaca sampai habis
+    client = app.app.test_client()
+    for name, url in route_scenarios(rng, site_ids):
+        bench(name, lambda i, url=url: client.get(url(i), buffered=True))
+    bench('api.sites.gzip', lambda i: client.get('/api/sites', headers={'Accept-Encoding': 'gzip'}, buffered=True))
+    etag = client.get('/api/sites', buffered=True).headers.get('ETag')
+    bench('api.sites.304', lambda i: client.get('/api/sites', headers={'If-None-Match': etag}, buffered=True))
+
+    # Load test multi-thread
+    load = None
+    if options['load_duration'] > 0:
+        urls = [url for name, url in route_scenarios(rng, site_ids) if name != 'api.sites.miss']
+        load = run_load(app, urls, options['clients'], options['load_duration'])
+        print(f"   load: {load.get('rps')} req/s, p99 {load.get('p99_ms')} ms", file=sys.stderr)
+
+    # Penulisan (paling akhir karena mengubah versi graph dan cache)
+    nama = app.REL.nama
+
+    def edit_site(i):
+        site_uri = app.REL[rng.choice(site_ids)]
+        triples = [t for t in app.g.triples((site_uri, None, None)) if t[1] != nama]
+        triples.append((site_uri, nama, Literal(f'Benchmark {i}')))
+        app.write_site(str(site_uri)[len(app.REL):], triples)
+
+    bench('graph.save_graph', lambda i: app.save_graph(
+        *(([(app.REL.Bench, nama, Literal('x'))], []) if i % 2 == 0 else
+          ([], [(app.REL.Bench, nama, Literal('x'))]))))
+    bench('admin.write_site', edit_site)
+    if options['compact']:
+        bench('graph.compact', lambda i: app.compact_graph())
+
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'startup_warm_s': round(startup_s, 3),
+            'scenarios': scenarios,
+            'load': load,
+            'peak_rss_mb': peak_rss_mb(),
+        }, f)
+
+
+# --- PARENT ---
+def run_worker(size_dir, mode, options=None):
+    fd, result_path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    env = dict(os.environ, DATA_DIR=size_dir, COMPACT_INTERVAL='1e9', COMPACT_EVERY='1000000000',
+               PERSIST_DELAY='1e9', PERSIST_MAX_DELAY='1e9')
+    cmd = [sys.executable, os.path.abspath(__file__), '_worker', mode, result_path,
+           json.dumps(options or {})]
+    try:
+        # Output app (print saat load graph) tidak ikut ke stdout hasil
+        subprocess.run(cmd, env=env, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        with open(result_path, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cmd_run(args):
+    options = {
+        'seed': args.seed,
+        'duration': args.duration,
+        'iterations': args.iterations,
+        'clients': args.clients,
+        'load_duration': args.load_duration,
+        'compact': args.compact,
+        'scenarios': [s for s in (args.scenarios or '').split(',') if s],
+    }
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'graph_store': os.environ.get('GRAPH_STORE', 'memory'),
+            'options': options,
+        },
+        'results': [],
+    }
+    for n_sites in [parse_size(s) for s in args.sizes.split(',')]:
+        size_dir = prepare_data_dir(args.data_dir, n_sites, args.seed)
+        print(f"🚀 Benchmark {size_label(n_sites)} site", file=sys.stderr)
+
+        reset_state(size_dir)
+        cold = run_worker(size_dir, 'startup')
+        print(f"   startup cold {cold['startup_s']} s ({cold['triples']} triples)", file=sys.stderr)
+        reset_state(size_dir, keep_snapshot=True)
+        full = run_worker(size_dir, 'full', options)
+        print(f"   startup warm {full['startup_warm_s']} s", file=sys.stderr)
+        reset_state(size_dir, keep_snapshot=True)
+
+        report['results'].append({
+            'size': size_label(n_sites),
+            'sites': cold['sites'],
+            'triples': cold['triples'],
+            'startup': {'cold_s': cold['startup_s'], 'warm_s': full['startup_warm_s']},
+            'peak_rss_mb': {'startup': cold['peak_rss_mb'], 'full': full['peak_rss_mb']},
+            'scenarios': full['scenarios'],
+            'load': full['load'],
+        })
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"✅ Hasil ditulis ke {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+def _change(before, after):
+    if not before or after is None:
+        return ''
+    return f'{(after - before) / before * 100:+.1f}%'
+
+
+def cmd_compare(args):
+    with open(args.before, encoding='utf-8') as f:
+        before = {r['size']: r for r in json.load(f)['results']}
+    with open(args.after, encoding='utf-8') as f:
+        after = {r['size']: r for r in json.load(f)['results']}
+
+    for size in [s for s in after if s in before]:
+        b, a = before[size], after[size]
+        print(f"== {size} site ==")
+        rows = [('startup.cold_s', b['startup']['cold_s'], a['startup']['cold_s']),
+                ('startup.warm_s', b['startup']['warm_s'], a['startup']['warm_s']),
+                ('peak_rss_mb', b['peak_rss_mb']['full'], a['peak_rss_mb']['full'])]
+        for name in sorted(set(b['scenarios']) & set(a['scenarios'])):
+            for metric in ('p50_ms', 'p99_ms'):
+                rows.append((f'{name}.{metric}', b['scenarios'][name].get(metric),
+                             a['scenarios'][name].get(metric)))
+        if b.get('load') and a.get('load'):
+            for metric in ('rps', 'p50_ms', 'p99_ms'):
+                rows.append((f'load.{metric}', b['load'].get(metric), a['load'].get(metric)))
+        for name, old, new in rows:
+            print(f"{name:<44} {old!s:>12} -> {new!s:>12}  {_change(old, new)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dengan data sintetis')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='Jalankan benchmark')
+    run.add_argument('--sizes', default='1k,10k', help='contoh: 1k,10k,100k,1m')
+    run.add_argument('--output', help='file JSON hasil (default: stdout)')
+    run.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--duration', type=float, default=2.0, help='detik per skenario')
+    run.add_argument('--iterations', type=int, default=1000, help='maksimum iterasi per skenario')
+    run.add_argument('--clients', type=int, default=16, help='thread load test')
+    run.add_argument('--load-duration', type=float, default=10.0, help='detik load test (0 = lewati)')
+    run.add_argument('--scenarios', help='hanya skenario yang namanya memuat salah satu teks ini')
+    run.add_argument('--compact', action='store_true', help='ukur juga compaction TTL (lambat)')
+    run.set_defaults(func=cmd_run)
+
+    gen = sub.add_parser('generate', help='Hanya buat file TTL sintetis')
+    gen.add_argument('sites', type=parse_size)
+    gen.add_argument('path')
+    gen.add_argument('--seed', type=int, default=42)
+    gen.set_defaults(func=lambda a: generate_ttl(a.path, a.sites, a.seed))
+
+    compare = sub.add_parser('compare', help='Bandingkan dua file hasil')
+    compare.add_argument('before')
+    compare.add_argument('after')
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '_worker':
+        mode, result_path, options = sys.argv[2], sys.argv[3], json.loads(sys.argv[4])
+        sys.path.insert(0, ROOT)
+        if mode == 'startup':
+            worker_startup(result_path)
+        else:
+            worker_full(result_path, options)
+    else:
+        main()
@@ -0,0 +1,263 @@
+"""Import/export massal data site: CSV, JSON Lines, dan Turtle.
+
+Baris CSV/JSONL dibaca satu per satu dari stream (file tidak pernah dimuat
+utuh ke memori), diubah menjadi data berbentuk form admin, lalu divalidasi
+dan diterapkan oleh app.import_sites() sebagai satu batch journal. Kolomnya
+sama dengan field site di /api/site/<id>; `latitude`/`longitude` boleh
+diganti satu kolom `koordinat` ("lat, lng") seperti di form admin. Baris
+yang valid ditampung di file sementara (StagedRows) sampai seluruh file
+selesai divalidasi.
+
+Export juga berupa generator sehingga bisa langsung dialirkan ke response
+HTTP atau file tanpa menyusun seluruh isinya di memori.
+
+Pemakaian dari command line (DATA_DIR menentukan dataset yang diubah):
+
+    python bulk_io.py import data.csv
+    python bulk_io.py import data.jsonl --mode insert --dry-run
+    python bulk_io.py export backup.ttl
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+from contextlib import nullcontext, redirect_stdout
+
+FORMATS = ('csv', 'jsonl', 'ttl')
+MIMETYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'ttl': 'text/turtle',
+}
+EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.ttl': 'ttl'}
+
+# Kolom export, urutannya sama dengan proyeksi site di app.py
+EXPORT_FIELDS = (
+    'id', 'nama', 'alamat', 'wilayah', 'kecamatan', 'kode_pos', 'tipe', 'agama',
+    'jam_buka', 'kapasitas', 'luas', 'arsitek', 'tahun_berdiri', 'is_heritage',
+    'heritage_code', 'transport_terdekat', 'latitude', 'longitude', 'gambar_url',
+    'deskripsi'
+)
+TRUE_VALUES = ('true', '1', 'ya', 'yes', 'y')
+FALSE_VALUES = ('false', '0', 'tidak', 'no', 'n', '')
+# Jumlah baris export yang digabung menjadi satu potongan response
+CHUNK_ROWS = 500
+
+
+def detect_format(filename, fmt=None):
+    """Format dari argumen eksplisit atau ekstensi file; ValueError jika tidak dikenal"""
+    if not fmt and filename:
+        fmt = EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+    if fmt not in FORMATS:
+        raise ValueError(f"format harus salah satu dari: {', '.join(FORMATS)}")
+    return fmt
+
+
+def text_stream(binary):
+    """Bungkus stream biner (upload, stdin, file) menjadi teks UTF-8 (BOM Excel diabaikan)"""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def iter_csv(stream):
+    """(nomor baris, dict) untuk setiap baris CSV; baris header dihitung sebagai baris 1"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        if None in row:
+            yield reader.line_num, ValueError('jumlah kolom melebihi header')
+        else:
+            yield reader.line_num, row
+
+
+def iter_jsonl(stream):
+    """(nomor baris, dict) untuk setiap baris JSON Lines; baris kosong dilewati"""
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f'JSON tidak valid: {e}')
+            continue
+        if not isinstance(row, dict):
+            yield line_no, ValueError('setiap baris harus berupa objek JSON')
+        else:
+            yield line_no, row
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value).strip()
+
+
+def row_to_form(row):
+    """Ubah satu baris import menjadi data berbentuk form admin (semua nilai string)"""
+    form = {}
+    for key, value in row.items():
+        key = (key or '').strip()
+        value = _text(value)
+        if key and value:
+            form[key] = value
+
+    lat, lng = form.pop('latitude', None), form.pop('longitude', None)
+    if lat or lng:
+        if not (lat and lng):
+            raise ValueError('latitude dan longitude harus diisi bersamaan')
+        if 'koordinat' in form:
+            raise ValueError('gunakan koordinat atau latitude/longitude, bukan keduanya')
+        form['koordinat'] = f'{lat}, {lng}'
+
+    # Checkbox form admin: ada = true, tidak ada = false
+    heritage = form.pop('is_heritage', '').lower()
+    if heritage in TRUE_VALUES:
+        form['is_heritage'] = '1'
+    elif heritage not in FALSE_VALUES:
+        raise ValueError('is_heritage harus true atau false')
+    return form
+
+
+class StagedRows:
+    """Baris import yang sudah valid, ditampung di file sementara (bukan di memori).
+
+    Di memori hanya ada set ID (untuk validasi duplikat). items() membaca
+    ulang file dan mengubah setiap baris menjadi triple lewat `build(site_id,
+    form)`, sehingga cocok sebagai argumen `changes` untuk app.write_sites().
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.ids = set()
+        self._file = tempfile.TemporaryFile('w+', encoding='utf-8')
+
+    def add(self, site_id, form=None):
+        """Catat ID; form disimpan hanya jika diberikan (tanpa form: cukup validasi duplikat)"""
+        self.ids.add(site_id)
+        if form is not None:
+            self._file.write(json.dumps(form, ensure_ascii=False) + '\n')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, site_id):
+        return site_id in self.ids
+
+    def items(self):
+        self._file.flush()
+        self._file.seek(0)
+        for line in self._file:
+            form = json.loads(line)
+            yield form['id'], self.build(form['id'], form)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _export_row(site):
+    row = {}
+    for field in EXPORT_FIELDS:
+        value = site.get(field)
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        row[field] = value
+    return row
+
+
+def export_csv(sites):
+    """Potongan teks CSV (dengan header) untuk iterable dict site"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, lineterminator='\n')
+    writer.writeheader()
+    for i, site in enumerate(sites, 1):
+        writer.writerow(_export_row(site))
+        if i % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_jsonl(sites):
+    """Potongan teks JSON Lines untuk iterable dict site"""
+    lines = []
+    for site in sites:
+        lines.append(json.dumps(_export_row(site), ensure_ascii=False, separators=(',', ':')))
+        if len(lines) >= CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def print_result(result):
+    errors = result.get('errors')
+    if errors:
+        print(f"❌ {result['invalid_rows']} baris tidak valid, tidak ada yang disimpan:")
+        for error in errors:
+            print(f"   baris {error['line']}: {error['error']}")
+        return
+    action = 'valid (dry run)' if result.get('dry_run') else 'diimport'
+    print(f"✅ {result['rows']} baris {action}: {result['added']} baru, {result['updated']} diperbarui "
+          f"dalam {result['seconds']} detik (versi {result['version']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import/export massal data site')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    imp = sub.add_parser('import', help='Import CSV, JSON Lines, atau Turtle ke graph')
+    imp.add_argument('file', help="file sumber ('-' untuk stdin, wajib dengan --format)")
+    imp.add_argument('--format', choices=FORMATS)
+    imp.add_argument('--mode', choices=('upsert', 'insert'), default='upsert',
+                     help='insert: tolak ID yang sudah ada; upsert: ganti site yang sudah ada')
+    imp.add_argument('--dry-run', action='store_true', help='hanya validasi, tidak menyimpan')
+
+    exp = sub.add_parser('export', help='Export semua site')
+    exp.add_argument('file', help="file tujuan ('-' untuk stdout, wajib dengan --format)")
+    exp.add_argument('--format', choices=FORMATS)
+
+    args = parser.parse_args(argv)
+    try:
+        fmt = detect_format(None if args.file == '-' else args.file, args.format)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Import app di sini: memuat graph dari DATA_DIR. Pesan start-up ke stderr
+    # supaya tidak ikut tercampur dengan data yang dialirkan lewat stdout
+    with redirect_stdout(sys.stderr):
+        import app
+
+    if args.command == 'import':
+        # stdin/stdout milik interpreter: hanya file yang dibuka di sini yang ditutup
+        with nullcontext(sys.stdin.buffer) if args.file == '-' else open(args.file, 'rb') as binary:
+            text = text_stream(binary)
+            try:
+                result = app.import_sites(text, fmt, mode=args.mode, dry_run=args.dry_run)
+            finally:
+                text.detach()  # wrapper yang di-GC ikut menutup stream di bawahnya
+        if not args.dry_run and not result.get('errors'):
+            # Jangan tunggu worker persistence: proses CLI langsung selesai
+            app.persistence.flush_now()
+        print_result(result)
+        return 1 if result.get('errors') else 0
+
+    with nullcontext(sys.stdout) if args.file == '-' else open(args.file, 'w', encoding='utf-8', newline='') as out:
+        for chunk in app.export_sites(fmt):
+            out.write(chunk)
+    if args.file != '-':
+        print(f"✅ {len(app.site_store)} site diexport ke {args.file}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Index acara keagamaan per tanggal untuk /api/calendar dan feed iCalendar.
+
+Acara disimpan di graph sebagai rel:AcaraKeagamaan (nama, tanggal, agama, dan
+rel:lokasi ke TempatIbadah). app.py memproyeksikannya menjadi dict lalu
+membangun EventIndex baru setiap kali ada acara yang berubah; index lama tidak
+pernah diubah sehingga reader tidak perlu lock.
+
+Tanggal disimpan sebagai string ISO (YYYY-MM-DD) yang urutan leksikografisnya
+sama dengan urutan tanggal, jadi rentang tanggal cukup dicari dengan bisect.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+ICAL_PRODID = '-//Jakarta Semantic Harmony//Kalender Religi//ID'
+
+
+def _event_key(event):
+    return (event['date'], event['title'] or '', event['id'])
+
+
+class EventIndex:
+    """Acara terurut per tanggal, ditambah daftar terurut per site"""
+
+    def __init__(self, events=()):
+        self.events = sorted(events, key=_event_key)
+        self.dates = [e['date'] for e in self.events]
+        self.ids = {e['id'] for e in self.events}
+        self._by_site = {}  # site id -> ([acara], [tanggal])
+        for event in self.events:
+            if event['site']:
+                events, dates = self._by_site.setdefault(event['site'], ([], []))
+                events.append(event)
+                dates.append(event['date'])
+
+    def __len__(self):
+        return len(self.events)
+
+    def between(self, start=None, end=None, agama=None, site=None, limit=None):
+        """Acara dengan start <= tanggal <= end (string ISO, inklusif), terurut per tanggal"""
+        if site is not None:
+            events, dates = self._by_site.get(site, ([], []))
+        else:
+            events, dates = self.events, self.dates
+        lo = bisect_left(dates, start) if start else 0
+        hi = bisect_right(dates, end) if end else len(dates)
+        result = []
+        for event in events[lo:hi]:
+            if agama is not None and event['agama'] not in agama:
+                continue
+            result.append(event)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+
+def _ical_text(value):
+    # RFC 5545 3.3.11: escape backslash, titik koma, koma, dan baris baru
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line):
+    """Lipat baris iCalendar menjadi potongan maksimal 75 oktet (RFC 5545 3.1)"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line
+    parts = []
+    while data:
+        size = 75 if not parts else 74  # baris lanjutan diawali satu spasi
+        cut = min(size, len(data))
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1  # jangan memotong di tengah karakter UTF-8
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    return '\r\n '.join(parts)
+
+
+def to_ical(events, calendar_name, domain):
+    """Teks VCALENDAR untuk list acara (dict dengan id, date, title, agama, location).
+
+    Output deterministik untuk data yang sama (DTSTAMP diambil dari tanggal
+    acara), sehingga ETag-nya sama di semua worker.
+    """
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{ICAL_PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_ical_text(calendar_name)}',
+        'X-WR-TIMEZONE:Asia/Jakarta',
+    ]
+    for event in events:
+        day = date.fromisoformat(event['date'])
+        lines += [
+            'BEGIN:VEVENT',
+            f"UID:{event['id']}@{domain}",
+            f'DTSTAMP:{day:%Y%m%d}T000000Z',
+            f'DTSTART;VALUE=DATE:{day:%Y%m%d}',
+            f'DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}',
+            f"SUMMARY:{_ical_text(event['title'])}",
+        ]
+        if event.get('location'):
+            lines.append(f"LOCATION:{_ical_text(event['location'])}")
+        if event.get('agama'):
+            lines.append(f"CATEGORIES:{_ical_text(event['agama'])}")
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return ''.join(_fold(line) + '\r\n' for line in lines)
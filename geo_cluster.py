@@ -0,0 +1,220 @@
+"""Cluster site per level zoom untuk peta (tile Web Mercator 256 px).
+
+Setiap tile dibagi menjadi sel CELL_PX piksel (4x4 sel per tile) dan site
+di sel yang sama digabung menjadi satu cluster. Karena sel sejajar dengan
+batas tile, satu tile bisa dihitung dan di-cache sendiri, dan satu layar
+peta (belasan tile) tidak pernah berisi lebih dari beberapa ratus fitur.
+Di atas MAX_CLUSTER_ZOOM setiap site tampil sendiri.
+
+ClusterIndex menyimpan piramida sel untuk zoom 0..MAX_CLUSTER_ZOOM:
+{(kolom, baris): (jumlah, total lat, total lng)}. Nilai sel bisa ditambah
+dan dikurangi, jadi index diperbarui per site seperti index lain di
+SiteSnapshot; sel zoom z adalah gabungan empat sel anaknya di zoom z+1.
+"""
+import math
+
+from sharded import ShardedDict
+
+TILE_SIZE = 256
+CELL_PX = 64
+CELL_SHIFT = 2  # log2(TILE_SIZE / CELL_PX)
+MAX_CLUSTER_ZOOM = 16
+MAX_ZOOM = 22
+MAX_LAT = 85.05112878  # batas lintang Web Mercator
+_FINEST = MAX_CLUSTER_ZOOM + CELL_SHIFT
+_EDGE = 1 - 1e-12
+_RAD = math.pi / 180
+_INV_4PI = 1 / (4 * math.pi)
+
+
+def project(lat, lng):
+    """Koordinat Web Mercator ternormalisasi (x, y) di [0, 1); y bertambah ke selatan"""
+    # Dipanggil untuk setiap site saat membangun tile; tanpa min()/max() supaya murah
+    if lat > MAX_LAT:
+        lat = MAX_LAT
+    elif lat < -MAX_LAT:
+        lat = -MAX_LAT
+    s = math.sin(lat * _RAD)
+    x = (lng + 180.0) / 360.0
+    y = 0.5 - math.log((1 + s) / (1 - s)) * _INV_4PI
+    if not 0.0 <= x < 1.0:
+        x = 0.0 if x < 0.0 else _EDGE
+    if not 0.0 <= y < 1.0:
+        y = 0.0 if y < 0.0 else _EDGE
+    return x, y
+
+
+def unproject(x, y):
+    """Kebalikan project(): (lat, lng)"""
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y)))), x * 360.0 - 180.0
+
+
+def tile_bounds(z, x, y):
+    """(min_lat, min_lng, max_lat, max_lng) tile z/x/y"""
+    n = 1 << z
+    max_lat, min_lng = unproject(x / n, y / n)
+    min_lat, max_lng = unproject((x + 1) / n, (y + 1) / n)
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def tile_of(lat, lng, z):
+    """(x, y) tile zoom z yang memuat titik"""
+    x, y = project(lat, lng)
+    n = 1 << z
+    return int(x * n), int(y * n)
+
+
+def tiles_in_bbox(z, min_lat, min_lng, max_lat, max_lng):
+    """Tile zoom z yang beririsan dengan bounding box, terurut (x, y)"""
+    x0, y0 = tile_of(max_lat, min_lng, z)
+    x1, y1 = tile_of(min_lat, max_lng, z)
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def finest_cell(lat, lng):
+    """Sel titik di MAX_CLUSTER_ZOOM; sel zoom z = sel ini >> (MAX_CLUSTER_ZOOM - z)"""
+    x, y = project(lat, lng)
+    n = 1 << _FINEST
+    return int(x * n), int(y * n)
+
+
+def cell_tile(cell, z):
+    """Tile zoom z (<= MAX_CLUSTER_ZOOM + CELL_SHIFT) yang memuat sel finest_cell()"""
+    shift = _FINEST - z
+    return cell[0] >> shift, cell[1] >> shift
+
+
+def cell_bounds(z, cell):
+    """(min_lat, min_lng, max_lat, max_lng) sel zoom z"""
+    return tile_bounds(z + CELL_SHIFT, *cell)
+
+
+def _merge(level, key, count, sum_lat, sum_lng):
+    old = level.get(key)
+    if old is not None:
+        count, sum_lat, sum_lng = old[0] + count, old[1] + sum_lat, old[2] + sum_lng
+    if count:
+        level[key] = (count, sum_lat, sum_lng)
+    else:
+        del level[key]
+
+
+def _expansion_zoom(z, min_cell, max_cell):
+    """Zoom pertama di atas z tempat sel terkecil..terbesar (sel MAX_CLUSTER_ZOOM) terpisah"""
+    for zoom in range(z + 1, MAX_CLUSTER_ZOOM + 1):
+        shift = MAX_CLUSTER_ZOOM - zoom
+        if (min_cell[0] >> shift, min_cell[1] >> shift) != (max_cell[0] >> shift, max_cell[1] >> shift):
+            return zoom
+    return MAX_CLUSTER_ZOOM + 1
+
+
+class ClusterIndex:
+    """Piramida sel cluster per zoom; lihat docstring modul"""
+
+    def __init__(self):
+        self.levels = [ShardedDict() for _ in range(MAX_CLUSTER_ZOOM + 1)]
+
+    @classmethod
+    def build(cls, sites):
+        """Index untuk semua site: sel zoom tertinggi dulu, lalu digabung ke atas"""
+        index = cls()
+        index.levels = [{} for _ in index.levels]
+        finest = index.levels[MAX_CLUSTER_ZOOM]
+        for site in sites:
+            lat, lng = site.get('latitude'), site.get('longitude')
+            if lat is not None and lng is not None:
+                _merge(finest, finest_cell(lat, lng), 1, lat, lng)
+        for z in range(MAX_CLUSTER_ZOOM - 1, -1, -1):
+            level = index.levels[z]
+            for (cx, cy), value in index.levels[z + 1].items():
+                _merge(level, (cx >> 1, cy >> 1), *value)
+        index.levels = [ShardedDict(level) for level in index.levels]
+        return index
+
+    def copy(self):
+        """Salinan untuk snapshot berikutnya; nilai sel berupa tuple, jadi cukup salin ShardedDict"""
+        clone = ClusterIndex()
+        clone.levels = [level.copy() for level in self.levels]
+        return clone
+
+    def _update(self, site, sign):
+        lat, lng = site.get('latitude'), site.get('longitude')
+        if lat is None or lng is None:
+            return
+        cx, cy = finest_cell(lat, lng)
+        for z in range(MAX_CLUSTER_ZOOM, -1, -1):
+            _merge(self.levels[z], (cx, cy), sign, sign * lat, sign * lng)
+            cx, cy = cx >> 1, cy >> 1
+
+    def add(self, site):
+        self._update(site, 1)
+
+    def remove(self, site):
+        self._update(site, -1)
+
+    def _descend(self, z, cell):
+        """(zoom tempat sel terpecah, sel terakhir sebelum terpecah)"""
+        while z < MAX_CLUSTER_ZOOM:
+            cx, cy = cell
+            level = self.levels[z + 1]
+            children = [child for child in ((2 * cx, 2 * cy), (2 * cx + 1, 2 * cy),
+                                            (2 * cx, 2 * cy + 1), (2 * cx + 1, 2 * cy + 1))
+                        if child in level]
+            z += 1
+            if len(children) > 1:
+                return z, cell
+            cell = children[0]
+        return MAX_CLUSTER_ZOOM + 1, cell
+
+    def tile(self, z, x, y):
+        """Sel tile z/x/y (z <= MAX_CLUSTER_ZOOM): list (jumlah, lat, lng, zoom ekspansi, sel).
+
+        Untuk sel berisi satu site, `sel` adalah selnya di MAX_CLUSTER_ZOOM
+        (untuk mencari ID site lewat GeoIndex); selain itu None.
+        """
+        level = self.levels[z]
+        result = []
+        for cx in range(x << CELL_SHIFT, (x + 1) << CELL_SHIFT):
+            for cy in range(y << CELL_SHIFT, (y + 1) << CELL_SHIFT):
+                value = level.get((cx, cy))
+                if value is None:
+                    continue
+                count, sum_lat, sum_lng = value
+                zoom, cell = self._descend(z, (cx, cy))
+                result.append((count, sum_lat / count, sum_lng / count, zoom,
+                               cell if count == 1 else None))
+        return result
+
+
+def cluster_points(points, z):
+    """Cluster list (site_id, lat, lng, finest_cell) di satu tile zoom z tanpa index.
+
+    Mengembalikan list (jumlah, lat, lng, zoom ekspansi, site_id) dengan
+    site_id hanya untuk sel berisi satu site; dipakai untuk peta terfilter.
+    """
+    shift = MAX_CLUSTER_ZOOM - z
+    cells = {}
+    for site_id, lat, lng, (cx, cy) in points:
+        key = (cx >> shift, cy >> shift)
+        entry = cells.get(key)
+        if entry is None:
+            cells[key] = [1, lat, lng, cx, cy, cx, cy, site_id]
+            continue
+        entry[0] += 1
+        entry[1] += lat
+        entry[2] += lng
+        if cx < entry[3]:
+            entry[3] = cx
+        elif cx > entry[5]:
+            entry[5] = cx
+        if cy < entry[4]:
+            entry[4] = cy
+        elif cy > entry[6]:
+            entry[6] = cy
+    result = []
+    for key in sorted(cells):
+        count, sum_lat, sum_lng, min_x, min_y, max_x, max_y, site_id = cells[key]
+        result.append((count, sum_lat / count, sum_lng / count,
+                       _expansion_zoom(z, (min_x, min_y), (max_x, max_y)),
+                       site_id if count == 1 else None))
+    return result
@@ -0,0 +1,171 @@
+"""Index spasial grid untuk koordinat site (geo:lat / geo:long).
+
+Setiap site dimasukkan ke satu sel grid berukuran CELL_DEG derajat. Query
+bounding box hanya membaca sel yang beririsan dengan kotak, dan pencarian
+tetangga terdekat memeriksa sel secara melingkar dari titik pusat sampai
+tidak mungkin lagi ada site yang lebih dekat.
+"""
+import heapq
+import math
+
+from sharded import ShardedDict
+
+# ~1.1 km di sekitar Jakarta; cukup kecil untuk pan di level kota
+CELL_DEG = 0.01
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEG = math.pi * EARTH_RADIUS_M / 180
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Jarak dua titik dalam meter"""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell(lat, lng):
+    return (math.floor(lat / CELL_DEG), math.floor(lng / CELL_DEG))
+
+
+class GeoIndex:
+    """Grid bucket: sel (baris, kolom) -> {site_id: (lat, lng)}; `cells` dan `points` berupa ShardedDict"""
+
+    def __init__(self):
+        self.cells = ShardedDict()
+        self.points = ShardedDict()
+        self._bounds = None
+        self._owned = None  # None = semua bucket milik index ini
+
+    def copy(self):
+        """Salinan murah: bucket sel baru disalin saat pertama kali diubah"""
+        clone = GeoIndex()
+        clone.cells = self.cells.copy()
+        clone.points = self.points.copy()
+        clone._bounds = list(self._bounds) if self._bounds else None
+        clone._owned = set()
+        return clone
+
+    def build(self, sites):
+        """Isi index baru; diisi dengan dict biasa lalu dibagi ke shard sekaligus"""
+        self.cells, self.points = {}, {}
+        for site in sites:
+            self.add(site)
+        self.cells = ShardedDict(self.cells)
+        self.points = ShardedDict(self.points)
+
+    def _bucket(self, cell):
+        bucket = self.cells.get(cell)
+        if self._owned is not None and cell not in self._owned:
+            bucket = self.cells[cell] = dict(bucket or {})
+            self._owned.add(cell)
+        elif bucket is None:
+            bucket = self.cells[cell] = {}
+        return bucket
+
+    def add(self, site):
+        lat, lng = site.get('latitude'), site.get('longitude')
+        if lat is None or lng is None:
+            return
+        cell = _cell(lat, lng)
+        self._bucket(cell)[site['id']] = (lat, lng)
+        self.points[site['id']] = (lat, lng)
+        # Batas sel yang pernah terisi, dipakai untuk menghentikan pencarian ring
+        if self._bounds is None:
+            self._bounds = [cell[0], cell[0], cell[1], cell[1]]
+        else:
+            b = self._bounds
+            b[0], b[1] = min(b[0], cell[0]), max(b[1], cell[0])
+            b[2], b[3] = min(b[2], cell[1]), max(b[3], cell[1])
+
+    def remove(self, site):
+        point = self.points.pop(site['id'], None)
+        if point is None:
+            return
+        cell = _cell(*point)
+        if cell in self.cells:
+            bucket = self._bucket(cell)
+            bucket.pop(site['id'], None)
+            if not bucket:
+                del self.cells[cell]
+
+    def __len__(self):
+        return len(self.points)
+
+    def within(self, min_lat, min_lng, max_lat, max_lng):
+        """ID site di dalam bounding box"""
+        lo_row, lo_col = _cell(min_lat, min_lng)
+        hi_row, hi_col = _cell(max_lat, max_lng)
+        span = (hi_row - lo_row + 1) * (hi_col - lo_col + 1)
+        if span > len(self.cells):
+            # Kotak sangat besar: lebih murah memeriksa sel yang terisi saja
+            buckets = (bucket for (row, col), bucket in self.cells.items()
+                       if lo_row <= row <= hi_row and lo_col <= col <= hi_col)
+        else:
+            buckets = (self.cells[(row, col)]
+                       for row in range(lo_row, hi_row + 1)
+                       for col in range(lo_col, hi_col + 1)
+                       if (row, col) in self.cells)
+        result = []
+        for bucket in buckets:
+            for site_id, (lat, lng) in bucket.items():
+                if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                    result.append(site_id)
+        return result
+
+    def nearest(self, lat, lng, k=None, radius=None):
+        """List (jarak_m, site_id) terurut, dibatasi k hasil dan/atau radius meter"""
+        if not self.cells or (k is None and radius is None):
+            return []
+        row, col = _cell(lat, lng)
+        # Jarak minimum per ring: sisi sel terpendek (arah bujur menyusut dengan cos(lat))
+        cell_m = CELL_DEG * METERS_PER_DEG * max(math.cos(math.radians(min(abs(lat) + 1, 89.9))), 1e-6)
+        b = self._bounds
+        max_ring = max(abs(row - b[0]), abs(row - b[1]), abs(col - b[2]), abs(col - b[3]))
+        # Ring sebelum menyentuh area yang pernah terisi pasti kosong
+        ring = max(0, row - b[1], b[0] - row, col - b[3], b[2] - col)
+
+        heap = []  # max-heap (jarak negatif) berisi k kandidat terbaik
+        if 8 * max_ring * (max_ring - ring + 1) > 4 * len(self.points):
+            # Titik jauh dari data: memeriksa semua titik lebih murah daripada ring
+            self._push_all(heap, self.points.items(), lat, lng, k, radius)
+            return sorted((-neg, site_id) for neg, site_id in heap)
+
+        while ring <= max_ring:
+            floor_m = (ring - 1) * cell_m if ring > 0 else 0.0
+            if radius is not None and floor_m > radius:
+                break
+            if k is not None and len(heap) >= k and floor_m > -heap[0][0]:
+                break
+            for cell in self._ring_cells(row, col, ring):
+                bucket = self.cells.get(cell)
+                if bucket:
+                    self._push_all(heap, bucket.items(), lat, lng, k, radius)
+            ring += 1
+        return sorted((-neg, site_id) for neg, site_id in heap)
+
+    @staticmethod
+    def _push_all(heap, points, lat, lng, k, radius):
+        for site_id, (plat, plng) in points:
+            dist = haversine_m(lat, lng, plat, plng)
+            if radius is not None and dist > radius:
+                continue
+            if k is None:
+                heap.append((-dist, site_id))
+            elif len(heap) < k:
+                heapq.heappush(heap, (-dist, site_id))
+            elif dist < -heap[0][0]:
+                heapq.heapreplace(heap, (-dist, site_id))
+
+    @staticmethod
+    def _ring_cells(row, col, ring):
+        if ring == 0:
+            yield (row, col)
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield (row - ring, c)
+            yield (row + ring, c)
+        for r in range(row - ring + 1, row + ring):
+            yield (r, col - ring)
+            yield (r, col + ring)
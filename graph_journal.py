@@ -0,0 +1,302 @@
+"""Write-ahead journal untuk perubahan RDF graph.
+
+Setiap perubahan admin ditulis sebagai satu batch baris N-Triples lalu
+di-fsync, tanpa menyerialisasi ulang seluruh graph:
+
+    # base 12
+    - <s> <p> "lama" .
+    + <s> <p> "baru" .
+    = 13 2026-01-01T10:00:00
+
+Baris `+`/`-` adalah triple yang ditambah/dihapus, dan baris `=` menutup
+batch dengan nomor versinya. Batch tanpa baris `=` (misalnya karena proses
+mati di tengah penulisan) diabaikan saat replay. Baris `# base` mencatat
+versi graph yang sudah tersimpan di file TTL saat compaction terakhir.
+
+Journal yang sama dipakai bersama oleh beberapa proses worker: penulisan
+memegang lock file antar-proses, dan worker lain membaca batch baru lewat
+tail() tanpa harus mem-parse ulang seluruh graph.
+"""
+import os
+import threading
+from datetime import datetime
+from itertools import chain
+
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
+from rdflib.plugins.serializers.nt import _nt_row
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Batch terakhir yang tetap disimpan setelah compaction, supaya worker yang
+# sedikit tertinggal masih bisa mengejar lewat tail() tanpa reload penuh
+KEEP_AFTER_COMPACT = 100
+
+
+class InterProcessLock:
+    """Lock eksklusif berbasis file, re-entrant di dalam satu proses"""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, blocking=True):
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if self._depth == 0:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            except OSError:
+                os.close(fd)
+                self._thread_lock.release()
+                if blocking:
+                    raise
+                return False
+            self._fd = fd
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class _TripleSink:
+    def __init__(self):
+        self.triples = []
+
+    def triple(self, s, p, o):
+        self.triples.append((s, p, o))
+
+
+def _parse_row(parser, sink, row):
+    sink.triples.clear()
+    parser.parsestring(row)
+    return sink.triples[0]
+
+
+def _file_identity(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class GraphJournal:
+    """Journal append-only di samping file TTL"""
+
+    def __init__(self, path):
+        self.path = path
+        self.base_version = 0
+        self.version = 0
+        self.entries = 0
+        self._offset = 0
+        self._seen = None
+        self._lock = threading.Lock()
+        self.exclusive = InterProcessLock(path + '.lock')
+
+    def read_batches(self, start=0):
+        """Baca (base_version, [(versi, added, removed, waktu), ...], ukuran_valid)
+
+        Pembacaan dimulai dari posisi byte `start` (baris `# base` hanya ada di
+        awal file). `ukuran_valid` adalah posisi byte setelah batch lengkap
+        terakhir.
+        """
+        base_version = 0
+        batches = []
+        valid_size = start
+        if not os.path.exists(self.path):
+            return base_version, batches, 0
+
+        sink = _TripleSink()
+        parser = W3CNTriplesParser(sink)
+        added, removed = [], []
+        offset = start
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break  # baris terakhir terpotong
+                offset += len(raw)
+                tag, _, rest = raw.decode('utf-8').partition(' ')
+                if tag == '#':
+                    if rest.startswith('base '):
+                        base_version = int(rest.split()[1])
+                        valid_size = offset
+                elif tag == '+':
+                    added.append(_parse_row(parser, sink, rest))
+                elif tag == '-':
+                    removed.append(_parse_row(parser, sink, rest))
+                elif tag == '=':
+                    version, _, stamp = rest.strip().partition(' ')
+                    batches.append((int(version), added, removed, stamp))
+                    added, removed = [], []
+                    valid_size = offset
+        return base_version, batches, valid_size
+
+    def read_base_version(self):
+        """Versi graph yang tersimpan di file TTL (dari baris `# base`)"""
+        if not os.path.exists(self.path):
+            return self.base_version
+        with open(self.path, 'rb') as f:
+            first = f.readline().decode('utf-8')
+        if first.startswith('# base ') and first.endswith('\n'):
+            return int(first.split()[2])
+        return self.base_version
+
+    def replay(self, graph, since=None):
+        """Terapkan semua batch journal ke graph (dipanggil setelah parse TTL)
+
+        Aman walaupun sebagian batch sudah ada di TTL: hasil akhirnya sama.
+        `since`: versi yang sudah ada di graph (store persisten); batch sampai
+        versi itu dilewati.
+        """
+        with self._lock, self.exclusive:
+            base_version, batches, valid_size = self.read_batches()
+            if os.path.exists(self.path) and os.path.getsize(self.path) > valid_size:
+                # Buang batch yang tidak lengkap supaya append berikutnya tidak tercampur
+                os.truncate(self.path, valid_size)
+            # Batch <= base sudah ada di TTL (hanya disimpan untuk tail() worker lain)
+            batches = [b for b in batches if b[0] > base_version]
+            applied = [b for b in batches if since is None or b[0] > since]
+            for _, added, removed, _ in applied:
+                for triple in removed:
+                    graph.remove(triple)
+                for triple in added:
+                    graph.add(triple)
+            self.base_version = base_version
+            self.version = max([base_version] + [b[0] for b in batches])
+            self.entries = len(batches)
+            self._offset = valid_size
+            self._seen = _file_identity(self.path)
+        return len(applied)
+
+    def changed_on_disk(self):
+        """True jika file journal berubah sejak terakhir dibaca/ditulis proses ini"""
+        return _file_identity(self.path) != self._seen
+
+    def tail(self):
+        """Batch baru dari proses lain sejak versi yang sudah diterapkan di sini.
+
+        Mengembalikan list batch (bisa kosong), atau None jika ada batch yang
+        sudah dibuang oleh compaction sehingga graph harus dimuat ulang.
+        """
+        with self._lock:
+            identity = _file_identity(self.path)
+            if identity is None or identity == self._seen:
+                return []
+            base_version = self.read_base_version()
+            rewritten = (self._seen is None or identity[0] != self._seen[0]
+                         or base_version != self.base_version or identity[1] < self._offset)
+            file_base, batches, valid_size = self.read_batches(0 if rewritten else self._offset)
+            new = [b for b in batches if b[0] > self.version]
+            if new and new[0][0] != self.version + 1:
+                return None
+            if rewritten and not new and file_base > self.version:
+                return None
+
+            if rewritten:
+                self.base_version = file_base
+                self.entries = sum(1 for b in batches if b[0] > file_base)
+            else:
+                self.entries += len(new)
+            if new:
+                self.version = new[-1][0]
+            self._offset = valid_size
+            if valid_size == identity[1]:
+                self._seen = identity
+            return new
+
+    def append(self, added, removed):
+        """Tulis satu batch perubahan dan fsync; mengembalikan versi barunya.
+
+        Pemanggil sebaiknya memegang `exclusive` dan sudah menerapkan tail()
+        supaya nomor versi tidak bentrok dengan proses lain.
+        """
+        return self.append_rows(chain((('-', t) for t in removed), (('+', t) for t in added)))
+
+    def append_rows(self, rows):
+        """Seperti append(), dengan baris ('+' atau '-', triple) yang diambil bertahap.
+
+        `rows` boleh generator yang menghitung perubahan sambil ditulis (import
+        massal), jadi seluruh batch tidak perlu ada di memori. Jika generator
+        gagal, batch yang setengah tertulis dibuang.
+        """
+        with self._lock, self.exclusive:
+            version = self.version + 1
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, 'a', encoding='utf-8', newline='\n') as f:
+                if new_file:
+                    f.write(f'# base {self.base_version}\n')
+                start = f.tell()
+                try:
+                    # Baris ditulis bertahap (batch import massal bisa jutaan triple)
+                    f.writelines(f'{tag} {_nt_row(t)}' for tag, t in rows)
+                    f.write(f'= {version} {datetime.now().isoformat(timespec="seconds")}\n')
+                    f.flush()
+                except BaseException:
+                    # Jangan tinggalkan batch setengah jadi untuk append berikutnya
+                    f.truncate(start)
+                    raise
+                os.fsync(f.fileno())
+                self._offset = f.tell()
+
+            self.version = version
+            self.entries += 1
+            self._seen = _file_identity(self.path)
+            return version
+
+    def truncate(self, upto_version):
+        """Tandai batch sampai upto_version sudah masuk ke file TTL.
+
+        Batch lama dibuang kecuali KEEP_AFTER_COMPACT batch terakhir.
+        """
+        with self._lock, self.exclusive:
+            file_base, batches, _ = self.read_batches()
+            if upto_version <= file_base:
+                return  # proses lain sudah compaction ke versi yang sama atau lebih baru
+            remaining = [b for i, b in enumerate(batches)
+                         if b[0] > upto_version or i >= len(batches) - KEEP_AFTER_COMPACT]
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+                f.write(f'# base {upto_version}\n')
+                for version, added, removed, stamp in remaining:
+                    f.write(''.join(f'- {_nt_row(t)}' for t in removed))
+                    f.write(''.join(f'+ {_nt_row(t)}' for t in added))
+                    f.write(f'= {version} {stamp}\n')
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            os.replace(tmp_path, self.path)
+            self.base_version = upto_version
+            self.entries = sum(1 for b in remaining if b[0] > upto_version)
+            if self.version == max([upto_version] + [b[0] for b in batches]):
+                self._offset = size
+                self._seen = _file_identity(self.path)
@@ -0,0 +1,143 @@
+"""Snapshot biner RDF graph untuk start-up cepat.
+
+Parsing Turtle lambat untuk graph besar, jadi setiap compaction juga menulis
+snapshot biner: tabel term yang sudah di-intern lalu array triple berisi
+indeks term (uint32). File dibaca lewat mmap sehingga array triple tidak
+perlu disalin atau di-parse.
+
+Layout file (little-endian):
+
+    header     MAGIC, versi graph, jumlah namespace, jumlah term, jumlah triple
+    namespace  (panjang prefix u16, panjang URI u32, prefix, URI) * n
+    term       (jenis u8, panjang lang u16, datatype u32, panjang nilai u32,
+                lang, nilai) * n; datatype = indeks term + 1, 0 jika tidak ada
+    padding    sampai kelipatan 4 byte
+    triple     (s, p, o) uint32 * jumlah triple
+
+File TTL tetap menjadi format utama untuk ekspor dan cadangan jika snapshot
+tidak ada, rusak, atau lebih lama dari TTL.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from rdflib import BNode, Literal, URIRef
+
+MAGIC = b'RJSNAP01'
+HEADER = struct.Struct('<8sQIII')
+NAMESPACE = struct.Struct('<HI')
+TERM = struct.Struct('<BHII')
+
+KIND_URI, KIND_BNODE, KIND_LITERAL = 0, 1, 2
+
+
+def write_snapshot(graph, path, version):
+    """Tulis graph ke file snapshot (atomic lewat file sementara)"""
+    index = {}
+    term_blobs = []
+
+    def intern(term):
+        i = index.get(term)
+        if i is not None:
+            return i
+        if isinstance(term, Literal):
+            datatype = intern(term.datatype) + 1 if term.datatype is not None else 0
+            lang = (term.language or '').encode('utf-8')
+            kind = KIND_LITERAL
+        else:
+            datatype, lang = 0, b''
+            kind = KIND_BNODE if isinstance(term, BNode) else KIND_URI
+        value = str(term).encode('utf-8')
+        term_blobs.append(TERM.pack(kind, len(lang), datatype, len(value)) + lang + value)
+        i = index[term] = len(term_blobs) - 1
+        return i
+
+    triples = array('I')
+    for s, p, o in graph:
+        triples.append(intern(s))
+        triples.append(intern(p))
+        triples.append(intern(o))
+    if sys.byteorder == 'big':
+        triples.byteswap()
+
+    namespaces = [(prefix.encode('utf-8'), str(uri).encode('utf-8'))
+                  for prefix, uri in graph.namespaces()]
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'  # beberapa worker bisa menulis bersamaan
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, version, len(namespaces), len(term_blobs), len(triples) // 3))
+        for prefix, uri in namespaces:
+            f.write(NAMESPACE.pack(len(prefix), len(uri)) + prefix + uri)
+        f.write(b''.join(term_blobs))
+        f.write(b'\0' * (-f.tell() % 4))
+        f.write(triples.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(graph, path):
+    """Isi graph dari file snapshot; mengembalikan versi graph di header"""
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, ns_count, term_count, triple_count = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} bukan file snapshot')
+        offset = HEADER.size
+
+        for _ in range(ns_count):
+            prefix_len, uri_len = NAMESPACE.unpack_from(mm, offset)
+            offset += NAMESPACE.size
+            prefix = mm[offset:offset + prefix_len].decode('utf-8')
+            offset += prefix_len
+            graph.bind(prefix, URIRef(mm[offset:offset + uri_len].decode('utf-8')), override=False)
+            offset += uri_len
+
+        terms = []
+        for _ in range(term_count):
+            kind, lang_len, datatype, value_len = TERM.unpack_from(mm, offset)
+            offset += TERM.size
+            lang = mm[offset:offset + lang_len].decode('utf-8') if lang_len else None
+            offset += lang_len
+            value = mm[offset:offset + value_len].decode('utf-8')
+            offset += value_len
+            if kind == KIND_LITERAL:
+                terms.append(Literal(value, lang=lang,
+                                     datatype=terms[datatype - 1] if datatype else None))
+            elif kind == KIND_BNODE:
+                terms.append(BNode(value))
+            else:
+                terms.append(URIRef(value))
+
+        offset += -offset % 4
+        end = offset + triple_count * 12
+        if end > len(mm):
+            raise ValueError(f'{path} terpotong')
+        view = memoryview(mm)[offset:end]
+        if sys.byteorder == 'big':
+            ids = array('I', view)
+            ids.byteswap()
+        else:
+            ids = view.cast('I')
+        try:
+            graph.addN((terms[ids[i]], terms[ids[i + 1]], terms[ids[i + 2]], graph)
+                       for i in range(0, triple_count * 3, 3))
+        finally:
+            if isinstance(ids, memoryview):
+                ids.release()
+            view.release()
+        return version
+    finally:
+        mm.close()
+
+
+def snapshot_is_fresh(snapshot_path, ttl_path):
+    """True jika snapshot ada dan tidak lebih lama dari file TTL"""
+    if not os.path.exists(snapshot_path):
+        return False
+    if not os.path.exists(ttl_path):
+        return True
+    return os.path.getmtime(snapshot_path) >= os.path.getmtime(ttl_path)
@@ -0,0 +1,140 @@
+"""Metrik aplikasi dalam format teks Prometheus (endpoint /metrics).
+
+Hanya struktur kecil yang dibutuhkan aplikasi ini: Histogram dan metrik
+callback yang nilainya dibaca saat di-scrape (ukuran graph, hit cache,
+counter yang disimpan objek lain; kind='counter').
+Mencatat satu observasi cukup satu bisect dan beberapa penjumlahan di bawah
+lock, sehingga overhead per request bisa diabaikan.
+
+Setiap proses worker punya metriknya sendiri; semua seri diberi label
+`worker` (PID) supaya hasil scrape dari worker berbeda tidak tercampur.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Bucket default (detik), cocok untuk latensi request dan operasi graph
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{_escape(v)}"' for n, v in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Histogram dengan bucket tetap per kombinasi label"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label -> [hitungan per bucket (+Inf terakhir), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        result = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                result.append((self.name + '_bucket', key + (_format_value(float(bound)),), cumulative))
+            result.append((self.name + '_sum', key, total))
+            result.append((self.name + '_count', key, cumulative))
+        return result
+
+    def label_names(self, sample_name):
+        return self.labels + ('le',) if sample_name.endswith('_bucket') else self.labels
+
+
+class Callback:
+    """Gauge/counter yang nilainya diambil dari fungsi saat scrape.
+
+    `collect()` mengembalikan angka, atau list (nilai label..., angka).
+    """
+
+    def __init__(self, name, help, collect, labels=(), kind='gauge'):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.kind = kind
+        self._collect = collect
+
+    def samples(self):
+        value = self._collect()
+        if not self.labels:
+            return [(self.name, (), value)]
+        return [(self.name, tuple(row[:-1]), row[-1]) for row in value]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name, help, collect, labels=(), kind='gauge'):
+        return self.register(Callback(name, help, collect, labels, kind))
+
+    def render(self):
+        """Semua metrik dalam format teks Prometheus"""
+        worker = (('worker', os.getpid()),)
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:  # metrik callback tidak boleh menggagalkan scrape
+                lines.append(f'# {metric.name} gagal dibaca: {e}')
+                continue
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, values, value in samples:
+                names = metric.label_names(name) if hasattr(metric, 'label_names') else metric.labels
+                lines.append(f'{name}{_format_labels(names, values, worker)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
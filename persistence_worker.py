@@ -0,0 +1,138 @@
+"""Worker latar belakang yang menulis graph lengkap ke file TTL.
+
+Perubahan admin sudah tahan crash begitu batch journal di-fsync (lihat
+graph_journal.py). Menulis ulang TTL lengkap (plus backup dan snapshot)
+sebanding dengan ukuran graph, jadi tidak pernah dilakukan di dalam request:
+request cukup memanggil request(). Worker menunggu sampai permintaan
+berhenti datang selama `delay` detik (paling lama `max_delay` detik sejak
+permintaan pertama), lalu menulis sekali untuk seluruh rentetan perubahan
+itu. Tanpa permintaan, worker tetap menulis setiap `interval` detik; fungsi
+`flush` sendiri yang memutuskan apakah ada yang perlu ditulis.
+
+Hanya satu penulisan berjalan pada satu waktu per proses (worker, atau
+flush_now() dari CLI/shutdown). status() dipakai dashboard admin.
+"""
+import threading
+import time
+from datetime import datetime
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class PersistenceWorker:
+    """Thread penulis TTL dengan penggabungan permintaan; lihat docstring modul.
+
+    `flush(wait)` menulis graph dan mengembalikan True jika ada yang ditulis;
+    dengan wait=False boleh langsung kembali jika proses lain sedang menulis.
+    """
+
+    def __init__(self, flush, delay=2.0, max_delay=30.0, interval=300.0):
+        self._flush = flush
+        self.delay = delay
+        self.max_delay = max_delay
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._flushing = False
+        self._first_request = None  # monotonic, permintaan pertama yang belum dilayani
+        self._last_request = None
+        self._requested_at = None  # waktu dinding untuk status()
+        self._next_periodic = time.monotonic() + interval
+        self.flushes = 0
+        self.last_flush = None
+        self.last_error = None
+
+    def start(self, name='ttl-persistence'):
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def request(self, now=False):
+        """Minta penulisan; beberapa permintaan berdekatan digabung jadi satu (now=True: tanpa jeda)"""
+        with self._cond:
+            mono = time.monotonic()
+            if self._first_request is None:
+                self._first_request = mono
+                self._requested_at = _now()
+            self._last_request = mono - self.delay if now else mono
+            self._cond.notify_all()
+
+    def _due(self, mono):
+        """Detik sampai penulisan berikutnya boleh dimulai (<= 0: sekarang)"""
+        if self._first_request is None:
+            return self._next_periodic - mono
+        return min(self._last_request + self.delay, self._first_request + self.max_delay) - mono
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    wait = self._due(time.monotonic())
+                    if wait <= 0 and not self._flushing:
+                        break
+                    self._cond.wait(wait if wait > 0 else None)
+                self._begin()
+            self._write(wait=False)
+
+    def _begin(self):
+        # Dipanggil dengan self._cond dipegang
+        self._flushing = True
+        self._first_request = self._last_request = self._requested_at = None
+        self._next_periodic = time.monotonic() + self.interval
+
+    def _write(self, wait):
+        start = time.monotonic()
+        error = None
+        try:
+            wrote = self._flush(wait)
+        except Exception as e:
+            wrote, error = False, e
+            print(f"❌ Error menulis TTL: {e}")
+        with self._cond:
+            self._flushing = False
+            seconds = round(time.monotonic() - start, 3)
+            if error is not None:
+                self.last_error = {'at': _now(), 'message': str(error)}
+                # Coba lagi tanpa menunggu interval penuh; journal tetap menyimpan perubahannya
+                self._next_periodic = time.monotonic() + self.max_delay
+            elif wrote:
+                self.flushes += 1
+                self.last_flush = {'at': _now(), 'seconds': seconds}
+                self.last_error = None
+            self._cond.notify_all()
+        return wrote
+
+    def flush_now(self, wait=True):
+        """Tulis sekarang di thread pemanggil (CLI, shutdown) setelah penulisan yang sedang berjalan selesai"""
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            self._begin()
+        return self._write(wait)
+
+    def stop(self, timeout=None):
+        """Hentikan thread lalu tulis perubahan yang tersisa; aman dipanggil lebih dari sekali"""
+        with self._cond:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush_now()
+
+    def status(self):
+        """Status penulisan TTL di proses ini, untuk dashboard admin"""
+        with self._cond:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'writing': self._flushing,
+                'requested_at': self._requested_at,
+                'flushes': self.flushes,
+                'last_flush': self.last_flush,
+                'last_error': self.last_error,
+            }
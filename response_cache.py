@@ -0,0 +1,186 @@
+"""Cache response API per versi graph: ETag, 304 Not Modified, dan body terkompresi.
+
+Body JSON disimpan sekali per (versi graph, URL). ETag dihitung dari isi body,
+sehingga endpoint yang datanya tidak berubah setelah edit admin (misalnya
+/api/religions) tetap menjawab 304. Versi gzip/brotli dibuat sekali saat
+pertama diminta lalu disimpan di memori bersama body aslinya.
+
+Koleksi besar dialirkan oleh stream_response() per potongan (chunked, gzip
+bertahap) dengan ETag dari versi graph, supaya byte pertama langsung terkirim.
+Stream lengkap pertama per versi bisa sekaligus mengisi cache (body asli dan
+gzip-nya), sehingga request berikutnya dilayani dari memori.
+"""
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import brotli  # Optional: pip install Brotli
+except ImportError:
+    brotli = None
+
+# Body kecil tidak sebanding dengan biaya header Content-Encoding
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 6
+
+
+def _compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = format gzip
+    for chunk in chunks:
+        # Sync flush per potongan (sudah berisi banyak record): byte pertama langsung
+        # terkirim, tidak tertahan di buffer zlib sampai puluhan KB
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def negotiate_encoding(accept_encoding, available=None):
+    """Pilih 'br', 'gzip', atau None dari header Accept-Encoding"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    candidates = available or (['br', 'gzip'] if brotli is not None else ['gzip'])
+    best = max(candidates, key=lambda e: accepted.get(e, accepted.get('*', 0)))
+    return best if accepted.get(best, accepted.get('*', 0)) > 0 else None
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Perbandingan lemah (RFC 9110): proxy boleh menambahkan prefix W/
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+
+class CachedBody:
+    """Satu body response beserta ETag dan varian terkompresinya"""
+
+    def __init__(self, version, body, mimetype, headers=None, etag=None, encoded=None):
+        self.version = version
+        self.body = body
+        self.mimetype = mimetype
+        self.headers = headers or {}
+        # ETag dari pemanggil: body hasil stream memakai ETag yang sama dengan saat dialirkan
+        self.etag = etag or '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+        self._encoded = dict(encoded or {})
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding):
+        """Body untuk Content-Encoding tertentu (dikompresi sekali, lalu dari memori)"""
+        data = self._encoded.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._encoded.get(encoding)
+                if data is None:
+                    data = self._encoded[encoding] = _compress(self.body, encoding)
+        return data
+
+    def respond(self, request, response_class, cache_control):
+        """Response 200/304 untuk request ini"""
+        compressible = len(self.body) >= MIN_COMPRESS_SIZE
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding')) if compressible else None
+        # Tiap representasi punya ETag kuat sendiri
+        etag = self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+        headers = {**self.headers, 'ETag': etag, 'Cache-Control': cache_control}
+        if compressible:
+            headers['Vary'] = ', '.join(filter(None, (self.headers.get('Vary'), 'Accept-Encoding')))
+        if _etag_matches(request.headers.get('If-None-Match'), etag) or (
+                encoding is not None and _etag_matches(request.headers.get('If-None-Match'), self.etag)):
+            return response_class(status=304, headers=headers)
+
+        if encoding is None:
+            return response_class(self.body, mimetype=self.mimetype, headers=headers)
+        headers['Content-Encoding'] = encoding
+        return response_class(self.encoded(encoding), mimetype=self.mimetype, headers=headers)
+
+
+def _collect(chunks, parts):
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+
+
+def _store_when_complete(chunks, store, raw, encoded, encoding):
+    yield from chunks
+    # Hanya body yang terkirim lengkap yang disimpan (klien yang putus di tengah tidak)
+    store(b''.join(raw), {encoding: b''.join(encoded)} if encoding else {})
+
+
+def stream_response(request, response_class, chunks, mimetype, etag, cache_control, store=None):
+    """Response chunked dari `chunks()`, fungsi yang mengembalikan iterable bytes.
+
+    ETag harus sudah ditentukan pemanggil (mis. dari versi graph + URL) karena
+    isi body belum ada saat header dikirim; chunks() baru dipanggil setelah
+    cek If-None-Match, jadi 304 tidak membangun data apa pun. Kompresi gzip
+    dilakukan bertahap.
+    Dengan `store`, store(body, {encoding: body terkompresi}) dipanggil setelah
+    body terkirim lengkap, misalnya untuk mengisi ResponseCache.
+    """
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'), available=['gzip'])
+    if encoding is not None:
+        etag = f'{etag[:-1]}-{encoding}"'
+    headers = {'ETag': etag, 'Cache-Control': cache_control, 'Vary': 'Accept-Encoding'}
+    if _etag_matches(request.headers.get('If-None-Match'), etag):
+        return response_class(status=304, headers=headers)
+    chunks = chunks()
+    raw, encoded = [], []
+    if store is not None:
+        chunks = _collect(chunks, raw)
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+        chunks = _gzip_stream(chunks)
+    if store is not None:
+        chunks = _store_when_complete(_collect(chunks, encoded), store, raw, encoded, encoding)
+    return response_class(chunks, mimetype=mimetype, headers=headers)
+
+
+class ResponseCache:
+    """LRU {url: CachedBody}; entry dari versi graph lama dianggap tidak ada"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, version, key, body, mimetype, headers=None, etag=None, encoded=None):
+        entry = CachedBody(version, body, mimetype, headers, etag, encoded)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,16 +1,95 @@
-from app import app
+from app import app, shutdown_persistence
 import os
+import signal
+import socket
+import time
+from waitress import serve
+
+HOST, PORT = '0.0.0.0', 1081
+
+# Jumlah proses worker (default: jumlah CPU) dan thread per worker.
+# Fork tidak tersedia di Windows, jadi di sana selalu satu proses.
+CAN_FORK = hasattr(os, 'fork')
+WORKERS = int(os.environ.get('WORKERS', os.cpu_count() or 1)) if CAN_FORK else 1
+THREADS = int(os.environ.get('THREADS', 8))
+
+
+def interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def run_worker(sock):
+    """Proses worker: layani request dari socket yang dibagi dengan worker lain"""
+    # SIGTERM menghentikan serve() dengan rapi supaya sisa journal sempat ditulis ke TTL
+    signal.signal(signal.SIGTERM, interrupt)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        serve(app, sockets=[sock], threads=THREADS)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Proses ini keluar lewat os._exit (tanpa atexit)
+        shutdown_persistence()
+
+
+def run_workers(sock):
+    """Fork WORKERS proses, jalankan ulang yang mati, hentikan semua saat SIGTERM/CTRL+C"""
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(sock)
+            finally:
+                os._exit(0)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(WORKERS):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        print(f"⚠️ Worker {pid} berhenti (status {status}), menjalankan ulang")
+        if time.monotonic() - started < 1:
+            time.sleep(1)  # jangan restart terus-menerus jika worker langsung crash
+        spawn()
+
 
 if __name__ == '__main__':
     print("="*60)
     print("🚀 Jakarta Semantic Harmony - Production Mode (Pure TTL)")
     print("="*60)
-    
-    print("✅ Server running on http://0.0.0.0:1081")
+
+    print(f"✅ Server running on http://{HOST}:{PORT}")
+    print(f"⚙️  {WORKERS} worker x {THREADS} threads")
     print("📍 Accessible from local network & tunnels (playit.gg)")
     print("🛑 Press CTRL+C to stop")
     print("="*60)
-    
-    # Use Flask built-in server for production (compatible with tunnels)
-    # Debug=False for production, threaded=True for concurrent requests
-    app.run(host='0.0.0.0', port=1081, debug=False, threaded=True)
+
+    if WORKERS > 1:
+        # Graph sudah dimuat saat import app, jadi worker hasil fork berbagi memorinya.
+        # Perubahan admin disebarkan antar worker lewat journal (lihat sync_graph di app.py).
+        sock = socket.create_server((HOST, PORT), backlog=1024)
+        run_workers(sock)
+    else:
+        serve(app, host=HOST, port=PORT, threads=THREADS)
@@ -0,0 +1,102 @@
+"""Profiler sampling untuk sebagian request, dinyalakan sementara lewat admin.
+
+Saat aktif, sebagian request (sesuai `rate`) didaftarkan per thread. Sebuah
+thread latar belakang mengambil stack thread-thread itu setiap `interval`
+detik lewat sys._current_frames() dan menghitung stack yang sama. Hasilnya
+dalam format "collapsed stack" (satu baris per stack, frame dipisah `;`)
+yang bisa langsung dibaca flamegraph.pl atau speedscope.
+
+Saat tidak aktif, biaya per request hanya satu perbandingan waktu. Karena
+sampler juga butuh GIL, sampel cenderung jatuh di titik yang melepas GIL
+(I/O, hashing, kompresi); bandingkan proporsi antar-stack, bukan angka mutlak.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_DEPTH = 64
+
+
+def _collapse(frame):
+    parts = []
+    while frame is not None and len(parts) < MAX_DEPTH:
+        code = frame.f_code
+        parts.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self.rate = 0.0
+        self.interval = 0.005
+        self.active_until = 0.0
+        self.started_at = None
+        self.samples = 0
+        self._threads = {}  # thread ident -> label request yang sedang diprofil
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._sampler = None
+
+    @property
+    def active(self):
+        return time.monotonic() < self.active_until
+
+    def start(self, seconds, rate=1.0, interval=0.005):
+        """Profil `rate` (0..1) dari request selama `seconds` detik; hasil lama dibuang"""
+        with self._lock:
+            self._stacks = Counter()
+            self.samples = 0
+            self.rate = rate
+            self.interval = interval
+            self.started_at = time.time()
+            self.active_until = time.monotonic() + seconds
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self._sampler.start()
+
+    def stop(self):
+        self.active_until = 0.0
+
+    def enter(self, label):
+        """Dipanggil di awal request; True jika request ini ikut diprofil"""
+        if time.monotonic() >= self.active_until or random.random() >= self.rate:
+            return False
+        self._threads[threading.get_ident()] = label
+        return True
+
+    def exit(self):
+        self._threads.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while self.active:
+            frames = sys._current_frames()
+            for ident, label in list(self._threads.items()):
+                frame = frames.get(ident)
+                if frame is not None:
+                    stack = label + ';' + _collapse(frame)
+                    with self._lock:
+                        self._stacks[stack] += 1
+                        self.samples += 1
+            del frames
+            time.sleep(self.interval)
+        self._threads.clear()
+
+    def status(self):
+        return {
+            'active': self.active,
+            'rate': self.rate,
+            'interval_ms': self.interval * 1000,
+            'started_at': self.started_at,
+            'remaining_s': round(max(0.0, self.active_until - time.monotonic()), 1),
+            'samples': self.samples,
+        }
+
+    def collapsed(self, limit=None):
+        """Hasil dalam format collapsed stack, stack terbanyak lebih dulu"""
+        with self._lock:
+            stacks = self._stacks.most_common(limit)
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks)
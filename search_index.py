@@ -0,0 +1,247 @@
+"""Index full-text (inverted index + BM25) untuk pencarian site.
+
+Teks dari beberapa field site dipecah menjadi token, dinormalisasi (huruf
+kecil, tanpa diakritik), dibuang stopword-nya, lalu di-stem ringan dengan
+aturan imbuhan bahasa Indonesia. Setiap term menyimpan posting
+{site_id: (bobot tf, panjang dokumen)}; field `nama` diberi bobot lebih
+tinggi.
+
+Token terakhir query diperlakukan sebagai prefix (untuk typeahead): token itu
+dicocokkan ke kata asli (sebelum stemming) lewat daftar kata terurut, lalu
+diperluas ke term hasil stem-nya.
+
+Index disalin per snapshot, jadi semua map besar (term, panjang dokumen,
+kata asli) berupa struktur copy-on-write dari sharded.py; posting term
+umum juga dibagi per shard site_id setelah melebihi SHARD_POSTING entri.
+"""
+import heapq
+import math
+import re
+import unicodedata
+from functools import lru_cache
+
+from sharded import ChunkedList, ShardedDict
+
+# (field site, bobot) yang diindeks
+FIELDS = (
+    ('nama', 3.0),
+    ('kecamatan', 1.5),
+    ('wilayah', 1.0),
+    ('alamat', 1.0),
+    ('transport_terdekat', 1.0),
+    ('deskripsi', 1.0),
+)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Prefix sependek ini hanya dicocokkan persis supaya typeahead tetap cepat
+MIN_PREFIX = 2
+MAX_PREFIX_TERMS = 50
+# Posting yang lebih besar dari ini disimpan sebagai ShardedDict (salinan per shard)
+SHARD_POSTING = 1024
+
+STOPWORDS = frozenset('''
+    ada adalah agar akan antara atau bagi bahwa bagian dalam dan dari dengan di
+    hingga ini itu jl juga ke kepada karena masih merupakan no oleh pada para
+    saat sampai sebagai secara sejak serta setelah telah tersebut untuk yaitu
+    yang
+'''.split())
+
+_TOKEN_RE = re.compile(r'[0-9a-z]+')
+_PARTICLES = ('lah', 'kah', 'tah', 'pun')
+_POSSESSIVES = ('nya', 'ku', 'mu')
+_SUFFIXES = ('kan', 'an', 'i')
+# (prefix, pengganti huruf awal yang luluh)
+_PREFIXES = (
+    ('meny', 's'), ('peny', 's'),
+    ('meng', ''), ('peng', ''), ('mem', ''), ('pem', ''), ('men', ''), ('pen', ''),
+    ('ber', ''), ('ter', ''), ('per', ''), ('me', ''), ('pe', ''), ('be', ''),
+    ('di', ''), ('ke', ''), ('se', ''),
+)
+# Stem yang lebih pendek dari ini dianggap hasil pemotongan yang salah
+_MIN_STEM = 4
+
+
+def normalize(text):
+    """Huruf kecil tanpa diakritik; apostrof dihapus (Jami' -> jami)"""
+    text = text.lower()
+    if not text.isascii():
+        text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return text.replace("'", '').replace('’', '')
+
+
+# Kosakata data ini kecil dan berulang: hasil stem di-cache per kata
+@lru_cache(maxsize=65536)
+def stem(word):
+    """Stemmer ringan tanpa kamus: partikel, kata ganti, sufiks, lalu satu prefiks"""
+    if len(word) <= _MIN_STEM or word.isdigit():
+        return word
+    for group in (_PARTICLES, _POSSESSIVES, _SUFFIXES):
+        for suffix in group:
+            if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+                word = word[:-len(suffix)]
+                break
+    for prefix, replacement in _PREFIXES:
+        if word.startswith(prefix):
+            # Hanya prefiks terpanjang yang dicoba: 'berdiri' tidak boleh menjadi 'rdiri'
+            if len(word) - len(prefix) + len(replacement) >= _MIN_STEM:
+                return replacement + word[len(prefix):]
+            break
+    return word
+
+
+def tokenize(text):
+    """Kata (sudah dinormalisasi, tanpa stopword) dari sebuah teks"""
+    return [w for w in _TOKEN_RE.findall(normalize(text or '')) if w not in STOPWORDS]
+
+
+def _document(site):
+    """({term: bobot tf}, {kata asli}) untuk satu site"""
+    terms = {}
+    words = set()
+    for field, weight in FIELDS:
+        for word in tokenize(site.get(field)):
+            words.add(word)
+            term = stem(word)
+            terms[term] = terms.get(term, 0.0) + weight
+    return terms, words
+
+
+class SearchIndex:
+    """Inverted index term -> {site_id: (tf, panjang dokumen)}, dengan salinan copy-on-write"""
+
+    def __init__(self):
+        self.postings = ShardedDict()
+        self.doc_len = ShardedDict()
+        self.total_len = 0.0
+        self.words = ChunkedList()       # kata asli terurut, untuk pencocokan prefix
+        self.word_count = ShardedDict()  # kata asli -> jumlah site yang memuatnya
+        self._owned = None               # None = semua posting milik index ini
+
+    def copy(self):
+        """Salinan murah: posting sebuah term baru disalin saat pertama kali diubah"""
+        clone = SearchIndex()
+        clone.postings = self.postings.copy()
+        clone.doc_len = self.doc_len.copy()
+        clone.total_len = self.total_len
+        clone.words = self.words.copy()
+        clone.word_count = self.word_count.copy()
+        clone._owned = set()
+        return clone
+
+    def build(self, sites):
+        """Isi index baru; diisi dengan dict biasa lalu dibagi ke shard sekaligus"""
+        self.postings, self.doc_len, self.word_count = {}, {}, {}
+        for site in sites:
+            self.add(site)
+        self.postings = ShardedDict({term: ShardedDict(posting) if len(posting) > SHARD_POSTING else posting
+                                     for term, posting in self.postings.items()})
+        self.doc_len = ShardedDict(self.doc_len)
+        self.word_count = ShardedDict(self.word_count)
+
+    def _posting(self, term):
+        posting = self.postings.get(term)
+        if posting is None:
+            posting = self.postings[term] = {}
+            if self._owned is not None:
+                self._owned.add(term)
+        elif self._owned is not None and term not in self._owned:
+            # dict kecil disalin penuh, ShardedDict hanya daftar shard-nya
+            posting = self.postings[term] = posting.copy()
+            self._owned.add(term)
+        return posting
+
+    def add(self, site):
+        terms, words = _document(site)
+        site_id = site['id']
+        length = sum(terms.values())
+        for term, tf in terms.items():
+            posting = self._posting(term)
+            # Panjang dokumen ikut disimpan supaya score() tidak perlu membaca doc_len per site
+            posting[site_id] = (tf, length)
+            # Saat build() `postings` masih dict biasa; posting besar dibagi sekaligus di akhir
+            if isinstance(self.postings, ShardedDict) and type(posting) is dict and len(posting) > SHARD_POSTING:
+                self.postings[term] = ShardedDict(posting)
+        self.doc_len[site_id] = length
+        self.total_len += length
+        for word in words:
+            count = self.word_count.get(word, 0)
+            if not count:
+                self.words.add(word)
+            self.word_count[word] = count + 1
+
+    def remove(self, site):
+        site_id = site['id']
+        if site_id not in self.doc_len:
+            return
+        terms, words = _document(site)
+        for term in terms:
+            if term in self.postings:
+                posting = self._posting(term)
+                posting.pop(site_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_len -= self.doc_len.pop(site_id)
+        for word in words:
+            count = self.word_count.get(word, 0) - 1
+            if count > 0:
+                self.word_count[word] = count
+            elif count == 0:
+                del self.word_count[word]
+                self.words.remove(word)
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def _expand(self, word, prefix):
+        """Term yang cocok untuk satu kata query"""
+        terms = {stem(word)}
+        if prefix and len(word) >= MIN_PREFIX:
+            for known in self.words.iter_range(word):
+                if not known.startswith(word):
+                    break
+                terms.add(stem(known))
+        terms = [t for t in terms if t in self.postings]
+        if len(terms) > MAX_PREFIX_TERMS:
+            terms = heapq.nlargest(MAX_PREFIX_TERMS, terms, key=lambda t: len(self.postings[t]))
+        return terms
+
+    def score(self, text, prefix=True):
+        """{site_id: skor BM25} untuk site yang memuat semua kata query.
+
+        Jika `prefix`, kata terakhir juga cocok dengan kata yang diawalinya
+        (kecuali query diakhiri spasi, tanda kata sudah selesai diketik).
+        """
+        words = tokenize(text)
+        if not words or not self.doc_len:
+            return {}
+        prefix = prefix and not text[-1:].isspace()
+        n = len(self.doc_len)
+        avg_len = self.total_len / n or 1.0
+
+        scores = None
+        for i, word in enumerate(words):
+            word_scores = {}
+            for term in self._expand(word, prefix and i == len(words) - 1):
+                posting = self.postings[term]
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for site_id, (tf, length) in posting.items():
+                    if scores is not None and site_id not in scores:
+                        continue
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+                    s = idf * tf * (BM25_K1 + 1) / norm
+                    # Beberapa term dari satu prefix tidak boleh saling menjumlah
+                    if s > word_scores.get(site_id, 0.0):
+                        word_scores[site_id] = s
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {site_id: scores[site_id] + s for site_id, s in word_scores.items()}
+            if not scores:
+                break
+        return scores
+
+    def search(self, text, limit=20, prefix=True):
+        """([(skor, site_id)] terbaik, jumlah total yang cocok)"""
+        scores = self.score(text, prefix)
+        top = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(s, site_id) for site_id, s in top], len(scores)
@@ -0,0 +1,294 @@
+"""Struktur data copy-on-write untuk index SiteSnapshot.
+
+Setiap snapshot baru dibuat dari snapshot sebelumnya lewat copy(). Supaya
+biaya itu tidak sebanding dengan jumlah site, isi dibagi ke potongan kecil
+yang dipakai bersama oleh kedua salinan; potongan baru disalin saat pertama
+kali diubah. copy() cukup menyalin daftar potongan, dan satu perubahan
+hanya menyalin satu potongan.
+
+- ShardedDict / ShardedSet: dibagi ke SHARDS shard berdasarkan hash key.
+- ChunkedList: list terurut yang dibagi ke potongan berisi ±CHUNK elemen.
+
+Setelah copy() kedua salinan sama-sama tidak memiliki potongan lama, jadi
+aman walaupun salinan asal masih diubah (mis. saat build).
+
+hash() string berbeda di setiap proses, jadi pickle menyimpan isinya sebagai
+dict/set/list biasa dan shard dibagi ulang saat dimuat.
+"""
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+
+# Dengan 128 shard, 100k site berarti ±800 entri disalin per shard yang diubah
+SHARDS = 128
+# Potongan ChunkedList dipecah dua setelah melebihi 2 * CHUNK elemen
+CHUNK = 512
+
+
+class _Sharded:
+    __slots__ = ('_shards', '_owned', '_len')
+    _empty = dict
+
+    def __init__(self):
+        self._shards = [None] * SHARDS  # None = shard kosong
+        self._owned = None  # None = semua shard milik objek ini
+        self._len = 0
+
+    def _fill(self, keys, values=None):
+        # Isi awal sekaligus tanpa panggilan method per key
+        shards = self._shards
+        empty = self._empty
+        if values is None:
+            for key in keys:
+                i = hash(key) % SHARDS
+                if shards[i] is None:
+                    shards[i] = empty()
+                shards[i].add(key)
+        else:
+            for key, value in values:
+                i = hash(key) % SHARDS
+                if shards[i] is None:
+                    shards[i] = empty()
+                shards[i][key] = value
+        self._len = sum(len(shard) for shard in shards if shard)
+
+    def __reduce__(self):
+        return type(self), (self._plain(),)
+
+    def copy(self):
+        clone = type(self)()
+        clone._shards = list(self._shards)
+        clone._len = self._len
+        clone._owned = bytearray(SHARDS)
+        self._owned = bytearray(SHARDS)
+        return clone
+
+    def _writable(self, key):
+        i = hash(key) % SHARDS
+        shard = self._shards[i]
+        if shard is None:
+            shard = self._shards[i] = self._empty()
+            if self._owned is not None:
+                self._owned[i] = 1
+        elif self._owned is not None and not self._owned[i]:
+            shard = self._shards[i] = self._empty(shard)
+            self._owned[i] = 1
+        return shard
+
+    def _shard(self, key):
+        return self._shards[hash(key) % SHARDS]
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def __contains__(self, key):
+        shard = self._shard(key)
+        return shard is not None and key in shard
+
+    def __iter__(self):
+        return chain.from_iterable(filter(None, self._shards))
+
+
+class ShardedDict(_Sharded):
+    """dict copy-on-write; urutan iterasi mengikuti shard, bukan urutan insert"""
+    __slots__ = ()
+
+    def __init__(self, mapping=None):
+        super().__init__()
+        if mapping:
+            self._fill(None, mapping.items())
+
+    def get(self, key, default=None):
+        shard = self._shards[hash(key) % SHARDS]
+        return default if shard is None else shard.get(key, default)
+
+    def __getitem__(self, key):
+        try:
+            return self._shards[hash(key) % SHARDS][key]
+        except TypeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        shard = self._writable(key)
+        if key not in shard:
+            self._len += 1
+        shard[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        del self._writable(key)[key]
+        self._len -= 1
+
+    def pop(self, key, default=None):
+        if key not in self:
+            return default
+        self._len -= 1
+        return self._writable(key).pop(key)
+
+    def _plain(self):
+        return dict(self.items())
+
+    def take(self, keys):
+        """List nilai untuk keys (semuanya harus ada), tanpa panggilan method per key"""
+        shards = self._shards
+        return [shards[hash(key) % SHARDS][key] for key in keys]
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return chain.from_iterable(shard.values() for shard in self._shards if shard)
+
+    def items(self):
+        return chain.from_iterable(shard.items() for shard in self._shards if shard)
+
+
+class ShardedSet(_Sharded):
+    """set copy-on-write (hanya operasi yang dipakai index)"""
+    __slots__ = ()
+    _empty = set
+
+    def __init__(self, keys=()):
+        super().__init__()
+        if keys:
+            self._fill(keys)
+
+    def add(self, key):
+        shard = self._writable(key)
+        if key not in shard:
+            self._len += 1
+            shard.add(key)
+
+    def discard(self, key):
+        if key in self:
+            self._writable(key).discard(key)
+            self._len -= 1
+
+    def to_set(self):
+        return set().union(*filter(None, self._shards))
+
+    _plain = to_set
+
+    def __and__(self, ids):
+        """Irisan dengan set biasa atau ShardedSet lain (shard ke shard), hasilnya set biasa"""
+        if isinstance(ids, ShardedSet):
+            return set().union(*(a & b for a, b in zip(self._shards, ids._shards) if a and b))
+        return set().union(*(shard & ids for shard in self._shards if shard))
+
+    __rand__ = __and__
+
+
+class ChunkedList:
+    """List terurut copy-on-write: potongan terurut plus elemen terakhir tiap potongan"""
+    __slots__ = ('_chunks', '_maxes', '_owned', '_len')
+
+    def __init__(self, items=()):
+        items = list(items)
+        self._chunks = [items[i:i + CHUNK] for i in range(0, len(items), CHUNK)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._owned = None  # None = semua potongan milik objek ini, selain itu set id()
+        self._len = len(items)
+
+    def __reduce__(self):
+        # Tanpa penanda kepemilikan (berisi id() objek proses ini)
+        return ChunkedList, (list(self),)
+
+    def copy(self):
+        clone = ChunkedList()
+        clone._chunks = list(self._chunks)
+        clone._maxes = list(self._maxes)
+        clone._len = self._len
+        clone._owned = set()
+        self._owned = set()
+        return clone
+
+    def _writable(self, i):
+        # id() aman: potongan bersama tetap hidup selama masih ada di _chunks
+        chunk = self._chunks[i]
+        if self._owned is not None and id(chunk) not in self._owned:
+            chunk = self._chunks[i] = list(chunk)
+            self._owned.add(id(chunk))
+        return chunk
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return chain.from_iterable(self._chunks)
+
+    def add(self, value):
+        if not self._chunks:
+            self._chunks.append([value])
+            self._maxes.append(value)
+            if self._owned is not None:
+                self._owned.add(id(self._chunks[0]))
+            self._len = 1
+            return
+        i = min(bisect_left(self._maxes, value), len(self._chunks) - 1)
+        chunk = self._writable(i)
+        insort(chunk, value)
+        self._maxes[i] = chunk[-1]
+        self._len += 1
+        if len(chunk) > 2 * CHUNK:
+            half = chunk[CHUNK:]
+            del chunk[CHUNK:]
+            self._chunks.insert(i + 1, half)
+            self._maxes[i] = chunk[-1]
+            self._maxes.insert(i + 1, half[-1])
+            if self._owned is not None:
+                self._owned.add(id(half))
+
+    def remove(self, value):
+        """Hapus value jika ada"""
+        i = bisect_left(self._maxes, value)
+        if i == len(self._chunks):
+            return
+        j = bisect_left(self._chunks[i], value)
+        if j == len(self._chunks[i]) or self._chunks[i][j] != value:
+            return
+        chunk = self._writable(i)
+        del chunk[j]
+        self._len -= 1
+        if chunk:
+            self._maxes[i] = chunk[-1]
+        else:
+            del self._chunks[i]
+            del self._maxes[i]
+
+    def _position(self, value, right=False):
+        """(potongan, offset) tempat value akan disisipkan (bisect_left/right)"""
+        i = bisect_left(self._maxes, value)
+        if i == len(self._chunks):
+            return i, 0
+        return i, (bisect_right if right else bisect_left)(self._chunks[i], value)
+
+    def iter_range(self, low=None, high=None):
+        """Elemen dengan low <= elemen < high (None = tanpa batas)"""
+        i, j = self._position(low) if low is not None else (0, 0)
+        end = self._position(high) if high is not None else (len(self._chunks), 0)
+        while (i, j) < end and i < len(self._chunks):
+            chunk = self._chunks[i]
+            stop = end[1] if i == end[0] else len(chunk)
+            yield from chunk[j:stop]
+            i, j = i + 1, 0
+
+    def iter_after(self, value=None):
+        """Elemen > value secara naik (semua jika value None)"""
+        i, j = self._position(value, right=True) if value is not None else (0, 0)
+        for k in range(i, len(self._chunks)):
+            chunk = self._chunks[k]
+            for n in range(j if k == i else 0, len(chunk)):
+                yield chunk[n]
+
+    def iter_before(self, value=None):
+        """Elemen < value secara turun (semua jika value None)"""
+        i, j = self._position(value) if value is not None else (len(self._chunks), 0)
+        if i == len(self._chunks):
+            i, j = i - 1, len(self._chunks[i - 1]) if self._chunks else 0
+        for k in range(i, -1, -1):
+            chunk = self._chunks[k]
+            for n in range((j if k == i else len(chunk)) - 1, -1, -1):
+                yield chunk[n]
@@ -0,0 +1,1058 @@
+"""Proyeksi in-memory semua TempatIbadah dari RDF graph.
+
+Graph tetap menjadi sumber data utama, tetapi endpoint baca tidak perlu lagi
+menelusuri graph di setiap request. SiteStore menyimpan record site yang
+sudah dikonversi, urutan berdasarkan nama, dan JSON yang sudah diserialisasi.
+Proyeksi dibangun sekali setelah load_graph() dan di-patch per site setiap
+kali admin menambah, mengubah, atau menghapus data.
+
+Setiap versi proyeksi adalah SiteSnapshot yang tidak pernah diubah setelah
+dipublikasikan. Writer membangun snapshot baru (record dan index dibagi ke
+shard/potongan di sharded.py, dan hanya yang berubah yang disalin) lalu
+menukar referensi `SiteStore.current`; reader cukup mengambil
+`current` sekali di awal request dan memakai versi itu sampai selesai,
+tanpa lock.
+
+SiteStore juga mencatat ID site yang berubah per versi di ChangeLog
+(berukuran terbatas), sehingga klien cukup mengambil perubahan sejak versi
+yang terakhir mereka lihat lewat /api/changes.
+
+SiteStore.save() menulis snapshot (record + index) ke file pickle, dan
+SiteStore.load() memuatnya kembali saat start-up supaya proyeksi tidak
+perlu dibangun ulang dari graph.
+"""
+import base64
+import gc
+import json
+import math
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict, deque
+from operator import itemgetter
+from bisect import bisect_left
+
+from geo_cluster import (CELL_SHIFT, MAX_CLUSTER_ZOOM, ClusterIndex, cell_bounds, cell_tile,
+                         cluster_points, finest_cell, tile_bounds, tile_of)
+from geo_index import GeoIndex
+from search_index import SearchIndex
+from sharded import ChunkedList, ShardedDict, ShardedSet
+from transit_index import TransitIndex, slugify, transport_json
+
+
+def _dumps(obj):
+    # Sama dengan output jsonify (sort_keys, ensure_ascii) tapi selalu compact
+    return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _sort_key(site):
+    return (site.get('nama') or '', site['id'])
+
+
+def _numeric_key(field, desc=False):
+    # Site tanpa nilai selalu diletakkan di akhir, baik urutan naik maupun turun
+    def key(site):
+        value = site.get(field)
+        if value is None:
+            return (1, site.get('nama') or '', site['id'])
+        return (0, -value if desc else value, site.get('nama') or '', site['id'])
+    return key
+
+
+def _category_key(field):
+    def key(site):
+        return (site.get(field) or '', site.get('nama') or '', site['id'])
+    return key
+
+
+# Field kategori yang punya hash index (nilai -> set ID)
+HASH_FIELDS = ('agama', 'tipe', 'wilayah', 'kecamatan', 'is_heritage')
+
+# Urutan yang didukung /api/sites: nama -> (index, dibalik?)
+ORDERINGS = {
+    'nama': ('nama', False),
+    '-nama': ('nama', True),
+    'tahun': ('tahun', False),
+    '-tahun': ('-tahun', False),
+    'kapasitas': ('kapasitas', False),
+    '-kapasitas': ('-kapasitas', False),
+    'agama': ('agama', False),
+    'wilayah': ('wilayah', False),
+}
+
+SORTED_INDEXES = {
+    'nama': _sort_key,
+    'tahun': _numeric_key('tahun_berdiri'),
+    '-tahun': _numeric_key('tahun_berdiri', desc=True),
+    'kapasitas': _numeric_key('kapasitas'),
+    '-kapasitas': _numeric_key('kapasitas', desc=True),
+    'agama': _category_key('agama'),
+    'wilayah': _category_key('wilayah'),
+}
+
+# Tile GeoJSON peta yang disimpan per snapshot sebelum cache dikosongkan
+TILE_CACHE_SIZE = 2048
+# Di bawah zoom ini tile peta terfilter dihitung dari semua site hasil filter
+# sekaligus, bukan dari GeoIndex per tile (tile selebar beberapa km ke atas)
+CANDIDATE_SCAN_ZOOM = 13
+
+# Naikkan jika struktur yang ditulis SiteStore.save() berubah
+PROJECTION_FORMAT = 1
+
+# Field numerik yang bisa difilter dengan rentang: nama field -> sorted index
+RANGE_FIELDS = {
+    'tahun_berdiri': 'tahun',
+    'kapasitas': 'kapasitas',
+}
+
+
+_NO_IDS = ShardedSet()
+
+
+class HashIndex:
+    """Index kategori: nilai field -> ShardedSet ID site"""
+
+    def __init__(self, field):
+        self.field = field
+        self.values = {}
+        self._owned = None  # None = semua set milik index ini
+
+    def copy(self):
+        """Salinan murah: set per nilai baru disalin (per shard) saat pertama kali diubah"""
+        clone = HashIndex(self.field)
+        clone.values = dict(self.values)
+        clone._owned = set()
+        return clone
+
+    def build(self, sites):
+        values = {}
+        for site in sites:
+            value = site.get(self.field)
+            if value is not None:
+                values.setdefault(value, set()).add(site['id'])
+        self.values = {value: ShardedSet(ids) for value, ids in values.items()}
+
+    def _writable(self, value):
+        ids = self.values.get(value)
+        if ids is None:
+            ids = self.values[value] = ShardedSet()
+            if self._owned is not None:
+                self._owned.add(value)
+        elif self._owned is not None and value not in self._owned:
+            ids = self.values[value] = ids.copy()
+            self._owned.add(value)
+        return ids
+
+    def add(self, site):
+        value = site.get(self.field)
+        if value is not None:
+            self._writable(value).add(site['id'])
+
+    def remove(self, site):
+        value = site.get(self.field)
+        if value in self.values:
+            ids = self._writable(value)
+            ids.discard(site['id'])
+            if not ids:
+                del self.values[value]
+
+    def lookup(self, value):
+        return self.values.get(value, _NO_IDS)
+
+
+class SortedIndex:
+    """ChunkedList key terurut; elemen terakhir setiap key adalah ID site"""
+
+    def __init__(self, key):
+        self.key = key
+        self.keys = ChunkedList()
+
+    def copy(self):
+        clone = SortedIndex(self.key)
+        clone.keys = self.keys.copy()
+        return clone
+
+    def build(self, sites):
+        self.keys = ChunkedList(sorted(self.key(site) for site in sites))
+
+    def add(self, site):
+        self.keys.add(self.key(site))
+
+    def remove(self, site):
+        self.keys.remove(self.key(site))
+
+    def range_ids(self, low=None, high=None):
+        """ID site dengan nilai numerik low <= nilai <= high"""
+        start = (0, low) if low is not None else None
+        end = (0, math.nextafter(high, math.inf)) if high is not None else (1,)
+        return {key[-1] for key in self.keys.iter_range(start, end)}
+
+    def iter_from(self, cursor=None, reverse=False):
+        """Iterasi key sesuai urutan, dimulai setelah cursor (jika ada)"""
+        if reverse:
+            return self.keys.iter_before(cursor)
+        return self.keys.iter_after(cursor)
+
+
+# Field kategori yang dihitung per nilai di /api/stats
+FACET_FIELDS = ('agama', 'wilayah', 'kecamatan', 'tipe')
+# Batas atas bucket histogram kapasitas; bucket terakhir tanpa batas atas
+CAPACITY_BUCKETS = (100, 500, 1000, 5000, 10000)
+YEAR_BUCKET = 10  # histogram tahun berdiri per dekade
+# Perubahan sebanyak ini (dan > 1/8 jumlah site) lebih murah dibangun ulang daripada di-insort satu per satu
+REBUILD_MIN_CHANGES = 256
+
+
+class AggregateIndex:
+    """Hitungan facet dan agregat numerik yang diperbarui per site"""
+
+    def __init__(self):
+        self.total = 0
+        self.heritage = 0
+        self.facets = {field: {} for field in FACET_FIELDS}
+        self.heritage_facets = {field: {} for field in FACET_FIELDS}
+        self.kapasitas_count = 0
+        self.kapasitas_sum = 0
+        self.kapasitas_hist = [0] * (len(CAPACITY_BUCKETS) + 1)
+        self.tahun = {}  # awal dekade -> jumlah site
+
+    def copy(self):
+        # Semua isinya kecil (sebanyak nilai facet), jadi disalin penuh
+        clone = AggregateIndex()
+        clone.total, clone.heritage = self.total, self.heritage
+        clone.facets = {field: dict(counts) for field, counts in self.facets.items()}
+        clone.heritage_facets = {field: dict(counts) for field, counts in self.heritage_facets.items()}
+        clone.kapasitas_count, clone.kapasitas_sum = self.kapasitas_count, self.kapasitas_sum
+        clone.kapasitas_hist = list(self.kapasitas_hist)
+        clone.tahun = dict(self.tahun)
+        return clone
+
+    @staticmethod
+    def _bump(counts, key, delta):
+        value = counts.get(key, 0) + delta
+        if value:
+            counts[key] = value
+        else:
+            counts.pop(key, None)
+
+    def _apply(self, site, delta):
+        self.total += delta
+        heritage = bool(site.get('is_heritage'))
+        if heritage:
+            self.heritage += delta
+        for field in FACET_FIELDS:
+            value = site.get(field)
+            if value is not None:
+                self._bump(self.facets[field], value, delta)
+                if heritage:
+                    self._bump(self.heritage_facets[field], value, delta)
+        kapasitas = site.get('kapasitas')
+        if kapasitas is not None:
+            self.kapasitas_count += delta
+            self.kapasitas_sum += delta * kapasitas
+            self.kapasitas_hist[bisect_left(CAPACITY_BUCKETS, kapasitas)] += delta
+        tahun = site.get('tahun_berdiri')
+        if tahun is not None:
+            self._bump(self.tahun, tahun - tahun % YEAR_BUCKET, delta)
+
+    def add(self, site):
+        self._apply(site, 1)
+
+    def remove(self, site):
+        self._apply(site, -1)
+
+    def to_dict(self):
+        """Bentuk response /api/stats"""
+        bounds = (0,) + CAPACITY_BUCKETS
+        return {
+            'total_sites': self.total,
+            'total_heritage': self.heritage,
+            'facets': self.facets,
+            'heritage': self.heritage_facets,
+            'kapasitas': {
+                'count': self.kapasitas_count,
+                'sum': self.kapasitas_sum,
+                'mean': round(self.kapasitas_sum / self.kapasitas_count, 1) if self.kapasitas_count else None,
+                'histogram': [
+                    {'min': low, 'max': high, 'count': count}
+                    for low, high, count in zip(bounds, CAPACITY_BUCKETS + (None,), self.kapasitas_hist)
+                ],
+            },
+            'tahun_berdiri': {
+                'count': sum(self.tahun.values()),
+                'bucket': YEAR_BUCKET,
+                'histogram': {str(decade): count for decade, count in sorted(self.tahun.items())},
+            },
+        }
+
+
+# Field record /api/sites, urutan sama dengan site_summary(); bisa dipilih lewat ?fields=
+SUMMARY_FIELDS = (
+    'id', 'nama', 'alamat', 'wilayah', 'kecamatan', 'kode_pos', 'tipe', 'agama',
+    'jam_buka', 'kapasitas', 'luas', 'arsitek', 'tahun', 'is_heritage', 'heritage_code',
+    'transport_terdekat', 'latitude', 'longitude', 'gambar_url', 'deskripsi'
+)
+# Field /api/sites yang namanya berbeda dengan atribut record
+SUMMARY_SOURCES = {'tahun': 'tahun_berdiri'}
+# Jumlah record yang digabung menjadi satu potongan response streaming
+STREAM_CHUNK = 256
+
+
+def parse_fields(raw):
+    """'nama,agama' -> tuple field (selalu termasuk id), None jika kosong; ValueError jika tidak dikenal"""
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in SUMMARY_FIELDS]
+    if unknown:
+        raise ValueError(f"field tidak dikenal: {', '.join(unknown)}")
+    # Urutan output tetap mengikuti SUMMARY_FIELDS (kunci JSON terurut seperti jsonify)
+    return tuple(f for f in SUMMARY_FIELDS if f == 'id' or f in fields)
+
+
+# Field record site: properti graph (lihat SITE_PROPERTIES di app.py) plus hasil urai transport
+SITE_FIELDS = (
+    'id', 'nama', 'alamat', 'wilayah', 'kecamatan', 'kode_pos', 'tipe', 'agama',
+    'jam_buka', 'kapasitas', 'luas', 'arsitek', 'tahun_berdiri', 'is_heritage',
+    'heritage_code', 'transport_terdekat', 'transport', 'latitude', 'longitude',
+    'gambar_url', 'deskripsi'
+)
+_SITE_FIELD_SET = frozenset(SITE_FIELDS)
+# Nilai yang berulang di banyak site: satu objek string bersama per nilai (sys.intern)
+INTERNED_FIELDS = frozenset(('wilayah', 'kecamatan', 'kode_pos', 'tipe', 'agama', 'jam_buka',
+                             'arsitek', 'transport_terdekat'))
+
+
+class SiteRecord:
+    """Satu site hasil proyeksi graph: atribut tetap (__slots__), dibaca seperti dict.
+
+    Nilai RDF dikonversi sekali saat proyeksi; nilai kategori di-intern sehingga
+    site dengan agama/wilayah yang sama berbagi string yang sama (dan lookup
+    HashIndex cukup membandingkan identitas). Tidak ada __setitem__: record
+    dibangun sekali lalu hanya dibaca.
+    """
+    __slots__ = SITE_FIELDS
+
+    def __init__(self, values):
+        """Record dari dict {field: nilai}; field yang tidak ada bernilai None"""
+        for field in SITE_FIELDS:
+            value = values.get(field)
+            if type(value) is str and field in INTERNED_FIELDS:
+                value = sys.intern(value)
+            setattr(self, field, value)
+
+    def __getitem__(self, field):
+        if field not in _SITE_FIELD_SET:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in _SITE_FIELD_SET else default
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in SITE_FIELDS}
+
+    def __eq__(self, other):
+        if not isinstance(other, SiteRecord):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in SITE_FIELDS)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Tuple nilai per field: jauh lebih ringkas dan cepat di-pickle daripada dict state __slots__
+        return _site_record, tuple(getattr(self, field) for field in SITE_FIELDS)
+
+    def __repr__(self):
+        return f'SiteRecord({self.id!r})'
+
+
+def _site_record(*values):
+    """Kebalikan SiteRecord.__reduce__()"""
+    site = SiteRecord.__new__(SiteRecord)
+    for field, value in zip(SITE_FIELDS, values):
+        setattr(site, field, value)
+    return site
+
+
+def site_summary(site):
+    """Bentuk record untuk /api/sites"""
+    return {
+        'id': site.get('id'),
+        'nama': site.get('nama'),
+        'alamat': site.get('alamat'),
+        'wilayah': site.get('wilayah'),
+        'kecamatan': site.get('kecamatan'),
+        'kode_pos': site.get('kode_pos'),
+        'tipe': site.get('tipe'),
+        'agama': site.get('agama'),
+        'jam_buka': site.get('jam_buka'),
+        'kapasitas': site.get('kapasitas'),
+        'luas': site.get('luas'),
+        'arsitek': site.get('arsitek'),
+        'tahun': site.get('tahun_berdiri'),
+        'is_heritage': site.get('is_heritage', False),
+        'heritage_code': site.get('heritage_code'),
+        'transport_terdekat': site.get('transport_terdekat'),
+        'latitude': site.get('latitude'),
+        'longitude': site.get('longitude'),
+        'gambar_url': site.get('gambar_url'),
+        'deskripsi': site.get('deskripsi')
+    }
+
+
+def site_detail(site):
+    """Bentuk record untuk /api/site/<id>"""
+    return {
+        'id': site.get('id'),
+        'nama': site.get('nama'),
+        'alamat': site.get('alamat'),
+        'wilayah': site.get('wilayah'),
+        'kecamatan': site.get('kecamatan'),
+        'kode_pos': site.get('kode_pos'),
+        'tipe': site.get('tipe'),
+        'agama': site.get('agama'),
+        'jam_buka': site.get('jam_buka'),
+        'kapasitas': site.get('kapasitas'),
+        'luas': site.get('luas'),
+        'arsitek': site.get('arsitek'),
+        'tahun_berdiri': site.get('tahun_berdiri'),
+        'is_heritage': site.get('is_heritage', False),
+        'heritage_code': site.get('heritage_code'),
+        'transport_terdekat': site.get('transport_terdekat'),
+        'transport': [transport_json(entry) for entry in site.get('transport') or ()],
+        'latitude': site.get('latitude'),
+        'longitude': site.get('longitude'),
+        'gambar_url': site.get('gambar_url'),
+        'deskripsi': site.get('deskripsi')
+    }
+
+
+class _RecordCache:
+    """Cache hasil per record (JSON, atau fragmen HTML halaman), dipakai bersama oleh semua snapshot.
+
+    Entri disimpan bersama record asalnya; karena record tidak pernah diubah,
+    cukup dicek identitasnya untuk tahu apakah hasilnya masih berlaku. Dengan
+    `max_entries`, entri yang paling lama tidak dipakai dibuang lebih dulu (LRU).
+    """
+
+    def __init__(self, build, encode=_dumps, max_entries=None):
+        self._build = build
+        self._encode = encode
+        self._max_entries = max_entries
+        # Urutan pemakaian hanya perlu untuk eviction LRU
+        self._entries = {} if max_entries is None else OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, site):
+        site_id = site['id']
+        if self._max_entries is None:
+            # Tanpa batas tidak ada eviction, jadi hit cukup satu dict.get tanpa lock
+            # (dipanggil per site saat menyusun list JSON); hitungan hit bisa sedikit meleset
+            entry = self._entries.get(site_id)
+            if entry is not None and entry[0] is site:
+                self.hits += 1
+                return entry[1]
+        with self._lock:
+            entry = self._entries.get(site_id)
+            if entry is not None and entry[0] is site:
+                self.hits += 1
+                if self._max_entries is not None:
+                    self._entries.move_to_end(site_id)
+                return entry[1]
+            self.misses += 1
+        # Dibangun di luar lock (render HTML bisa lama); request bersamaan paling buruk membangun dua kali
+        value = self._encode(self._build(site))
+        with self._lock:
+            self._entries[site_id] = (site, value)
+            if self._max_entries is not None:
+                self._entries.move_to_end(site_id)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def discard(self, site_id):
+        with self._lock:
+            self._entries.pop(site_id, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SiteSnapshot:
+    """Satu versi proyeksi site; read-only setelah dipublikasikan"""
+
+    def __init__(self, version, summaries, details):
+        self.version = version
+        self._summaries = summaries
+        self._details = details
+        self._records = ShardedDict()
+        self._hash = {field: HashIndex(field) for field in HASH_FIELDS}
+        self._sorted = {name: SortedIndex(key) for name, key in SORTED_INDEXES.items()}
+        self._geo = GeoIndex()
+        self._search = SearchIndex()
+        self._aggregate = AggregateIndex()
+        self._transit = TransitIndex()
+        self._clusters = None  # ClusterIndex, dibangun saat peta pertama kali meminta cluster
+        self._tiles = {}
+        self._list_json = None
+        self._derived = {}
+
+    @classmethod
+    def build(cls, records, version, summaries, details):
+        snap = cls(version, summaries, details)
+        snap._records = ShardedDict(records)
+        sites = list(records.values())
+        for site in sites:
+            snap._aggregate.add(site)
+        for index in list(snap._hash.values()) + list(snap._sorted.values()) + [
+                snap._geo, snap._search, snap._transit]:
+            index.build(sites)
+        return snap
+
+    def apply(self, changes, version):
+        """Snapshot baru dengan perubahan {site_id: site atau None}; self tidak diubah"""
+        if len(changes) >= REBUILD_MIN_CHANGES and len(changes) * 8 > len(self._records):
+            # Import massal: bangun ulang semua index sekaligus
+            records = self._records.copy()
+            for site_id, site in changes.items():
+                if site:
+                    records[site_id] = site
+                else:
+                    records.pop(site_id, None)
+            return SiteSnapshot.build(records, version, self._summaries, self._details)
+        snap = SiteSnapshot(version, self._summaries, self._details)
+        snap._records = self._records.copy()
+        snap._hash = {field: index.copy() for field, index in self._hash.items()}
+        snap._sorted = {name: index.copy() for name, index in self._sorted.items()}
+        snap._geo = self._geo.copy()
+        snap._search = self._search.copy()
+        snap._aggregate = self._aggregate.copy()
+        snap._transit = self._transit.copy()
+        indexes = list(snap._hash.values()) + list(snap._sorted.values()) + [
+            snap._geo, snap._search, snap._aggregate, snap._transit]
+        if self._clusters is not None:
+            snap._clusters = self._clusters.copy()
+            indexes.append(snap._clusters)
+        for site_id, site in changes.items():
+            old = snap._records.pop(site_id, None)
+            if old is not None:
+                for index in indexes:
+                    index.remove(old)
+            if site:
+                snap._records[site_id] = site
+                for index in indexes:
+                    index.add(site)
+        return snap
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, site_id):
+        return self._records.get(site_id)
+
+    def all(self):
+        """Semua site, sudah terurut berdasarkan nama"""
+        return self._records.take(map(itemgetter(-1), self._sorted['nama'].keys))
+
+    def query(self, filters=None, ranges=None, text=None, order='nama',
+              cursor=None, offset=0, limit=50):
+        """Cari site lewat index sekunder.
+
+        `filters` adalah {field: [nilai, ...]} untuk HASH_FIELDS (nilai dalam satu
+        field digabung OR, antar field AND), `ranges` adalah {field: (min, max)}
+        untuk RANGE_FIELDS, dan `text` dicocokkan lewat SearchIndex (semua kata
+        harus ada, kata terakhir boleh prefix). Mengembalikan (list site, total,
+        cursor berikutnya).
+        Cursor menyimpan key urutan item terakhir di halaman sehingga tetap
+        valid walaupun ada site yang ditambah atau dihapus di antara request.
+        """
+        index_name, reverse = ORDERINGS[order]
+        if cursor is not None:
+            cursor = decode_cursor(cursor, order)
+        sorted_index = self._sorted[index_name]
+        candidates = self._candidates(filters, ranges, text)
+
+        total = len(self._records) if candidates is None else len(candidates)
+        if candidates is not None and self._should_sort(len(candidates), offset + limit):
+            keys = sorted(map(sorted_index.key, self._records.take(candidates)), reverse=reverse)
+            if cursor is not None:
+                keys = [k for k in keys if (k < cursor if reverse else k > cursor)]
+            page_keys = keys[offset:offset + limit + 1]
+        else:
+            page_keys = []
+            skipped = 0
+            for key in sorted_index.iter_from(cursor, reverse):
+                if candidates is not None and key[-1] not in candidates:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                page_keys.append(key)
+                if len(page_keys) > limit:
+                    break
+        next_cursor = encode_cursor(page_keys[limit - 1], order) if len(page_keys) > limit else None
+        page = self._records.take(key[-1] for key in page_keys[:limit])
+        return page, total, next_cursor
+
+    def _candidates(self, filters=None, ranges=None, text=None):
+        """Set ID yang cocok dengan filter/range/teks, atau None jika tanpa filter"""
+        candidates = None
+        sets = []
+        for field, values in (filters or {}).items():
+            index = self._hash[field]
+            if len(values) == 1:
+                sets.append(index.lookup(values[0]))
+            else:
+                sets.append(set().union(*(index.lookup(v).to_set() for v in values)))
+        for field, (low, high) in (ranges or {}).items():
+            sets.append(self._sorted[RANGE_FIELDS[field]].range_ids(low, high))
+        if sets:
+            sets.sort(key=len)
+            candidates = sets[0]
+            for other in sets[1:]:
+                candidates = candidates & other
+                if not candidates:
+                    break
+            if isinstance(candidates, ShardedSet):
+                candidates = candidates.to_set()
+        if text:
+            matches = self._search.score(text).keys()
+            candidates = set(matches) if candidates is None else candidates & matches
+        return candidates
+
+    def stats(self, filters=None, ranges=None, text=None):
+        """Agregat (lihat AggregateIndex.to_dict) untuk semua site atau hasil filter"""
+        candidates = self._candidates(filters, ranges, text)
+        if candidates is None:
+            return self._aggregate.to_dict()
+        aggregate = AggregateIndex()
+        for site in self._records.take(candidates):
+            aggregate.add(site)
+        return aggregate.to_dict()
+
+    def facet_values(self, field):
+        """Nilai berbeda sebuah field facet, terurut"""
+        return sorted(value for value in self._aggregate.facets[field] if value)
+
+    def near(self, lat, lng, k=None, radius=None):
+        """List (site, jarak_m) terdekat dari titik, lihat GeoIndex.nearest()"""
+        return [(self._records[site_id], dist)
+                for dist, site_id in self._geo.nearest(lat, lng, k=k, radius=radius)]
+
+    def search(self, text, limit=20, prefix=True):
+        """(list (site, skor) terurut relevansi, total), lihat SearchIndex.search()"""
+        results, total = self._search.search(text, limit=limit, prefix=prefix)
+        return [(self._records[site_id], score) for score, site_id in results], total
+
+    def within(self, min_lat, min_lng, max_lat, max_lng):
+        """Site di dalam bounding box, terurut berdasarkan nama"""
+        sites = [self._records[site_id]
+                 for site_id in self._geo.within(min_lat, min_lng, max_lat, max_lng)]
+        return sorted(sites, key=_sort_key)
+
+    def geo_json(self, z, tiles, filters=None, ranges=None, text=None, fields=None):
+        """GeoJSON FeatureCollection cluster/site untuk list tile (x, y) zoom z.
+
+        Fitur setiap tile di-cache per versi snapshot, jadi viewport yang
+        berbeda berbagi tile yang sama. Tanpa filter cluster dibaca dari
+        ClusterIndex; dengan filter dihitung dari site yang cocok di tile itu.
+        """
+        query_key = (z, tuple(sorted((f, tuple(v)) for f, v in (filters or {}).items())),
+                     tuple(sorted((ranges or {}).items())), text, fields)
+        entries = {tile: self._tiles.get(query_key + tile) for tile in tiles}
+        missing = [tile for tile, entry in entries.items() if entry is None]
+        if missing:
+            candidates = self._candidates(filters, ranges, text)
+            if z <= MAX_CLUSTER_ZOOM and candidates is None:
+                if self._clusters is None:
+                    self._clusters = ClusterIndex.build(self._records.values())
+                points = None
+            else:
+                points = self._tile_points(z, missing, candidates)
+            if len(self._tiles) + len(missing) > TILE_CACHE_SIZE:
+                self._tiles.clear()
+            for x, y in missing:
+                entry = self._tile_features(z, x, y, None if points is None else points[(x, y)], fields)
+                entries[(x, y)] = self._tiles[query_key + (x, y)] = entry
+        parts = [features for features, _ in entries.values() if features]
+        total = sum(count for _, count in entries.values())
+        return (b'{"features":[' + b','.join(parts) + b'],"total":' + _dumps(total) +
+                b',"type":"FeatureCollection","version":' + _dumps(self.version) +
+                b',"zoom":' + _dumps(z) + b'}')
+
+    def _tile_features(self, z, x, y, points, fields):
+        """(bytes fitur dipisah koma, jumlah site) untuk satu tile; `points` None = pakai ClusterIndex"""
+        if points is None:
+            clusters = [(count, lat, lng, zoom, self._site_in_cell(cell) if cell else None)
+                        for count, lat, lng, zoom, cell in self._clusters.tile(z, x, y)]
+        elif z <= MAX_CLUSTER_ZOOM:
+            clusters = cluster_points(points, z)
+        else:
+            clusters = [(1, lat, lng, None, site_id) for site_id, lat, lng, _ in points]
+        features = []
+        for count, lat, lng, zoom, site_id in clusters:
+            if site_id is not None:
+                properties = self.summary_json(self._records[site_id], fields)
+                feature_id = b',"id":' + _dumps(site_id)
+            else:
+                properties = _dumps({'cluster': True, 'count': count, 'expansion_zoom': zoom})
+                feature_id = b''
+            features.append(b'{"geometry":{"coordinates":' + _dumps([round(lng, 6), round(lat, 6)]) +
+                            b',"type":"Point"}' + feature_id + b',"properties":' + properties +
+                            b',"type":"Feature"}')
+        return b','.join(features), sum(c[0] for c in clusters)
+
+    def _tile_points(self, z, tiles, candidates=None):
+        """{(x, y): [(site_id, lat, lng, finest_cell)]} untuk tile zoom z, terurut ID"""
+        found = {tile: [] for tile in tiles}
+        if candidates is not None and z < CANDIDATE_SCAN_ZOOM:
+            site_ids = candidates
+        else:
+            site_ids = set()
+            pad = 1e-9
+            for x, y in tiles:
+                min_lat, min_lng, max_lat, max_lng = tile_bounds(z, x, y)
+                site_ids.update(self._geo.within(min_lat - pad, min_lng - pad, max_lat + pad, max_lng + pad))
+            if candidates is not None:
+                site_ids &= candidates
+        for site_id in site_ids:
+            point = self._geo.points.get(site_id)
+            if point is None:
+                continue
+            cell = finest_cell(*point)
+            # Batas tile ditentukan lewat proyeksi, jadi titik di tepi hanya masuk satu tile
+            tile = cell_tile(cell, z) if z <= MAX_CLUSTER_ZOOM + CELL_SHIFT else tile_of(*point, z)
+            bucket = found.get(tile)
+            if bucket is not None:
+                bucket.append((site_id, point[0], point[1], cell))
+        for bucket in found.values():
+            bucket.sort()
+        return found
+
+    def _site_in_cell(self, cell):
+        """ID satu-satunya site di sel MAX_CLUSTER_ZOOM ini"""
+        min_lat, min_lng, max_lat, max_lng = cell_bounds(MAX_CLUSTER_ZOOM, cell)
+        pad = 1e-9
+        ids = [site_id for site_id in self._geo.within(min_lat - pad, min_lng - pad,
+                                                       max_lat + pad, max_lng + pad)
+               if finest_cell(*self._geo.points[site_id]) == cell]
+        return min(ids)
+
+    def _should_sort(self, matches, wanted):
+        # Sort langsung hasil filter jika lebih murah daripada menelusuri urutan global
+        if not matches:
+            return True
+        walk_cost = wanted * len(self._records) / matches
+        return matches * math.log2(matches + 1) < walk_cost
+
+    def summary_json(self, site, fields=None):
+        """JSON record /api/sites; dengan `fields` hanya field itu (tidak di-cache)"""
+        if fields is None:
+            return self._summaries.get(site)
+        # Langsung dari atribut record, tanpa membangun site_summary() lengkap per site
+        return _dumps({field: site.get(SUMMARY_SOURCES.get(field, field)) for field in fields})
+
+    def page_json(self, page, total, next_cursor, fields=None):
+        """JSON satu halaman hasil query()"""
+        return (b'{"items":[' + b','.join(self.summary_json(s, fields) for s in page) +
+                b'],"next_cursor":' + _dumps(next_cursor) +
+                b',"total":' + _dumps(total) + b',"version":' + _dumps(self.version) + b'}')
+
+    def items_json(self, sites, total=None, fields=None):
+        """JSON {"items": [...], "total": n} untuk list site"""
+        total = len(sites) if total is None else total
+        return (b'{"items":[' + b','.join(self.summary_json(s, fields) for s in sites) +
+                b'],"total":' + _dumps(total) + b',"version":' + _dumps(self.version) + b'}')
+
+    def near_json(self, results):
+        """Seperti items_json() tapi setiap item diberi field jarak_m"""
+        items = (b'{"jarak_m":' + _dumps(round(dist, 1)) + b',' + self.summary_json(site)[1:]
+                 for site, dist in results)
+        return (b'{"items":[' + b','.join(items) + b'],"total":' + _dumps(len(results)) +
+                b',"version":' + _dumps(self.version) + b'}')
+
+    def search_json(self, results, total):
+        """Seperti items_json() tapi setiap item diberi field skor"""
+        items = (b'{"skor":' + _dumps(round(score, 4)) + b',' + self.summary_json(site)[1:]
+                 for site, score in results)
+        return (b'{"items":[' + b','.join(items) + b'],"total":' + _dumps(total) +
+                b',"version":' + _dumps(self.version) + b'}')
+
+    def detail_json(self, site_id):
+        """JSON /api/site/<id> yang sudah diserialisasi, atau None"""
+        site = self._records.get(site_id)
+        if site is None:
+            return None
+        return self._details.get(site)
+
+    def list_json(self):
+        """JSON /api/sites yang sudah diserialisasi untuk versi ini"""
+        if self._list_json is None:
+            self._list_json = b''.join(self.iter_list_json(self.all()))
+        return self._list_json
+
+    def iter_list_json(self, sites, fields=None):
+        """Array JSON /api/sites sebagai potongan bytes, STREAM_CHUNK record per potongan"""
+        yield b'['
+        for start in range(0, len(sites), STREAM_CHUNK):
+            chunk = b','.join(self.summary_json(s, fields) for s in sites[start:start + STREAM_CHUNK])
+            yield chunk if start == 0 else b',' + chunk
+        yield b']'
+
+    def iter_ndjson(self, sites, fields=None):
+        """Satu record JSON per baris (NDJSON), STREAM_CHUNK record per potongan"""
+        for start in range(0, len(sites), STREAM_CHUNK):
+            yield b''.join(self.summary_json(s, fields) + b'\n' for s in sites[start:start + STREAM_CHUNK])
+
+    def changes_json(self, since, site_ids, fields=None):
+        """JSON /api/changes: record terbaru site yang berubah sejak `since`.
+
+        `site_ids` None berarti log tidak lagi mencakup `since` (reset: klien
+        harus mengambil ulang semua data dari /api/sites).
+        """
+        upserted, deleted = [], []
+        for site_id in sorted(site_ids or ()):
+            site = self._records.get(site_id)
+            if site is None:
+                deleted.append(site_id)
+            else:
+                upserted.append(site)
+        return (b'{"deleted":' + _dumps(deleted) + b',"reset":' + _dumps(site_ids is None) +
+                b',"since":' + _dumps(since) +
+                b',"upserted":[' + b','.join(self.summary_json(s, fields) for s in upserted) +
+                b'],"version":' + _dumps(self.version) + b'}')
+
+    def transit_stops_json(self, modes=None, text=None):
+        """JSON /api/transport/stops: halte terurut nama, difilter moda dan/atau potongan nama"""
+        stops = [self._transit.stop(sid) for sid in self._transit.stops]
+        if modes:
+            stops = [stop for stop in stops if stop['mode'] in modes]
+        if text:
+            needle = slugify(text)
+            stops = [stop for stop in stops if needle in slugify(stop['name'])]
+        stops.sort(key=lambda stop: (stop['name'].lower(), stop['mode'] or '', stop['id']))
+        return _dumps({'items': stops, 'total': len(stops), 'version': self.version})
+
+    def transit_sites_json(self, key, fields=None):
+        """JSON /api/transport/<halte>/sites, atau None jika halte tidak dikenal"""
+        sids = self._transit.resolve(key)
+        if not sids:
+            return None
+        sites = sorted((self._records[site_id] for site_id in self._transit.site_ids(sids)), key=_sort_key)
+        return (b'{"items":[' + b','.join(self.summary_json(s, fields) for s in sites) +
+                b'],"stops":' + _dumps([self._transit.stop(sid) for sid in sids]) +
+                b',"total":' + _dumps(len(sites)) + b',"version":' + _dumps(self.version) + b'}')
+
+    def derived_json(self, name, build):
+        """JSON turunan (mis. daftar wilayah) yang dihitung sekali per versi; build(snapshot)"""
+        data = self._derived.get(name)
+        if data is None:
+            data = self._derived[name] = _dumps(build(self))
+        return data
+
+
+class ChangeLog:
+    """ID site yang berubah per versi, dibatasi total `max_sites` ID.
+
+    Setiap entri (versi, base, ids) mencakup perubahan pada versi (base, versi].
+    Biasanya base = versi - 1; setelah reload penuh satu entri bisa mencakup
+    beberapa versi sekaligus. Dipanggil di bawah lock writer SiteStore.
+    """
+
+    def __init__(self, max_sites):
+        self.max_sites = max_sites
+        self._entries = deque()
+        self._size = 0
+        self.oldest = 0  # log lengkap untuk semua perubahan setelah versi ini
+
+    def __len__(self):
+        return len(self._entries)
+
+    def record(self, version, base, site_ids):
+        site_ids = tuple(site_ids)
+        if not site_ids or version <= base:
+            return
+        self._entries.append((version, base, site_ids))
+        self._size += len(site_ids)
+        while self._size > self.max_sites and self._entries:
+            evicted, _, ids = self._entries.popleft()
+            self._size -= len(ids)
+            self.oldest = evicted
+
+    def since(self, version):
+        """Set ID yang berubah setelah `version`, atau None jika log tidak mencakupnya"""
+        if version < self.oldest:
+            return None
+        changed = set()
+        for entry_version, base, site_ids in reversed(self._entries):
+            if entry_version <= version:
+                break
+            if base < version:
+                return None  # `version` berada di tengah entri hasil reload
+            changed.update(site_ids)
+        return changed
+
+
+class SiteStore:
+    """Pemegang snapshot terbaru.
+
+    `project(site_id)` mengembalikan dict site (atau None jika tidak ada) dan
+    `list_ids()` mengembalikan semua ID site di graph. Keduanya disediakan oleh
+    app.py supaya modul ini tidak bergantung langsung pada rdflib, dan hanya
+    dipanggil oleh writer yang sedang memegang lock graph.
+    """
+
+    def __init__(self, project, list_ids, change_log_sites=10000):
+        self._project = project
+        self._list_ids = list_ids
+        self._write_lock = threading.Lock()
+        self._published = threading.Condition(self._write_lock)
+        self.changes = ChangeLog(change_log_sites)
+        self._summaries = _RecordCache(site_summary)
+        self._details = _RecordCache(site_detail)
+        self._caches = [self._summaries, self._details]
+        self.current = SiteSnapshot(0, self._summaries, self._details)
+
+    @property
+    def version(self):
+        return self.current.version
+
+    def __len__(self):
+        return len(self.current)
+
+    def rebuild(self, version=None):
+        """Bangun ulang seluruh proyeksi dari graph"""
+        records = {}
+        for site_id in self._list_ids():
+            site = self._project(site_id)
+            if site:
+                records[site_id] = site
+        with self._write_lock:
+            old = self.current
+            version = old.version + 1 if version is None else version
+            self.current = SiteSnapshot.build(records, version, self._summaries, self._details)
+            # Perubahan yang terlewat (mis. batch journal yang sudah dibuang compaction)
+            # dicatat sebagai satu entri dari versi lama
+            changed = [site_id for site_id, site in records.items() if old.get(site_id) != site]
+            changed += [site['id'] for site in old.all() if site['id'] not in records]
+            self.changes.record(version, old.version, changed)
+            self._published.notify_all()
+        return version
+
+    def refresh(self, site_ids, version=None):
+        """Proyeksikan ulang site yang berubah di graph dan publikasikan versi baru"""
+        if isinstance(site_ids, str):
+            site_ids = [site_ids]
+        return self.publish({site_id: self._project(site_id) for site_id in site_ids}, version)
+
+    def publish(self, changes, version=None):
+        """Publikasikan versi baru dari site yang sudah diproyeksikan ({site_id: site atau None})"""
+        with self._write_lock:
+            old = self.current
+            version = old.version + 1 if version is None else version
+            self.current = old.apply(changes, version)
+            # ID yang bukan site (mis. acara di batch journal yang sama) tidak dicatat
+            self.changes.record(version, old.version, [
+                site_id for site_id, site in changes.items() if site is not None or old.get(site_id) is not None])
+            self._published.notify_all()
+        for site_id, site in changes.items():
+            if site is None:
+                for cache in self._caches:
+                    cache.discard(site_id)
+        return version
+
+    def save(self, path, snap=None):
+        """Tulis snapshot `snap` (default: terbaru) ke file secara atomic; mengembalikan versinya"""
+        snap = snap or self.current
+        state = {
+            'format': PROJECTION_FORMAT,
+            'version': snap.version,
+            'records': snap._records,
+            'hash': snap._hash,
+            # Fungsi key SortedIndex tidak bisa di-pickle; cukup key-nya, fungsi diambil dari SORTED_INDEXES
+            'sorted': {name: index.keys for name, index in snap._sorted.items()},
+            'geo': snap._geo,
+            'search': snap._search,
+            'aggregate': snap._aggregate,
+            'transit': snap._transit,
+        }
+        tmp_path = f'{path}.{os.getpid()}.tmp'  # beberapa worker bisa menulis bersamaan
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return snap.version
+
+    def load(self, path):
+        """Publikasikan snapshot dari file save(); mengembalikan versinya.
+
+        Snapshot hasil load tidak pernah diubah langsung (apply() selalu
+        menyalin), jadi penanda kepemilikan copy-on-write di dalamnya aman
+        walaupun berasal dari proses lain.
+        """
+        # Jutaan objek baru sekaligus: tanpa GC generasional pemuatan beberapa kali lebih cepat
+        gc.disable()
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        finally:
+            gc.enable()
+        if not isinstance(state, dict) or state.get('format') != PROJECTION_FORMAT:
+            raise ValueError(f'{path} bukan file proyeksi format {PROJECTION_FORMAT}')
+        snap = SiteSnapshot(state['version'], self._summaries, self._details)
+        snap._records = state['records']
+        snap._hash = state['hash']
+        for name, keys in state['sorted'].items():
+            snap._sorted[name].keys = keys
+        snap._geo = state['geo']
+        snap._search = state['search']
+        snap._aggregate = state['aggregate']
+        snap._transit = state['transit']
+        with self._write_lock:
+            self.current = snap
+            # Log perubahan tidak ikut disimpan: klien dengan versi lebih lama harus reset
+            self.changes.oldest = max(self.changes.oldest, snap.version)
+            self._published.notify_all()
+        return snap.version
+
+    def record_cache(self, build, encode=_dumps, max_entries=None):
+        """Cache per record tambahan (mis. fragmen HTML); entri site yang dihapus ikut dibuang"""
+        cache = _RecordCache(build, encode, max_entries)
+        self._caches.append(cache)
+        return cache
+
+    def changes_since(self, since):
+        """(snapshot terbaru, set ID yang berubah sejak `since` atau None jika log tidak mencakupnya)"""
+        with self._write_lock:
+            return self.current, self.changes.since(since)
+
+    def wait_for_version(self, since, timeout):
+        """Tunggu sampai ada versi yang lebih baru dari `since`; True jika sudah ada"""
+        with self._published:
+            return self._published.wait_for(lambda: self.current.version > since, timeout)
+
+
+def encode_cursor(key, order):
+    """Key urutan -> string cursor yang aman untuk URL"""
+    raw = json.dumps([order] + list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, order):
+    """Kebalikan encode_cursor(); ValueError jika cursor tidak valid untuk urutan ini"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('cursor tidak valid')
+    if not isinstance(key, list) or len(key) < 2 or key[0] != order:
+        raise ValueError('cursor tidak valid untuk urutan ini')
+    if not all(isinstance(k, (int, float, str)) for k in key[1:]):
+        raise ValueError('cursor tidak valid')
+    return tuple(key[1:])
@@ -0,0 +1,129 @@
+"""Query SPARQL read-only atas RDF graph untuk endpoint /sparql.
+
+Teks query di-parse sekali lewat prepareQuery() rdflib lalu disimpan di LRU
+(per teks + prefix bawaan). Hanya SELECT, ASK, CONSTRUCT, dan DESCRIBE yang
+bisa di-parse; FROM/FROM NAMED dan SERVICE ditolak karena membuat rdflib
+mengambil data dari URL luar.
+
+rdflib tidak punya batas waktu query, jadi query dievaluasi lewat
+_DeadlineGraph: tampilan graph yang sama yang memeriksa deadline setiap kali
+evaluator membaca triple, dan membatalkan query dengan QueryTimeout. Jumlah
+hasil dipotong di `max_rows` (baris SELECT atau triple CONSTRUCT/DESCRIBE).
+"""
+import time
+from functools import lru_cache
+from itertools import islice
+
+from rdflib import Graph
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.algebra import traverse
+from rdflib.query import Result
+
+PREPARED_CACHE_SIZE = 256
+# Deadline diperiksa di setiap pola triple dan setiap sekian triple yang dibaca
+CHECK_EVERY = 1024
+
+# format -> (mimetype, format serializer rdflib)
+RESULT_FORMATS = {
+    'json': ('application/sparql-results+json', 'json'),
+    'xml': ('application/sparql-results+xml', 'xml'),
+    'csv': ('text/csv', 'csv'),
+}
+GRAPH_FORMATS = {
+    'turtle': ('text/turtle', 'turtle'),
+    'nt': ('application/n-triples', 'nt'),
+    'xml': ('application/rdf+xml', 'xml'),
+    'json-ld': ('application/ld+json', 'json-ld'),
+}
+
+
+class QueryError(ValueError):
+    """Query tidak valid atau tidak diizinkan"""
+
+
+class QueryTimeout(Exception):
+    """Evaluasi query melewati batas waktu"""
+
+
+def _reject_remote(node):
+    if getattr(node, 'name', None) == 'ServiceGraphPattern':
+        raise QueryError('SERVICE tidak diizinkan')
+
+
+@lru_cache(maxsize=PREPARED_CACHE_SIZE)
+def prepare(text, namespaces=()):
+    """Query hasil prepareQuery() untuk teks ini; `namespaces` adalah tuple (prefix, URI) bawaan"""
+    try:
+        query = prepareQuery(text, initNs=dict(namespaces))
+    except Exception as e:
+        raise QueryError(f'query tidak valid: {e}') from None
+    if query.algebra.get('datasetClause'):
+        raise QueryError('FROM / FROM NAMED tidak diizinkan')
+    traverse(query.algebra, visitPre=_reject_remote)
+    return query
+
+
+class _DeadlineGraph(Graph):
+    """Graph yang berbagi store dengan `graph`, tapi membatalkan pembacaan setelah deadline"""
+
+    def __init__(self, graph, deadline):
+        super().__init__(store=graph.store, identifier=graph.identifier,
+                         namespace_manager=graph.namespace_manager)
+        self._deadline = deadline
+
+    def _check(self):
+        if time.monotonic() > self._deadline:
+            raise QueryTimeout('query melewati batas waktu')
+
+    def triples(self, triple):
+        self._check()
+        for i, t in enumerate(super().triples(triple), 1):
+            if i % CHECK_EVERY == 0:
+                self._check()
+            yield t
+
+
+def run(graph, query, timeout, max_rows):
+    """Evaluasi query; mengembalikan (Result dengan hasil yang sudah dimaterialisasi, terpotong?)
+
+    Pemanggil memegang lock graph selama fungsi ini berjalan; hasilnya tidak
+    lagi membaca graph sehingga bisa diserialisasi setelah lock dilepas.
+    """
+    result = _DeadlineGraph(graph, time.monotonic() + timeout).query(query)
+    truncated = False
+    if result.type == 'SELECT':
+        rows = list(islice(result, max_rows + 1))
+        truncated = len(rows) > max_rows
+        selected = Result('SELECT')
+        selected.vars = result.vars
+        selected.bindings = [{var: row[var] for var in result.vars if row[var] is not None}
+                             for row in rows[:max_rows]]
+        return selected, truncated
+    if result.type in ('CONSTRUCT', 'DESCRIBE'):
+        for prefix, namespace in graph.namespaces():
+            result.graph.bind(prefix, namespace, replace=True)
+        # Graph hasil sudah dibangun evaluator (dibatasi deadline); potong di max_rows triple
+        if len(result.graph) > max_rows:
+            truncated = True
+            limited = Graph()
+            for prefix, namespace in result.graph.namespaces():
+                limited.bind(prefix, namespace)
+            for triple in islice(result.graph, max_rows):
+                limited.add(triple)
+            result.graph = limited
+    return result, truncated
+
+
+def formats_for(result_type):
+    """Format output yang didukung untuk jenis query ini"""
+    return GRAPH_FORMATS if result_type in ('CONSTRUCT', 'DESCRIBE') else RESULT_FORMATS
+
+
+def query_type(query):
+    """'SELECT', 'ASK', 'CONSTRUCT', atau 'DESCRIBE' dari query hasil prepare()"""
+    return query.algebra.name[:-len('Query')].upper()
+
+
+def serialize(result, fmt):
+    """Body bytes hasil query dalam format `fmt` (kunci RESULT_FORMATS / GRAPH_FORMATS)"""
+    return result.serialize(format=formats_for(result.type)[fmt][1], encoding='utf-8')
@@ -0,0 +1,411 @@
+"""Store rdflib di file SQLite, alternatif Graph in-memory (GRAPH_STORE=sqlite).
+
+Term (URI, blank node, literal) disimpan sekali di tabel `terms`, dan triple
+sebagai tiga ID integer. Tabel `triples` berkunci (s, p, o) dan punya index
+(p, o, s) serta (o, s, p), jadi setiap pola triple rdflib dijawab dengan satu
+range scan index:
+
+    (s, -, -) / (s, p, -) / (s, p, o)   -> SPO
+    (-, p, -) / (-, p, o)                -> POS
+    (-, -, o) / (s, -, o)                -> OSP
+
+File dibuka dalam mode WAL: beberapa proses worker bisa membaca bersamaan
+sementara satu proses menulis, dan penulisan di dalam transaction() bersifat
+atomik. Tabel `meta` menyimpan jumlah triple (COUNT(*) harus memindai tabel)
+dan versi graph terakhir yang sudah masuk, untuk dicocokkan dengan journal.
+
+Hanya satu graph (tanpa named graph), sama seperti Graph() yang dipakai app.
+ID term tidak pernah dihapus atau dipakai ulang, jadi cache term per proses
+tetap valid walaupun proses lain menulis.
+"""
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.store import Store
+
+KIND_URI, KIND_BNODE, KIND_LITERAL = 0, 1, 2
+# Jumlah term per cache (term -> ID dan ID -> term) sebelum cache dikosongkan
+TERM_CACHE_SIZE = 200000
+# Baris yang diambil per putaran saat membaca triple
+FETCH_ROWS = 1000
+BUSY_TIMEOUT = 30  # detik menunggu lock tulis proses lain
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL,
+    kind INTEGER NOT NULL,
+    datatype TEXT NOT NULL DEFAULT '',
+    lang TEXT NOT NULL DEFAULT '',
+    UNIQUE (value, kind, datatype, lang)
+);
+CREATE TABLE IF NOT EXISTS triples (
+    s INTEGER NOT NULL,
+    p INTEGER NOT NULL,
+    o INTEGER NOT NULL,
+    PRIMARY KEY (s, p, o)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS triples_pos ON triples (p, o, s);
+CREATE INDEX IF NOT EXISTS triples_osp ON triples (o, s, p);
+CREATE TABLE IF NOT EXISTS namespaces (
+    prefix TEXT PRIMARY KEY,
+    uri TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta VALUES ('triples', 0);
+"""
+
+# Subset PN_LOCAL Turtle yang aman ditulis sebagai prefix:nama
+_LOCAL_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_\-]*$')
+
+
+def _key(term):
+    """(value, kind, datatype, lang) sebuah term, sesuai kolom tabel terms"""
+    if isinstance(term, Literal):
+        return str(term), KIND_LITERAL, str(term.datatype or ''), term.language or ''
+    if isinstance(term, BNode):
+        return str(term), KIND_BNODE, '', ''
+    return str(term), KIND_URI, '', ''
+
+
+def _term(value, kind, datatype, lang):
+    if kind == KIND_URI:
+        return URIRef(value)
+    if kind == KIND_BNODE:
+        return BNode(value)
+    return Literal(value, lang=lang or None, datatype=datatype or None)
+
+
+class SQLiteStore(Store):
+    """Store rdflib di atas satu file SQLite; lihat docstring modul"""
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = True
+    graph_aware = False
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        self._ids = {}    # (value, kind, datatype, lang) -> ID, hanya yang sudah di-commit
+        self._terms = {}  # ID -> term
+        self._inherited = []  # koneksi milik proses induk (setelah fork): jangan ditutup di sini
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        self._load_namespaces(conn)
+
+    # --- koneksi & transaksi ---
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # Batch journal sudah di-fsync lebih dulu, jadi commit terakhir yang hilang
+        # saat listrik padam dipulihkan lewat replay; cukup NORMAL
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _conn(self):
+        """Koneksi milik thread (dan proses) ini"""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            if getattr(local, 'conn', None) is not None:
+                self._inherited.append(local.conn)
+            local.conn = self._connect()
+            local.pid = os.getpid()
+            local.depth = 0
+            local.pending = {}
+        return local.conn
+
+    @contextmanager
+    def transaction(self):
+        """Penulisan atomik (BEGIN IMMEDIATE ... COMMIT); boleh bersarang, hanya yang terluar yang commit"""
+        conn = self._conn()
+        local = self._local
+        if local.depth:
+            local.depth += 1
+            try:
+                yield
+            finally:
+                local.depth -= 1
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        local.depth = 1
+        try:
+            yield
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            # ID term baru ikut batal dan bisa dipakai ulang oleh insert berikutnya
+            for term_id in local.pending.values():
+                self._terms.pop(term_id, None)
+            raise
+        else:
+            self._remember(local.pending.items())
+        finally:
+            local.depth = 0
+            local.pending = {}
+
+    def commit(self):
+        pass  # setiap penulisan sudah di-commit oleh transaction()
+
+    def rollback(self):
+        pass
+
+    def close(self, commit_pending_transaction=False):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local = threading.local()
+
+    # --- term ---
+    def _remember(self, items):
+        if len(self._ids) > TERM_CACHE_SIZE:
+            self._ids.clear()
+        for key, term_id in items:
+            self._ids[key] = term_id
+
+    def _lookup(self, conn, term):
+        """ID term, atau None jika term belum pernah disimpan"""
+        key = _key(term)
+        term_id = self._ids.get(key)
+        if term_id is None:
+            term_id = self._local.pending.get(key)
+        if term_id is None:
+            row = conn.execute('SELECT id FROM terms WHERE value = ? AND kind = ? AND datatype = ? AND lang = ?',
+                               key).fetchone()
+            if row is None:
+                return None
+            term_id = row[0]
+            self._remember([(key, term_id)])
+        return term_id
+
+    def _intern(self, conn, term):
+        """ID term, disimpan dulu jika belum ada (dipanggil di dalam transaction())"""
+        term_id = self._lookup(conn, term)
+        if term_id is None:
+            key = _key(term)
+            term_id = conn.execute('INSERT INTO terms (value, kind, datatype, lang) VALUES (?, ?, ?, ?)',
+                                   key).lastrowid
+            self._local.pending[key] = term_id
+        return term_id
+
+    def _decode(self, conn, ids):
+        """{ID: term} untuk semua ID di `ids`; yang belum ada di cache dibaca dari tabel terms"""
+        cache = self._terms
+        terms, missing = {}, []
+        for term_id in set(ids):
+            term = cache.get(term_id)
+            if term is None:
+                missing.append(term_id)
+            else:
+                terms[term_id] = term
+        if len(cache) + len(missing) > TERM_CACHE_SIZE:
+            cache.clear()
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            rows = conn.execute(f"SELECT id, value, kind, datatype, lang FROM terms WHERE id IN "
+                                f"({','.join('?' * len(chunk))})", chunk)
+            for term_id, *key in rows:
+                terms[term_id] = cache[term_id] = _term(*key)
+        return terms
+
+    # --- triple ---
+    def _pattern(self, conn, pattern):
+        """(klausa WHERE, parameter) untuk pola triple, atau None jika ada term yang tidak dikenal"""
+        where, params = [], []
+        for column, term in zip('spo', pattern):
+            if term is None:
+                continue
+            term_id = self._lookup(conn, term)
+            if term_id is None:
+                return None
+            where.append(f'{column} = ?')
+            params.append(term_id)
+        return (' WHERE ' + ' AND '.join(where) if where else ''), params
+
+    def _adjust_count(self, conn, delta):
+        if delta:
+            conn.execute("UPDATE meta SET value = value + ? WHERE key = 'triples'", (delta,))
+
+    def add(self, triple, context=None, quoted=False):
+        conn = self._conn()
+        with self.transaction():
+            ids = [self._intern(conn, term) for term in triple]
+            if conn.execute('INSERT OR IGNORE INTO triples VALUES (?, ?, ?)', ids).rowcount > 0:
+                self._adjust_count(conn, 1)
+
+    def addN(self, quads):
+        """Tambah banyak triple dalam satu transaksi"""
+        conn = self._conn()
+        with self.transaction():
+            cursor = conn.executemany('INSERT OR IGNORE INTO triples VALUES (?, ?, ?)', (
+                [self._intern(conn, term) for term in (s, p, o)] for s, p, o, _ in quads))
+            self._adjust_count(conn, cursor.rowcount)
+
+    def remove(self, triple_pattern, context=None):
+        conn = self._conn()
+        with self.transaction():
+            pattern = self._pattern(conn, triple_pattern)
+            if pattern is not None:
+                where, params = pattern
+                self._adjust_count(conn, -conn.execute('DELETE FROM triples' + where, params).rowcount)
+
+    def triples(self, triple_pattern, context=None):
+        conn = self._conn()
+        pattern = self._pattern(conn, triple_pattern)
+        if pattern is None:
+            return
+        where, params = pattern
+        cursor = conn.execute('SELECT s, p, o FROM triples' + where, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(FETCH_ROWS)
+                if not rows:
+                    break
+                terms = self._decode(conn, [term_id for row in rows for term_id in row])
+                for s, p, o in rows:
+                    yield (terms[s], terms[p], terms[o]), iter(())
+        finally:
+            cursor.close()
+
+    def __len__(self, context=None):
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'triples'").fetchone()[0]
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    # --- versi graph (dicocokkan dengan journal) ---
+    @property
+    def version(self):
+        """Versi graph terakhir yang masuk ke store, None jika store belum pernah diisi"""
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else None
+
+    def set_version(self, version):
+        """Catat versi graph yang sudah masuk; panggil di transaksi yang sama dengan perubahannya"""
+        self._conn().execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+
+    # --- namespace ---
+    def _load_namespaces(self, conn):
+        self._namespace = {prefix: URIRef(uri) for prefix, uri in conn.execute('SELECT prefix, uri FROM namespaces')}
+        self._prefix = {uri: prefix for prefix, uri in self._namespace.items()}
+
+    def bind(self, prefix, namespace, override=True):
+        # Logika sama dengan Memory.bind() rdflib, lalu tabel namespaces ditulis ulang jika berubah
+        before = dict(self._namespace)
+        bound_namespace = self._namespace.get(prefix)
+        bound_prefix = self._prefix.get(namespace)
+        if bound_prefix is None and bound_namespace is not None:
+            bound_prefix = self._prefix.get(bound_namespace)
+        if override:
+            if bound_prefix is not None:
+                del self._namespace[bound_prefix]
+            if bound_namespace is not None:
+                del self._prefix[bound_namespace]
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+        else:
+            key_namespace = namespace if bound_namespace is None else bound_namespace
+            key_prefix = prefix if bound_prefix is None else bound_prefix
+            self._prefix[key_namespace] = key_prefix
+            self._namespace[key_prefix] = key_namespace
+        if self._namespace == before:
+            return
+        conn = self._conn()
+        with self.transaction():
+            conn.execute('DELETE FROM namespaces')
+            conn.executemany('INSERT INTO namespaces VALUES (?, ?)',
+                             [(p, str(ns)) for p, ns in self._namespace.items()])
+
+    def namespace(self, prefix):
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace):
+        return self._prefix.get(namespace)
+
+    def namespaces(self):
+        yield from list(self._namespace.items())
+
+    # --- ekspor ---
+    @contextmanager
+    def read_snapshot(self):
+        """Transaksi baca di koneksi terpisah: isi dan versinya konsisten walaupun ada penulisan bersamaan"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN')
+            row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            yield StoreSnapshot(self, conn, row[0] if row else 0)
+        finally:
+            conn.close()
+
+
+class StoreSnapshot:
+    """Isi store pada satu titik waktu (dari SQLiteStore.read_snapshot())"""
+
+    def __init__(self, store, conn, version):
+        self._store = store
+        self._conn = conn
+        self.version = version
+
+    def _used_namespaces(self):
+        """(uri, prefix) yang dipakai term di snapshot; prefix bawaan rdflib lainnya tidak ditulis"""
+        datatypes = [row[0] for row in self._conn.execute(
+            "SELECT DISTINCT datatype FROM terms WHERE datatype != ''")]
+        used = []
+        for prefix, uri in self._store.namespaces():
+            uri = str(uri)
+            # Range scan index UNIQUE(value, ...): adakah URI yang diawali namespace ini
+            if any(datatype.startswith(uri) for datatype in datatypes) or self._conn.execute(
+                    'SELECT 1 FROM terms WHERE value >= ? AND value < ? AND kind = ? LIMIT 1',
+                    (uri, uri + '\U0010ffff', KIND_URI)).fetchone():
+                used.append((uri, prefix))
+        return used
+
+    def write_turtle(self, out):
+        """Tulis isi snapshot ke `out` (file teks) sebagai Turtle, satu blok per subjek.
+
+        Triple dibaca berurutan lewat index SPO, jadi graph tidak pernah
+        dimuat utuh ke memori.
+        """
+        namespaces = sorted(self._used_namespaces(), key=lambda item: -len(item[0]))
+        for uri, prefix in sorted(namespaces, key=lambda item: item[1]):
+            out.write(f'@prefix {prefix}: <{uri}> .\n')
+
+        def text(term):
+            if isinstance(term, URIRef):
+                for uri, prefix in namespaces:
+                    if term.startswith(uri) and _LOCAL_NAME.match(term[len(uri):]):
+                        return f'{prefix}:{term[len(uri):]}'
+                return term.n3()
+            if isinstance(term, Literal):
+                plain = Literal(str(term), lang=term.language).n3()
+                return f'{plain}^^{text(term.datatype)}' if term.datatype else plain
+            return term.n3()
+
+        cursor = self._conn.execute('SELECT s, p, o FROM triples ORDER BY s, p, o')
+        last_s = last_p = None
+        while True:
+            rows = cursor.fetchmany(FETCH_ROWS)
+            if not rows:
+                break
+            terms = self._store._decode(self._conn, [term_id for row in rows for term_id in row])
+            for s, p, o in rows:
+                if s != last_s:
+                    out.write(' .\n' if last_s is not None else '')
+                    out.write(f'\n{text(terms[s])}\n    {text(terms[p])} {text(terms[o])}')
+                elif p != last_p:
+                    out.write(f' ;\n    {text(terms[p])} {text(terms[o])}')
+                else:
+                    out.write(f' ,\n        {text(terms[o])}')
+                last_s, last_p = s, p
+        if last_s is not None:
+            out.write(' .\n')
@@ -15,6 +15,13 @@ document.addEventListener('DOMContentLoaded', function() {
 });
 
 async function loadSiteDetail() {
+    // Halaman dirender server dengan data /api/site/<id> tertanam: tanpa request kedua
+    const embedded = document.getElementById('siteData');
+    if (embedded) {
+        displaySiteDetail(JSON.parse(embedded.textContent));
+        return;
+    }
+    
     try {
         const response = await fetch(`/api/site/${siteId}`);
         
@@ -57,7 +64,7 @@ function displaySiteDetail(site) {
     }
     
     // Update transport
-    updateTransportCards(site.transport_terdekat);
+    updateTransportCards(site.transport);
     
     // Update events based on religion
     updateEventTags(site.agama);
@@ -93,33 +100,33 @@ function formatLocationName(location) {
     return location.replace(/([A-Z])/g, ' $1').trim();
 }
 
+// Moda dari /api/site/<id> (field transport, sudah diurai server) -> icon
+const transportIcons = {
+    'KRL': 'fa-train',
+    'MRT': 'fa-train',
+    'LRT': 'fa-train',
+    'TJ': 'fa-bus-alt',
+    'JAK': 'fa-bus'
+};
+
 function updateTransportCards(transport) {
     const container = document.getElementById('transportCards');
     
-    if (!transport || transport === 'Tidak ada data') {
+    if (!transport || transport.length === 0) {
         container.innerHTML = '<p style="color: #6c757d;">Tidak ada data transportasi</p>';
         return;
     }
     
-    // Split transportasi yang dipisahkan oleh "; "
-    const transports = transport.split(';').map(t => t.trim()).filter(t => t);
-    
-    container.innerHTML = transports.map(t => {
-        // Determine transport type per item
-        let icon = 'fa-bus';
-        
-        if (t.toLowerCase().includes('stasiun') || t.toLowerCase().includes('krl') || t.toLowerCase().includes('mrt')) {
-            icon = 'fa-train';
-        } else if (t.toLowerCase().includes('halte')) {
-            icon = 'fa-bus-alt';
-        }
+    container.innerHTML = transport.map(t => {
+        const icon = transportIcons[t.mode] || 'fa-bus';
+        const details = [t.mode, t.line].filter(Boolean).join(' · ');
         
         return `
             <div class="transport-card">
                 <i class="fas ${icon}"></i>
                 <div>
-                    <span>${t}</span>
-                    <small>Jarak ± 500m</small>
+                    <span>${t.stop || t.line}</span>
+                    <small>${details || 'Jarak ± 500m'}</small>
                 </div>
             </div>
         `;
@@ -1,21 +1,89 @@
 // ===== JELAJAHI PAGE =====
-let allSites = [];
+// Filter, urutan, dan pagination dijalankan di server (/api/sites)
 let currentPage = 1;
+let totalPages = 0;
+let sitesVersion = null; // versi graph dari halaman yang sedang ditampilkan
 const itemsPerPage = 8;
 
+// Nilai dropdown urutan -> parameter sort API
+const sortParams = {
+    'nama-asc': 'nama',
+    'nama-desc': '-nama',
+    'tahun-asc': 'tahun',
+    'tahun-desc': '-tahun',
+    'agama': 'agama',
+    'wilayah': 'wilayah'
+};
+
 document.addEventListener('DOMContentLoaded', function() {
-    loadSites();
+    if (!hydrateSites()) loadSites();
     loadLocations();
     setupFilters();
+    // Muat ulang halaman yang sedang dilihat hanya jika ada site yang berubah
+    watchSiteChanges(() => sitesVersion, 'id', () => loadSites(currentPage));
 });
 
-async function loadSites() {
+function buildQuery(page) {
+    const params = new URLSearchParams();
+    
+    const jenisFilter = document.getElementById('jenisFilter').value;
+    const wilayahFilter = document.getElementById('wilayahFilter').value;
+    const sortFilter = document.getElementById('sortFilter').value;
+    const searchQuery = document.getElementById('searchInput').value.trim();
+    
+    if (jenisFilter) params.set('tipe', jenisFilter);
+    if (wilayahFilter) params.set('wilayah', wilayahFilter);
+    if (searchQuery) params.set('q', searchQuery);
+    params.set('sort', sortParams[sortFilter] || 'nama');
+    params.set('limit', itemsPerPage);
+    // Kartu tidak menampilkan deskripsi: jangan ikut diunduh
+    params.set('fields', 'nama,tipe,agama,wilayah,tahun,gambar_url');
+    params.set('offset', (page - 1) * itemsPerPage);
+    
+    return params.toString();
+}
+
+// Halaman pertama sudah dirender server; data /api/sites-nya tertanam di #initialSites
+function hydrateSites() {
+    const embedded = document.getElementById('initialSites');
+    if (!embedded) return false;
+    
+    const data = JSON.parse(embedded.textContent);
+    currentPage = parseInt(embedded.dataset.page) || 1;
+    sitesVersion = data.version;
+    generatePagination(data.total);
+    return true;
+}
+
+// URL halaman dengan filter yang sama (dibaca server saat merender /jelajahi)
+function pageUrl(page) {
+    const params = new URLSearchParams();
+    
+    const jenisFilter = document.getElementById('jenisFilter').value;
+    const wilayahFilter = document.getElementById('wilayahFilter').value;
+    const sortFilter = document.getElementById('sortFilter').value;
+    const searchQuery = document.getElementById('searchInput').value.trim();
+    
+    if (jenisFilter) params.set('tipe', jenisFilter);
+    if (wilayahFilter) params.set('wilayah', wilayahFilter);
+    if (sortFilter) params.set('sort', sortFilter);
+    if (searchQuery) params.set('q', searchQuery);
+    if (page > 1) params.set('page', page);
+    
+    const query = params.toString();
+    return query ? `${location.pathname}?${query}` : location.pathname;
+}
+
+async function loadSites(page = 1) {
     showLoading(true);
     
     try {
-        const response = await fetch('/api/sites');
-        allSites = await response.json();
-        displaySites(allSites);
+        const response = await fetch(`/api/sites?${buildQuery(page)}`);
+        const data = await response.json();
+        currentPage = page;
+        sitesVersion = data.version;
+        displaySites(data.items, data.total);
+        history.replaceState(null, '', pageUrl(page));
     } catch (error) {
         console.error('Error loading sites:', error);
         showEmpty(true);
@@ -25,11 +93,14 @@ async function loadSites() {
 }
 
 async function loadLocations() {
+    const wilayahFilter = document.getElementById('wilayahFilter');
+    // Opsi wilayah sudah dirender server
+    if (wilayahFilter.options.length > 1) return;
+    
     try {
         const response = await fetch('/api/locations');
         const locations = await response.json();
         
-        const wilayahFilter = document.getElementById('wilayahFilter');
         locations.forEach(loc => {
             const option = document.createElement('option');
             option.value = loc;
@@ -58,79 +129,44 @@ function setupFilters() {
             applyFilters();
         }
     });
+    searchInput.addEventListener('input', suggestSites);
 }
 
-function applyFilters() {
-    let filteredSites = [...allSites];
-    
-    const jenisFilter = document.getElementById('jenisFilter').value;
-    const wilayahFilter = document.getElementById('wilayahFilter').value;
-    const sortFilter = document.getElementById('sortFilter').value;
-    const searchQuery = document.getElementById('searchInput').value.toLowerCase();
-    
-    if (jenisFilter) {
-        filteredSites = filteredSites.filter(site => site.tipe === jenisFilter);
-    }
-    
-    if (wilayahFilter) {
-        filteredSites = filteredSites.filter(site => site.wilayah === wilayahFilter);
-    }
-    
-    if (searchQuery) {
-        filteredSites = filteredSites.filter(site => 
-            site.nama.toLowerCase().includes(searchQuery) ||
-            site.alamat.toLowerCase().includes(searchQuery) ||
-            site.wilayah.toLowerCase().includes(searchQuery)
-        );
-    }
-    
-    // Apply sorting
-    if (sortFilter) {
-        filteredSites = sortSites(filteredSites, sortFilter);
-    }
-    
-    currentPage = 1;
-    displaySites(filteredSites);
+// Typeahead: saran nama dari /api/search (index full-text di server)
+let suggestTimer = null;
+let suggestController = null;
+
+function suggestSites() {
+    clearTimeout(suggestTimer);
+    suggestTimer = setTimeout(async function() {
+        const query = document.getElementById('searchInput').value;
+        const list = document.getElementById('searchSuggestions');
+        if (suggestController) suggestController.abort();
+        if (query.trim().length < 2) {
+            list.innerHTML = '';
+            return;
+        }
+        
+        suggestController = new AbortController();
+        try {
+            const params = new URLSearchParams({ q: query, limit: 8 });
+            const response = await fetch(`/api/search?${params}`, { signal: suggestController.signal });
+            const data = await response.json();
+            list.innerHTML = (data.items || [])
+                .map(site => `<option value="${site.nama.replace(/"/g, '&quot;')}"></option>`)
+                .join('');
+        } catch (error) {
+            if (error.name !== 'AbortError') console.error('Error loading suggestions:', error);
+        }
+    }, 150);
 }
 
-function sortSites(sites, sortType) {
-    const sorted = [...sites];
-    
-    switch(sortType) {
-        case 'nama-asc':
-            sorted.sort((a, b) => a.nama.localeCompare(b.nama));
-            break;
-        case 'nama-desc':
-            sorted.sort((a, b) => b.nama.localeCompare(a.nama));
-            break;
-        case 'tahun-asc':
-            sorted.sort((a, b) => {
-                const yearA = a.tahun ? parseInt(a.tahun) : 9999;
-                const yearB = b.tahun ? parseInt(b.tahun) : 9999;
-                return yearA - yearB;
-            });
-            break;
-        case 'tahun-desc':
-            sorted.sort((a, b) => {
-                const yearA = a.tahun ? parseInt(a.tahun) : 0;
-                const yearB = b.tahun ? parseInt(b.tahun) : 0;
-                return yearB - yearA;
-            });
-            break;
-        case 'agama':
-            sorted.sort((a, b) => (a.agama || '').localeCompare(b.agama || ''));
-            break;
-        case 'wilayah':
-            sorted.sort((a, b) => (a.wilayah || '').localeCompare(b.wilayah || ''));
-            break;
-    }
-    
-    return sorted;
+function applyFilters() {
+    loadSites(1);
 }
 
-function displaySites(sites) {
+function displaySites(sites, totalItems) {
     const grid = document.getElementById('sitesGrid');
-    const emptyState = document.getElementById('emptyState');
     
     if (sites.length === 0) {
         showEmpty(true);
@@ -141,15 +177,10 @@ function displaySites(sites) {
     
     showEmpty(false);
     
-    // Pagination
-    const startIndex = (currentPage - 1) * itemsPerPage;
-    const endIndex = startIndex + itemsPerPage;
-    const paginatedSites = sites.slice(startIndex, endIndex);
-    
-    grid.innerHTML = paginatedSites.map(site => createSiteCard(site)).join('');
+    grid.innerHTML = sites.map(site => createSiteCard(site)).join('');
     
     // Generate pagination
-    generatePagination(sites.length);
+    generatePagination(totalItems);
 }
 
 function createSiteCard(site) {
@@ -214,7 +245,7 @@ function getDefaultImage(type) {
 }
 
 function generatePagination(totalItems) {
-    const totalPages = Math.ceil(totalItems / itemsPerPage);
+    totalPages = Math.ceil(totalItems / itemsPerPage);
     const pagination = document.getElementById('pagination');
     
     if (totalPages <= 1) {
@@ -246,41 +277,12 @@ function generatePagination(totalItems) {
 }
 
 function changePage(page) {
-    const filteredSites = getFilteredSites();
-    const totalPages = Math.ceil(filteredSites.length / itemsPerPage);
-    
     if (page < 1 || page > totalPages) return;
     
-    currentPage = page;
-    displaySites(filteredSites);
-    
-    // Scroll to top of grid
-    document.querySelector('.sites-section').scrollIntoView({ behavior: 'smooth' });
-}
-
-function getFilteredSites() {
-    let filteredSites = [...allSites];
-    
-    const jenisFilter = document.getElementById('jenisFilter').value;
-    const wilayahFilter = document.getElementById('wilayahFilter').value;
-    const searchQuery = document.getElementById('searchInput').value.toLowerCase();
-    
-    if (jenisFilter) {
-        filteredSites = filteredSites.filter(site => site.tipe === jenisFilter);
-    }
-    
-    if (wilayahFilter) {
-        filteredSites = filteredSites.filter(site => site.wilayah === wilayahFilter);
-    }
-    
-    if (searchQuery) {
-        filteredSites = filteredSites.filter(site => 
-            site.nama.toLowerCase().includes(searchQuery) ||
-            site.alamat.toLowerCase().includes(searchQuery)
-        );
-    }
-    
-    return filteredSites;
+    loadSites(page).then(() => {
+        // Scroll to top of grid
+        document.querySelector('.sites-section').scrollIntoView({ behavior: 'smooth' });
+    });
 }
 
 function showLoading(show) {
@@ -19,9 +19,10 @@ const religionStyle = {
     'Konghucu': { color: '#e67e22', icon: 'fa-vihara' }
 };
 
-// Events - loaded dynamically from backend API
-let events = [];
-let eventsCache = {}; // Cache untuk mengurangi API calls
+// Events - loaded dynamically from backend API, satu bulan per request
+let monthEvents = {}; // Cache 'YYYY-MM' -> { 'YYYY-MM-DD': [acara] }
+let upcomingEvents = [];
+const UPCOMING_LIMIT = 100;
 
 // Fallback data jika API gagal (minimal events)
 const fallbackEvents = [
@@ -33,30 +34,52 @@ const fallbackEvents = [
     { date: '2026-12-25', title: 'Perayaan Natal', location: 'Gereja Katedral Jakarta', agama: 'Katolik' }
 ];
 
-// Load events dari backend API
-async function loadCalendarEvents(year) {
-    // Check cache dulu
-    if (eventsCache[year]) {
-        console.log(`✅ Using cached events for ${year}`);
-        return eventsCache[year];
-    }
+function isoDate(year, month, day) {
+    return `${year}-${String(month + 1).padStart(2, '0')}-${String(day).padStart(2, '0')}`;
+}
+
+function groupByDate(list) {
+    const byDate = {};
+    list.forEach(e => (byDate[e.date] = byDate[e.date] || []).push(e));
+    return byDate;
+}
+
+// Load events satu bulan dari backend API (month: 0-11)
+async function loadMonthEvents(year, month) {
+    const key = isoDate(year, month, 1).substring(0, 7);
+    if (monthEvents[key]) return monthEvents[key];
     
+    const lastDay = new Date(year, month + 1, 0).getDate();
+    const from = `${key}-01`;
+    const to = isoDate(year, month, lastDay);
     try {
-        const response = await fetch(`/api/calendar/${year}`);
+        const response = await fetch(`/api/calendar?from=${from}&to=${to}`);
         if (!response.ok) throw new Error('API request failed');
         
         const data = await response.json();
-        if (data.success && data.events) {
-            console.log(`✅ Loaded ${data.events.length} events for ${year} from API`);
-            eventsCache[year] = data.events;
-            return data.events;
-        }
+        console.log(`✅ Loaded ${data.events.length} events for ${key} from API`);
+        monthEvents[key] = groupByDate(data.events);
+        return monthEvents[key];
     } catch (error) {
         console.warn('⚠️ Failed to load events from API, using fallback:', error);
     }
     
-    // Fallback ke data manual
-    return fallbackEvents.filter(e => e.date.startsWith(year.toString()));
+    // Fallback ke data manual (tidak di-cache agar dicoba lagi nanti)
+    return groupByDate(fallbackEvents.filter(e => e.date >= from && e.date <= to));
+}
+
+// Acara mendatang mulai hari ini (tidak terbatas pada bulan yang ditampilkan)
+async function loadUpcomingEvents() {
+    const today = new Date();
+    const from = isoDate(today.getFullYear(), today.getMonth(), today.getDate());
+    try {
+        const response = await fetch(`/api/calendar?from=${from}&limit=${UPCOMING_LIMIT}`);
+        if (!response.ok) throw new Error('API request failed');
+        return (await response.json()).events;
+    } catch (error) {
+        console.warn('⚠️ Failed to load upcoming events, using fallback:', error);
+        return fallbackEvents.filter(e => e.date >= from);
+    }
 }
 
 // Initialize calendar saat halaman load
@@ -73,19 +96,10 @@ document.addEventListener('DOMContentLoaded', async function() {
         upcomingContainer.innerHTML = '<p style="color: #6c757d; text-align: center;">Memuat acara...</p>';
     }
     
-    // Load events untuk tahun sekarang
-    events = await loadCalendarEvents(currentYear);
-    console.log(`✅ Loaded ${events.length} events for ${currentYear}`);
-    
-    // Pre-load events untuk tahun depan juga jika Desember
-    if (currentMonth >= 11) {
-        const nextYearEvents = await loadCalendarEvents(currentYear + 1);
-        events = [...events, ...nextYearEvents];
-    }
-    
-    renderCalendar();
     setupNavigation();
     setupEventsNavigation();
+    const [, upcoming] = await Promise.all([renderCalendar(), loadUpcomingEvents()]);
+    upcomingEvents = upcoming;
     renderUpcomingEvents();
 });
 
@@ -100,11 +114,11 @@ async function renderCalendar() {
     calendarGrid.innerHTML = '';
     headers.forEach(header => calendarGrid.appendChild(header));
     
-    // Load events untuk tahun ini jika belum ada
-    if (!eventsCache[currentYear]) {
-        const yearEvents = await loadCalendarEvents(currentYear);
-        events = [...events.filter(e => !e.date.startsWith(currentYear.toString())), ...yearEvents];
-    }
+    // Load events untuk bulan yang ditampilkan saja
+    const year = currentYear, month = currentMonth;
+    const eventsByDate = await loadMonthEvents(year, month);
+    // Abaikan hasil jika user sudah pindah bulan selama request berjalan
+    if (year !== currentYear || month !== currentMonth) return;
     
     // Get first day of month and total days
     const firstDay = new Date(currentYear, currentMonth, 1).getDay();
@@ -133,8 +147,8 @@ async function renderCalendar() {
         }
         
         // Check if has event
-        const dateStr = `${currentYear}-${String(currentMonth + 1).padStart(2, '0')}-${String(day).padStart(2, '0')}`;
-        const dayEvents = events.filter(e => e.date === dateStr);
+        const dateStr = isoDate(currentYear, currentMonth, day);
+        const dayEvents = eventsByDate[dateStr] || [];
         
         if (dayEvents.length > 0) {
             dayEl.classList.add('has-event');
@@ -155,7 +169,7 @@ async function renderCalendar() {
             });
             
             dayEl.appendChild(iconsContainer);
-            dayEl.addEventListener('click', () => showEventsForDate(dateStr));
+            dayEl.addEventListener('click', () => showEventsForDate(dateStr, dayEvents));
         }
         
         calendarGrid.appendChild(dayEl);
@@ -183,11 +197,6 @@ function setupNavigation() {
         if (currentMonth < 0) {
             currentMonth = 11;
             currentYear--;
-            // Load events untuk tahun baru ini
-            if (!eventsCache[currentYear]) {
-                const yearEvents = await loadCalendarEvents(currentYear);
-                events = [...events, ...yearEvents];
-            }
         }
         await renderCalendar();
     });
@@ -197,11 +206,6 @@ function setupNavigation() {
         if (currentMonth > 11) {
             currentMonth = 0;
             currentYear++;
-            // Load events untuk tahun baru ini
-            if (!eventsCache[currentYear]) {
-                const yearEvents = await loadCalendarEvents(currentYear);
-                events = [...events, ...yearEvents];
-            }
         }
         await renderCalendar();
     });
@@ -226,10 +230,7 @@ function setupEventsNavigation() {
     
     if (nextBtn) {
         nextBtn.addEventListener('click', function() {
-            const today = new Date();
-            today.setHours(0, 0, 0, 0);
-            const totalEvents = events.filter(e => new Date(e.date) >= today).length;
-            const totalPages = Math.ceil(totalEvents / EVENTS_PER_PAGE);
+            const totalPages = Math.ceil(upcomingEvents.length / EVENTS_PER_PAGE);
             
             if (currentEventPage < totalPages - 1) {
                 currentEventPage++;
@@ -256,13 +257,8 @@ function updateEventsNavigationButtons(currentPage, totalPages) {
 
 function renderUpcomingEvents() {
     const container = document.getElementById('upcomingEvents');
-    const today = new Date();
-    today.setHours(0, 0, 0, 0);
-    
-    // Filter all upcoming events
-    const allUpcomingEvents = events
-        .filter(event => new Date(event.date) >= today)
-        .sort((a, b) => new Date(a.date) - new Date(b.date));
+    // Sudah terurut per tanggal dari API
+    const allUpcomingEvents = upcomingEvents;
     
     if (allUpcomingEvents.length === 0) {
         container.innerHTML = '<p style="color: #6c757d; text-align: center;">Tidak ada acara mendatang</p>';
@@ -274,9 +270,9 @@ function renderUpcomingEvents() {
     const totalPages = Math.ceil(allUpcomingEvents.length / EVENTS_PER_PAGE);
     const startIdx = currentEventPage * EVENTS_PER_PAGE;
     const endIdx = Math.min(startIdx + EVENTS_PER_PAGE, allUpcomingEvents.length);
-    const upcomingEvents = allUpcomingEvents.slice(startIdx, endIdx);
+    const pageEvents = allUpcomingEvents.slice(startIdx, endIdx);
     
-    container.innerHTML = upcomingEvents.map(event => {
+    container.innerHTML = pageEvents.map(event => {
         const date = new Date(event.date);
         const day = date.getDate();
         const month = months[date.getMonth()].substring(0, 3);
@@ -303,8 +299,7 @@ function renderUpcomingEvents() {
     updateEventsNavigationButtons(currentEventPage, totalPages);
 }
 
-function showEventsForDate(dateStr) {
-    const dayEvents = events.filter(e => e.date === dateStr);
+function showEventsForDate(dateStr, dayEvents) {
     if (dayEvents.length === 0) return;
     
     const date = new Date(dateStr);
@@ -52,3 +52,28 @@ function getPlaceImage(type, name) {
     
     return specificImages[name] || images[type] || images['Mosque'];
 }
+
+// ===== DELTA SYNC =====
+// Long-poll /api/changes: onChanges(data) dipanggil (dan ditunggu) hanya jika ada site yang berubah.
+// getVersion() mengembalikan versi data yang sedang ditampilkan (dari field `version` response API).
+async function watchSiteChanges(getVersion, fields, onChanges) {
+    while (true) {
+        const since = getVersion();
+        const started = Date.now();
+        try {
+            if (since === null || since === undefined) throw new Error('versi data belum diketahui');
+            const response = await fetch(`/api/changes?since=${since}&wait=25&fields=${fields}`);
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const changes = await response.json();
+            if (changes.reset || changes.upserted.length || changes.deleted.length) {
+                await onChanges(changes);
+            } else if (Date.now() - started < 5000) {
+                // Server sedang tidak bisa menahan request (slot long-poll penuh): jangan poll beruntun
+                await new Promise(resolve => setTimeout(resolve, 10000));
+            }
+        } catch (error) {
+            console.warn('⚠️ Gagal mengambil perubahan, mencoba lagi:', error);
+            await new Promise(resolve => setTimeout(resolve, 10000));
+        }
+    }
+}
@@ -1,7 +1,8 @@
 // ===== MAP INITIALIZATION =====
 let map;
 let markers = [];
-let allSites = [];
+let mapFeatures = [];
+let sitesVersion = null; // versi graph dari data yang sedang ditampilkan
 
 // Icon colors by religion
 const religionColors = {
@@ -24,6 +25,8 @@ const placeIcons = {
 document.addEventListener('DOMContentLoaded', function() {
     initMap();
     loadSites();
+    map.on('moveend', loadSites);
+    watchSiteChanges(() => sitesVersion, MARKER_FIELDS, applyChanges);
     loadStats();
     loadLocations();
     setupFilters();
@@ -39,16 +42,56 @@ function initMap() {
     }).addTo(map);
 }
 
+// Server mengelompokkan site per tile (/api/geo/clusters), jadi peta hanya
+// menggambar beberapa ratus fitur berapa pun jumlah site di database
+let sitesRequest = null;
+// Field yang dipakai marker & popup (tanpa deskripsi/alamat)
+const MARKER_FIELDS = 'nama,tipe,agama,wilayah,tahun,is_heritage,latitude,longitude,gambar_url';
+
+// Filter panel dikirim sebagai parameter yang sama dengan /api/sites
+function filterParams() {
+    const params = new URLSearchParams();
+    const selectedReligions = [];
+    document.querySelectorAll('input[name="agama"]:checked').forEach(cb => {
+        selectedReligions.push(cb.value);
+    });
+    if (selectedReligions.length > 0) params.set('agama', selectedReligions.join(','));
+    
+    const heritageOnly = document.getElementById('heritageOnly');
+    if (heritageOnly && heritageOnly.checked) params.set('is_heritage', 'true');
+    
+    const wilayahFilter = document.getElementById('wilayahFilter');
+    if (wilayahFilter && wilayahFilter.value) params.set('wilayah', wilayahFilter.value);
+    return params;
+}
+
 async function loadSites() {
+    const params = filterParams();
+    params.set('z', Math.round(map.getZoom()));
+    params.set('bbox', map.getBounds().toBBoxString());
+    params.set('fields', MARKER_FIELDS);
+    const controller = new AbortController();
+    if (sitesRequest) sitesRequest.abort();
+    sitesRequest = controller;
+    
     try {
-        const response = await fetch('/api/sites');
-        allSites = await response.json();
-        updateMarkers(allSites);
+        const response = await fetch(`/api/geo/clusters?${params}`, { signal: controller.signal });
+        const data = await response.json();
+        mapFeatures = data.features || [];
+        sitesVersion = data.version;
+        updateMarkers(mapFeatures);
     } catch (error) {
+        if (error.name === 'AbortError') return;
         console.error('Error loading sites:', error);
     }
 }
 
+// Cluster dihitung ulang di server per versi; cukup ambil ulang area yang terlihat
+async function applyChanges(changes) {
+    loadStats();
+    await loadSites();
+}
+
 async function loadStats() {
     try {
         const response = await fetch('/api/stats');
@@ -78,12 +121,35 @@ async function loadLocations() {
     }
 }
 
-function updateMarkers(sites) {
+function clusterMarker(feature) {
+    const [lng, lat] = feature.geometry.coordinates;
+    const count = feature.properties.count;
+    const size = count < 10 ? 34 : count < 100 ? 42 : count < 1000 ? 50 : 58;
+    const icon = L.divIcon({
+        className: 'custom-marker',
+        html: `<div style="background-color: rgba(26, 58, 92, 0.85); width: ${size}px; height: ${size}px; border-radius: 50%; border: 3px solid white; box-shadow: 0 2px 8px rgba(0,0,0,0.4); display: flex; align-items: center; justify-content: center; color: white; font-size: 12px; font-weight: 600;">
+            ${count.toLocaleString('id-ID')}
+        </div>`,
+        iconSize: [size, size],
+        iconAnchor: [size / 2, size / 2]
+    });
+    const marker = L.marker([lat, lng], { icon: icon }).addTo(map);
+    // Zoom sampai cluster ini terpecah
+    marker.on('click', () => map.setView([lat, lng], feature.properties.expansion_zoom));
+    return marker;
+}
+
+function updateMarkers(features) {
     // Clear existing markers
     markers.forEach(marker => map.removeLayer(marker));
     markers = [];
     
-    sites.forEach(site => {
+    features.forEach(feature => {
+        if (feature.properties.cluster) {
+            markers.push(clusterMarker(feature));
+            return;
+        }
+        const site = feature.properties;
         // Koordinat diambil dari database (API response)
         if (site.latitude && site.longitude) {
             const coords = [site.latitude, site.longitude];
@@ -168,39 +234,6 @@ function setupFilters() {
 }
 
 function applyFilters() {
-    let filteredSites = [...allSites];
-    
-    // Apply religion filter
-    const selectedReligions = [];
-    document.querySelectorAll('input[name="agama"]:checked').forEach(cb => {
-        selectedReligions.push(cb.value);
-    });
-    
-    if (selectedReligions.length > 0) {
-        filteredSites = filteredSites.filter(site => selectedReligions.includes(site.agama));
-    }
-    
-    // Apply heritage filter
-    const heritageOnly = document.getElementById('heritageOnly');
-    if (heritageOnly && heritageOnly.checked) {
-        filteredSites = filteredSites.filter(site => site.is_heritage);
-    }
-    
-    // Apply wilayah filter
-    const wilayahFilter = document.getElementById('wilayahFilter');
-    if (wilayahFilter && wilayahFilter.value) {
-        filteredSites = filteredSites.filter(site => site.wilayah === wilayahFilter.value);
-    }
-    
-    // Apply sort
-    const sortFilter = document.getElementById('sortFilter');
-    if (sortFilter && sortFilter.value) {
-        if (sortFilter.value === 'nama') {
-            filteredSites.sort((a, b) => a.nama.localeCompare(b.nama));
-        } else if (sortFilter.value === 'tahun') {
-            filteredSites.sort((a, b) => (a.tahun || 9999) - (b.tahun || 9999));
-        }
-    }
-    
-    updateMarkers(filteredSites);
+    // Filter diterapkan di server supaya jumlah di cluster ikut terfilter
+    loadSites();
 }
@@ -0,0 +1,162 @@
+"""Halte/stasiun transportasi umum dari literal rel:transportTerdekat.
+
+Literal di graph berupa teks bebas, misalnya:
+
+    "H6 Istiqlal (TJ)"                -> TJ, jalur H6, halte Istiqlal
+    "Bogor Line: Juanda (KRL)"        -> KRL, jalur Bogor Line, stasiun Juanda
+    "ASEAN (MRT)"                     -> MRT, stasiun ASEAN
+    "KRL Stasiun Grogol"              -> KRL, stasiun Grogol
+    "Halte Jelambar"                  -> TJ, halte Jelambar
+    "JAK 04"                          -> JAK, jalur JAK 04 (tanpa halte)
+
+parse_transport() mengubahnya menjadi (stop_id, moda, jalur, nama halte) sekali
+saat site diproyeksikan dari graph. TransitIndex adalah index terbalik
+stop_id -> site yang diperbarui per site seperti index lain di SiteSnapshot,
+sehingga "site dekat stasiun ini" cukup satu lookup dict.
+"""
+import re
+from functools import lru_cache
+
+# Kode moda -> nama layanan
+MODES = {
+    'TJ': 'TransJakarta',
+    'KRL': 'KRL Commuter Line',
+    'MRT': 'MRT Jakarta',
+    'LRT': 'LRT Jakarta',
+    'JAK': 'Mikrotrans JakLingko',
+}
+
+_MODE_SUFFIX = re.compile(r'^(?P<body>.+?)\s*\((?P<mode>[A-Za-z]+)\)$')
+_NAMED_LINE = re.compile(r'^(?P<line>[^:]+?)\s*:\s*(?P<stop>.+)$')  # "Bogor Line: Juanda"
+_ROUTE_CODE = re.compile(r'^(?P<line>[A-Z]{0,3}\d+[A-Z]?)\s+(?P<stop>.+)$')  # "2 Juanda", "M10 ..."
+_MODE_PREFIX = re.compile(r'^(?P<mode>KRL|MRT|LRT|TJ)\s+(?:stasiun\s+|halte\s+)?(?P<stop>.+)$', re.I)
+_HALTE = re.compile(r'^halte\s+(?P<stop>.+)$', re.I)
+_JAK_ROUTE = re.compile(r'^JAK\s*(?P<number>\d+)$', re.I)
+
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def stop_id(mode, name):
+    """ID halte untuk URL: 'juanda-krl'; halte tanpa moda hanya slug namanya"""
+    return f'{slugify(name)}-{mode.lower()}' if mode else slugify(name)
+
+
+# Literal yang sama dipakai banyak site; hasilnya (tuple) dibagi, bukan diurai ulang
+@lru_cache(maxsize=4096)
+def parse_transport(text):
+    """(stop_id, moda, jalur, nama halte) dari satu literal; stop_id dan nama None jika hanya jalur"""
+    text = ' '.join(text.split())
+    mode = line = None
+    stop = text
+    match = _MODE_SUFFIX.match(text)
+    if match:
+        mode, stop = match['mode'].upper(), match['body']
+        named = _NAMED_LINE.match(stop)
+        route = _ROUTE_CODE.match(stop)
+        if named:
+            line, stop = named['line'], named['stop']
+        elif route and mode == 'TJ':
+            line, stop = route['line'], route['stop']
+    elif _JAK_ROUTE.match(text):
+        return None, 'JAK', f"JAK {_JAK_ROUTE.match(text)['number']}", None
+    elif _MODE_PREFIX.match(text):
+        match = _MODE_PREFIX.match(text)
+        mode, stop = match['mode'].upper(), match['stop']
+    elif _HALTE.match(text):
+        mode, stop = 'TJ', _HALTE.match(text)['stop']
+    return stop_id(mode, stop), mode, line, stop
+
+
+def transport_json(entry):
+    """Bentuk JSON satu entri parse_transport()"""
+    sid, mode, line, stop = entry
+    return {'id': sid, 'mode': mode, 'line': line, 'stop': stop}
+
+
+class TransitIndex:
+    """stop_id -> (moda, nama, frozenset (site_id, jalur)), plus slug nama -> stop_id.
+
+    Nilainya tidak pernah diubah di tempat (diganti tuple/frozenset baru), jadi
+    copy() cukup menyalin dict-nya. Satu halte jarang punya lebih dari
+    beberapa puluh site, sehingga mengganti frozenset per perubahan murah.
+    """
+
+    def __init__(self):
+        self.stops = {}
+        self.by_name = {}
+
+    def copy(self):
+        clone = TransitIndex()
+        clone.stops = dict(self.stops)
+        clone.by_name = dict(self.by_name)
+        return clone
+
+    def build(self, sites):
+        """Isi index dari semua site sekaligus (set biasa dulu, dibekukan di akhir)"""
+        stops, by_name = {}, {}
+        for site in sites:
+            for sid, mode, line, stop in site.get('transport') or ():
+                if sid is None:
+                    continue
+                entry = stops.get(sid)
+                if entry is None:
+                    entry = stops[sid] = (mode, stop, set())
+                    by_name.setdefault(slugify(stop), set()).add(sid)
+                entry[2].add((site['id'], line))
+        self.stops = {sid: (mode, stop, frozenset(members)) for sid, (mode, stop, members) in stops.items()}
+        self.by_name = {name: frozenset(sids) for name, sids in by_name.items()}
+
+    def add(self, site):
+        for sid, mode, line, stop in site.get('transport') or ():
+            if sid is None:
+                continue
+            entry = self.stops.get(sid)
+            if entry is None:
+                name = slugify(stop)
+                self.by_name[name] = self.by_name.get(name, frozenset()) | {sid}
+                entry = (mode, stop, frozenset())
+            self.stops[sid] = (entry[0], entry[1], entry[2] | {(site['id'], line)})
+
+    def remove(self, site):
+        for sid, mode, line, stop in site.get('transport') or ():
+            entry = self.stops.get(sid)
+            if entry is None:
+                continue
+            members = entry[2] - {(site['id'], line)}
+            if members:
+                self.stops[sid] = (entry[0], entry[1], members)
+                continue
+            del self.stops[sid]
+            name = slugify(stop)
+            rest = self.by_name.get(name, frozenset()) - {sid}
+            if rest:
+                self.by_name[name] = rest
+            else:
+                self.by_name.pop(name, None)
+
+    def __len__(self):
+        return len(self.stops)
+
+    def resolve(self, key):
+        """stop_id yang cocok dengan ID halte ('juanda-krl') atau nama saja ('juanda', semua moda)"""
+        key = slugify(key)
+        if key in self.stops:
+            return [key]
+        return sorted(self.by_name.get(key, ()))
+
+    def stop(self, sid):
+        """Dict halte: id, mode, name, lines, site_count"""
+        mode, name, members = self.stops[sid]
+        return {
+            'id': sid,
+            'mode': mode,
+            'name': name,
+            'lines': sorted({line for _, line in members if line}),
+            'site_count': len({site_id for site_id, _ in members}),
+        }
+
+    def site_ids(self, sids):
+        """Gabungan ID site untuk list stop_id"""
+        return {site_id for sid in sids for site_id, _ in self.stops[sid][2]}